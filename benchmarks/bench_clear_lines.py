@@ -0,0 +1,82 @@
+"""ライン消去のベンチマーク
+
+旧実装（全行を all() で走査し、del/insert で1行ずつ詰める）と、
+ロックしたピースが触れた行だけを調べて1パスで詰める現在の実装を、
+縦長の盤面で比較する。
+
+    python benchmarks/bench_clear_lines.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine  # noqa: E402
+from tetris_game.shapes import compile_rotation  # noqa: E402
+
+WIDTH = 10
+HEIGHTS = [20, 200, 1000, 5000]
+REPEAT = 300
+CLEARED = 4
+
+FULL_ROW = compile_rotation(['#' * WIDTH])
+HOLED_ROWS = [compile_rotation(['#' * x + '.' + '#' * (WIDTH - x - 1)]) for x in range(WIDTH)]
+
+
+def prepare(engine: GameEngine) -> None:
+    """下半分を1マス空きの行で埋め、最下段 CLEARED 行を満杯にする"""
+    board = engine.board
+    board.clear()
+    height = engine.grid_height
+    for y in range(height // 2, height - CLEARED):
+        board.place(HOLED_ROWS[y % WIDTH], 0, y, 1)
+    for y in range(height - CLEARED, height):
+        board.place(FULL_ROW, 0, y, 1)
+
+
+def legacy_clear_lines(engine: GameEngine) -> int:
+    """旧実装のライン消去（listバックエンド専用）"""
+    grid = engine.grid
+    lines_to_clear = []
+    for y in range(engine.grid_height):
+        if all(grid[y][x] != 0 for x in range(engine.grid_width)):
+            lines_to_clear.append(y)
+    for y in lines_to_clear:
+        del grid[y]
+        grid.insert(0, [0 for _ in range(engine.grid_width)])
+    return len(lines_to_clear)
+
+
+def touched_clear_lines(engine: GameEngine) -> int:
+    """ロックしたピースが最下段 CLEARED 行に触れた想定で消去"""
+    height = engine.grid_height
+    return engine.clear_lines(range(height - CLEARED, height))
+
+
+def bench(height: int, backend: str, func) -> float:
+    """1回あたりの平均マイクロ秒"""
+    engine = GameEngine(WIDTH, height, backend=backend)
+    total = 0.0
+    for _ in range(REPEAT):
+        prepare(engine)
+        start = time.perf_counter()
+        cleared = func(engine)
+        total += time.perf_counter() - start
+        assert cleared == CLEARED
+    return total / REPEAT * 1e6
+
+
+def main() -> None:
+    print(f"{'height':>8} {'legacy(us)':>12} {'list(us)':>10} {'bitboard(us)':>13} {'speedup':>8}")
+    for height in HEIGHTS:
+        legacy = bench(height, 'list', legacy_clear_lines)
+        current = bench(height, 'list', touched_clear_lines)
+        bitboard = bench(height, 'bitboard', touched_clear_lines)
+        print(f"{height:>8} {legacy:>12.1f} {current:>10.1f} {bitboard:>13.1f} "
+              f"{legacy / current:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""観戦配信用の差分ストリームのベンチマーク
+
+毎フレーム全体を送る場合（get_game_state() を pickle / state_snapshot().to_bytes()）と
+DeltaEncoder の差分フレームで、1フレームあたりのバイト数とエンコード時間を比較する。
+
+    python benchmarks/bench_delta.py
+"""
+
+import os
+import pickle
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.delta import DeltaDecoder, DeltaEncoder  # noqa: E402
+from tetris_game.game_engine import GameEngine  # noqa: E402
+from tetris_game.headless import make_random_policy  # noqa: E402
+
+GAMES = 20
+DT = 16  # 60FPS 相当
+
+
+def play(seed: int, encode: Callable[[GameEngine], bytes]) -> Tuple[int, int, float]:
+    """ランダムポリシーで1ゲーム進めながら毎フレーム encode し、(総バイト数, フレーム数, エンコード秒) を返す"""
+    engine = GameEngine(10, 20, seed=seed)
+    policy = make_random_policy(seed, input_rate=0.1)
+    total = frames = 0
+    elapsed = 0.0
+    while True:
+        start = time.perf_counter()
+        total += len(encode(engine))
+        elapsed += time.perf_counter() - start
+        frames += 1
+        if engine.game_over:
+            return total, frames, elapsed
+        action = policy(engine)
+        if action is not None:
+            engine.apply_action(action)
+        engine.update(DT)
+
+
+def measure(make_encode: Callable[[], Callable[[GameEngine], bytes]]) -> Tuple[float, float, int]:
+    """全ゲームでの (バイト/フレーム, µs/フレーム, フレーム数)"""
+    total = frames = 0
+    elapsed = 0.0
+    for seed in range(GAMES):
+        size, count, seconds = play(seed, make_encode())
+        total += size
+        frames += count
+        elapsed += seconds
+    return total / frames, elapsed / frames * 1e6, frames
+
+
+def delta_encoder(interval: int) -> Callable[[], Callable[[GameEngine], bytes]]:
+    """ゲームごとに新しい DeltaEncoder を使うエンコード関数の生成器"""
+    def make() -> Callable[[GameEngine], bytes]:
+        encoder = DeltaEncoder(keyframe_interval=interval)
+        return lambda engine: encoder.encode(engine.state_snapshot())
+    return make
+
+
+def main() -> None:
+    encodings: List[Tuple[str, Callable[[], Callable[[GameEngine], bytes]]]] = [
+        ('pickle(get_game_state)', lambda: lambda engine: pickle.dumps(engine.get_game_state())),
+        ('snapshot.to_bytes', lambda: lambda engine: engine.state_snapshot().to_bytes()),
+        ('delta (keyframe/60)', delta_encoder(60)),
+        ('delta (keyframe/600)', delta_encoder(600)),
+    ]
+    print(f"{'encoding':>24} {'bytes/frame':>12} {'encode(µs/frame)':>17}")
+    for name, make_encode in encodings:
+        size, micros, frames = measure(make_encode)
+        print(f"{name:>24} {size:>12.1f} {micros:>17.2f}")
+
+    frames_out: List[bytes] = []
+    for seed in range(GAMES):
+        encode = delta_encoder(60)()
+
+        def record(engine: GameEngine) -> bytes:
+            frames_out.append(encode(engine))
+            return frames_out[-1]
+
+        play(seed, record)
+    decoder = DeltaDecoder()
+    start = time.perf_counter()
+    for frame in frames_out:
+        decoder.decode(frame)
+    decode_us = (time.perf_counter() - start) / len(frames_out) * 1e6
+    print(f"{frames} frames/encoding from {GAMES} games, delta decode {decode_us:.2f} µs/frame")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""固定位置列挙のベンチマーク
+
+AI が毎手行う「現在のピースが到達できる全固定位置の列挙」を、move_piece /
+rotate_piece / is_valid_position を繰り返す素朴な探索と
+GameEngine.enumerate_placements() で比較する。
+
+    python benchmarks/bench_placements.py
+"""
+
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine  # noqa: E402
+from tetris_game.headless import make_random_policy, run_game  # noqa: E402
+
+ROUNDS = 200
+
+
+def naive_placements(engine: GameEngine) -> List[Tuple[int, int, int]]:
+    """エンジンの操作メソッドを1手ずつ呼ぶ幅優先探索（従来の AI のやり方）"""
+    original = engine.current_piece
+    if not engine.is_valid_position(original):
+        return []
+    start = (original.rotation, original.x, original.y)
+    seen: Dict[Tuple[int, int, int], None] = {start: None}
+    queue = deque([start])
+    locks = []
+    while queue:
+        state = queue.popleft()
+        for action in GameEngine.ACTIONS:
+            piece = original.copy()
+            piece.rotation, piece.x, piece.y = state
+            engine.current_piece = piece
+            engine.apply_action(action)
+            moved = (piece.rotation, piece.x, piece.y)
+            if moved not in seen:
+                seen[moved] = None
+                queue.append(moved)
+        piece = original.copy()
+        piece.rotation, piece.x, piece.y = state
+        if not engine.is_valid_position(piece, dy=1):
+            locks.append(state)
+    engine.current_piece = original
+    return locks
+
+
+def prepared_engines(backend: str) -> List[GameEngine]:
+    """形状ごとに、ある程度ブロックが積まれた盤面のエンジンを用意"""
+    engines = []
+    for kind in range(len(GameEngine.SHAPES)):
+        engine = GameEngine(10, 20, backend=backend, seed=kind)
+        run_game(engine, policy=make_random_policy(kind, input_rate=0.3), dt=100, max_ticks=80)
+        engine.current_piece = engine._piece_from_state((kind, 0, engine.grid_width // 2 - 2, 0))
+        engines.append(engine)
+    return engines
+
+
+def bench(backend: str) -> Tuple[float, float]:
+    """素朴な探索と enumerate_placements の1回あたり時間（µs）"""
+    engines = prepared_engines(backend)
+    for engine in engines:
+        assert len(naive_placements(engine)) == len(engine.enumerate_placements())
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for engine in engines:
+            naive_placements(engine)
+    slow = (time.perf_counter() - start) / (ROUNDS * len(engines)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for engine in engines:
+            engine.enumerate_placements()
+    fast = (time.perf_counter() - start) / (ROUNDS * len(engines)) * 1e6
+    return slow, fast
+
+
+def main() -> None:
+    print(f"{'backend':>9} {'naive(µs/call)':>16} {'enumerate(µs/call)':>20} {'speedup':>8}")
+    for backend in ('list', 'bitboard'):
+        slow, fast = bench(backend)
+        print(f"{backend:>9} {slow:>16.1f} {fast:>20.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
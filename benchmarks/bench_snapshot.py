@@ -0,0 +1,66 @@
+"""スナップショット・リストアのベンチマーク
+
+探索ボットの「複製 → 1手試す → 巻き戻し」サイクルを、copy.deepcopy と
+GameEngine.snapshot() / restore() で比較する。
+
+    python benchmarks/bench_snapshot.py
+"""
+
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine  # noqa: E402
+from tetris_game.headless import make_random_policy, run_game  # noqa: E402
+
+CYCLES = 3000
+
+
+def prepared_engine(backend: str) -> GameEngine:
+    """盤面にある程度ブロックが積まれたエンジン"""
+    engine = GameEngine(10, 20, backend=backend, seed=1)
+    run_game(engine, policy=make_random_policy(1, input_rate=0.3), dt=100, max_ticks=150)
+    return engine
+
+
+def try_move(engine: GameEngine) -> None:
+    """1手試す: 右に寄せてハードドロップし、固定させる"""
+    engine.move_piece(1, 0)
+    engine.hard_drop()
+    engine.update(engine.fall_speed)
+
+
+def bench_deepcopy(backend: str) -> float:
+    """deepcopy で複製してから試す"""
+    engine = prepared_engine(backend)
+    start = time.perf_counter()
+    for _ in range(CYCLES):
+        clone = copy.deepcopy(engine)
+        try_move(clone)
+    return CYCLES / (time.perf_counter() - start)
+
+
+def bench_snapshot(backend: str) -> float:
+    """snapshot / restore で巻き戻す"""
+    engine = prepared_engine(backend)
+    start = time.perf_counter()
+    for _ in range(CYCLES):
+        snap = engine.snapshot()
+        try_move(engine)
+        engine.restore(snap)
+    return CYCLES / (time.perf_counter() - start)
+
+
+def main() -> None:
+    print(f"{'backend':>9} {'deepcopy(cycles/s)':>20} {'snapshot(cycles/s)':>20} {'speedup':>8}")
+    for backend in ('list', 'bitboard'):
+        slow = bench_deepcopy(backend)
+        fast = bench_snapshot(backend)
+        print(f"{backend:>9} {slow:>20.0f} {fast:>20.0f} {fast / slow:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
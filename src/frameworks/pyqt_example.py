@@ -8,11 +8,14 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont, QPalette, QColor
 
+from tetris_game.stats import StatsStore, format_play_time
+
 class PyQtTetrisLauncher(QMainWindow):
     """PyQt6を使用したテトリスランチャー"""
     
     def __init__(self):
         super().__init__()
+        self.stats_store = StatsStore()
         self.init_ui()
         self.setup_timer()
     
@@ -127,29 +130,46 @@ class PyQtTetrisLauncher(QMainWindow):
         stats_group = QGroupBox("ゲーム統計")
         stats_layout = QVBoxLayout(stats_group)
         
-        # 統計情報
-        stats_data = [
-            ("総プレイ回数:", "0 回"),
-            ("最高スコア:", "0 点"),
-            ("総プレイ時間:", "0 時間"),
-            ("ライン消去数:", "0 ライン")
-        ]
+        # 統計情報（値は update_stats で統計ストアから読む）
+        stats_labels = ["総プレイ回数:", "最高スコア:", "総プレイ時間:", "ライン消去数:"]
+        self.stats_values = []
         
-        for label, value in stats_data:
+        for label in stats_labels:
             row_layout = QHBoxLayout()
             row_layout.addWidget(QLabel(label))
-            row_layout.addWidget(QLabel(value))
+            value_label = QLabel()
+            row_layout.addWidget(value_label)
             row_layout.addStretch()
             stats_layout.addLayout(row_layout)
+            self.stats_values.append(value_label)
         
         layout.addWidget(stats_group)
         
         # リセットボタン
         reset_button = QPushButton("統計をリセット")
+        reset_button.clicked.connect(self.reset_stats)
         layout.addWidget(reset_button)
         
+        self.update_stats()
         return widget
     
+    def update_stats(self):
+        """統計ストアの累計を表示"""
+        summary = self.stats_store.summary()
+        values = [
+            f"{summary.plays} 回",
+            f"{summary.best_score} 点",
+            format_play_time(summary.play_ms),
+            f"{summary.lines} ライン"
+        ]
+        for value_label, value in zip(self.stats_values, values):
+            value_label.setText(value)
+    
+    def reset_stats(self):
+        """統計をリセット"""
+        self.stats_store.reset()
+        self.update_stats()
+    
     def set_dark_theme(self):
         """ダークテーマ設定"""
         palette = QPalette()
@@ -179,7 +199,13 @@ class PyQtTetrisLauncher(QMainWindow):
     
     def update_time(self):
         """時間更新（統計用）"""
-        pass
+        # ゲームは別プロセスなので、記録された結果を読み直す
+        self.update_stats()
+    
+    def closeEvent(self, event):
+        """終了時に統計ストアを閉じる"""
+        self.stats_store.close()
+        super().closeEvent(event)
     
     def start_game(self):
         """ゲーム開始"""
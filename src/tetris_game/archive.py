@@ -0,0 +1,591 @@
+"""リプレイアーカイブモジュール
+
+大量のリプレイを1つの追記専用データファイルに詰め、``mmap`` で引けるソート済み索引を
+別ファイルに持つ。ID での検索もスコア上位 N 件も、ファイル全体を読まずに済む。
+
+    <path>          データファイル
+        DATA_HEADER（マジック, バージョン）
+        レコードの並び: RECORD_HEADER（マジック, ゲームID, 長さ, CRC32）＋ リプレイのバイト列
+    <path>.idx      索引ファイル
+        INDEX_HEADER（マジック, バージョン, 件数, 索引済みのデータファイルの長さ, 最大のゲームID）
+        ID 順のエントリ（ENTRY: ゲームID, シード, スコア, オフセット, 長さ）
+        スコア順（降順、同点は ID 順）のエントリ番号（uint32）
+    <path>.lock     書き込みロック
+
+ゲームIDは追記順に増えるので、ID 順のエントリはそのまま二分探索できる。索引に入って
+いない末尾のレコード（テール）は読むときにデータファイルから走査する。CRC の合わない
+レコードは次の ``RECORD_MAGIC`` まで読み飛ばし、そのゲームIDも再利用しない。
+
+書き込みは ``.lock`` の排他ロックを取った1プロセスだけが行う。データを fsync してから、
+テールが ``index_every`` 件と索引の件数の ``1 / MERGE_RATIO`` の大きい方に達したら索引を
+一時ファイルに書き直して ``os.replace`` で置き換えるので、途中で落ちても索引は古いまま
+正しい。索引が大きいほど書き直しの間隔も延びるので、追記1件あたりの書き直しの量は
+件数によらず一定になる。ロックを取ったときにデータファイルの終わりで途切れた書きかけの
+レコードだけを切り詰める。索引が壊れたら ``rebuild_index()`` でデータファイルから作り直す。
+
+    python -m tetris_game.archive games.trpa --top 10
+    python -m tetris_game.archive games.trpa --add replays/
+"""
+
+import argparse
+import bisect
+import heapq
+import mmap
+import os
+import struct
+import sys
+import zlib
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from tetris_game.playback import find_replays
+from tetris_game.replay import (HEADER_SIZE, Replay, ReplayError, ReplayHeader, parse_replay,
+                                unpack_header)
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+DATA_MAGIC = b'TRPA'
+INDEX_MAGIC = b'TRPI'
+RECORD_MAGIC = b'RREC'
+ARCHIVE_VERSION = 1
+DATA_HEADER = struct.Struct('<4sHxx')
+# マジック, ゲームID, リプレイの長さ, リプレイの CRC32
+RECORD_HEADER = struct.Struct('<4sQII')
+# マジック, バージョン, 件数, 索引済みのデータファイルの長さ, 使用済みの最大のゲームID
+INDEX_HEADER = struct.Struct('<4sHxxQQq')
+# ゲームID, シード, スコア, リプレイのオフセット, 長さ
+ENTRY = struct.Struct('<QQQQI4x')
+POSITION = struct.Struct('<I')
+
+DEFAULT_INDEX_EVERY = 1024
+# テールが索引の件数のこの割合（1 / MERGE_RATIO）に達したら索引に取り込む
+MERGE_RATIO = 8
+
+
+class ArchiveEntry(NamedTuple):
+    """索引の1エントリ"""
+
+    game_id: int
+    seed: int
+    score: int
+    offset: int  # データファイル内のリプレイの先頭
+    length: int
+
+
+def _score_key(entry: ArchiveEntry) -> Tuple[int, int]:
+    """スコア順（降順、同点は ID 順）の並べ替えキー"""
+    return -entry.score, entry.game_id
+
+
+def check_replay(data: bytes) -> ReplayHeader:
+    """追記するリプレイのヘッダと本体の CRC を検証してヘッダを返す（イベント列はデコードしない）"""
+    header = unpack_header(data)
+    if not header.complete:
+        raise ReplayError("記録が完了していないリプレイです")
+    if zlib.crc32(data[HEADER_SIZE:]) != header.body_crc:
+        raise ReplayError("イベント列のチェックサムが一致しません")
+    return header
+
+
+class ScanResult(NamedTuple):
+    """scan_records の結果"""
+
+    entries: List[ArchiveEntry]
+    end: int  # 書きかけのレコードの先頭（なければデータの終わり）
+    last_id: int  # 見つかった最大のゲームID（壊れたレコードも含む、なければ -1）
+    corrupt: int  # 読み飛ばした壊れたレコードの数
+
+
+def _read_record(data: bytes, pos: int) -> Optional[ArchiveEntry]:
+    """pos のレコードのエントリ（書きかけ・壊れていれば None）"""
+    if pos + RECORD_HEADER.size > len(data):
+        return None
+    magic, game_id, length, crc = RECORD_HEADER.unpack_from(data, pos)
+    offset = pos + RECORD_HEADER.size
+    if magic != RECORD_MAGIC or offset + length > len(data):
+        return None
+    payload = data[offset:offset + length]
+    if zlib.crc32(payload) != crc:
+        return None
+    try:
+        header = unpack_header(payload[:HEADER_SIZE])
+    except ReplayError:
+        return None
+    return ArchiveEntry(game_id, header.seed, header.score, offset, length)
+
+
+def _is_torn(data: bytes, pos: int) -> bool:
+    """pos のレコードがデータの終わりで途切れているか（書きかけ）"""
+    if pos + RECORD_HEADER.size > len(data):
+        return RECORD_MAGIC.startswith(data[pos:pos + len(RECORD_MAGIC)])
+    magic, _, length, _ = RECORD_HEADER.unpack_from(data, pos)
+    return bool(magic == RECORD_MAGIC and pos + RECORD_HEADER.size + length > len(data))
+
+
+def scan_records(data: bytes, start: int) -> ScanResult:
+    """start からレコードを順に読む
+
+    壊れたレコードは次に正しく読めるレコードまで読み飛ばすので、後ろのレコードは失わない。
+    データの終わりで途切れた書きかけのレコードがあれば、その先頭を end として返す。
+    """
+    entries: List[ArchiveEntry] = []
+    pos = start
+    end = len(data)
+    last_id = -1
+    corrupt = 0
+    while pos < end:
+        entry = _read_record(data, pos)
+        if entry is not None:
+            entries.append(entry)
+            last_id = max(last_id, entry.game_id)
+            pos = entry.offset + entry.length
+            continue
+        # 次の正しいレコードを探す。なければ最初の書きかけのレコードからが末尾
+        torn = pos if _is_torn(data, pos) else None
+        resume = pos
+        while True:
+            resume = data.find(RECORD_MAGIC, resume + 1)
+            if resume < 0 or _read_record(data, resume) is not None:
+                break
+            if torn is None and _is_torn(data, resume):
+                torn = resume
+        if torn == pos and resume < 0:
+            break
+        corrupt += 1
+        if pos + RECORD_HEADER.size <= end:
+            # 壊れたレコードのゲームIDも使用済みとして扱う
+            magic, game_id = RECORD_HEADER.unpack_from(data, pos)[:2]
+            if magic == RECORD_MAGIC:
+                last_id = max(last_id, game_id)
+        if resume >= 0:
+            pos = resume
+        else:
+            pos = end if torn is None else torn
+            break
+    return ScanResult(entries, pos, last_id, corrupt)
+
+
+class _Index:
+    """mmap した索引ファイル（読み取り専用）"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if stat.st_size < INDEX_HEADER.size:
+                raise ValueError("索引ファイルが短すぎます")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, data_size, last_id = INDEX_HEADER.unpack_from(self.map)
+        if magic != INDEX_MAGIC or version != ARCHIVE_VERSION:
+            self.map.close()
+            raise ValueError("索引ファイルではありません")
+        if len(self.map) != INDEX_HEADER.size + count * (ENTRY.size + POSITION.size):
+            self.map.close()
+            raise ValueError("索引ファイルの長さが一致しません")
+        self.count = count
+        self.data_size = data_size
+        self.last_id = last_id
+        self.positions_at = INDEX_HEADER.size + count * ENTRY.size
+
+    def entry(self, i: int) -> ArchiveEntry:
+        """ID 順で i 番目のエントリ"""
+        return ArchiveEntry(*ENTRY.unpack_from(self.map, INDEX_HEADER.size + i * ENTRY.size))
+
+    def by_score(self, rank: int) -> ArchiveEntry:
+        """スコア順で rank 番目のエントリ"""
+        position, = POSITION.unpack_from(self.map, self.positions_at + rank * POSITION.size)
+        return self.entry(position)
+
+    def find(self, game_id: int) -> Optional[ArchiveEntry]:
+        """ID の二分探索"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            mid_id = ENTRY.unpack_from(self.map, INDEX_HEADER.size + mid * ENTRY.size)[0]
+            if mid_id < game_id:
+                low = mid + 1
+            elif mid_id > game_id:
+                high = mid
+            else:
+                return self.entry(mid)
+        return None
+
+    def close(self) -> None:
+        self.map.close()
+
+
+class ReplayArchive:
+    """リプレイアーカイブ（読み出しは mmap、書き込みはロックを取った1プロセスだけ）"""
+
+    def __init__(self, path: str, index_every: int = DEFAULT_INDEX_EVERY):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.lock_path = path + '.lock'
+        self.index_every = index_every
+        if not os.path.exists(path):
+            with _Lock(self.lock_path):
+                if not os.path.exists(path):
+                    _create_data_file(path)
+        self._data = open(path, 'rb')
+        try:
+            _check_data_header(self._data.read(DATA_HEADER.size))
+        except ValueError:
+            self._data.close()
+            raise
+        self._map: Optional[mmap.mmap] = None
+        self._index: Optional[_Index] = None
+        self._tail: List[ArchiveEntry] = []
+        self._tail_ids: List[int] = []
+        self._tail_by_score: List[ArchiveEntry] = []
+        self._tail_end = DATA_HEADER.size
+        self._last_id = -1
+        self.refresh()
+
+    # --- 読み出し ---
+
+    def refresh(self) -> None:
+        """他のプロセスの追記や索引の更新を取り込む"""
+        try:
+            stat = os.stat(self.index_path)
+            identity: Optional[Tuple[int, int, int]] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            identity = None
+        if identity != (self._index.identity if self._index else None):
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+            if identity is not None:
+                try:
+                    self._index = _Index(self.index_path)
+                except (OSError, ValueError):
+                    # 壊れた索引は使わずデータファイルを走査する（書き込み時に作り直される）
+                    self._index = None
+            self._reset_tail()
+
+        size = os.fstat(self._data.fileno()).st_size
+        if self._tail_end > size:
+            # データファイルより先まで索引済みの索引は使えない
+            self._close_index()
+            self._reset_tail()
+        if self._map is None or len(self._map) != size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._tail_end < size:
+            scan = scan_records(self._map, self._tail_end)  # type: ignore[arg-type]
+            self._tail.extend(scan.entries)
+            self._tail_ids.extend(entry.game_id for entry in scan.entries)
+            self._tail_end = scan.end
+            self._last_id = max(self._last_id, scan.last_id)
+
+    def _reset_tail(self) -> None:
+        """テールを捨てて索引の終わりから読み直す"""
+        self._tail = []
+        self._tail_ids = []
+        self._tail_by_score = []
+        self._tail_end = self._index.data_size if self._index else DATA_HEADER.size
+        self._last_id = self._index.last_id if self._index else -1
+
+    def __len__(self) -> int:
+        self.refresh()
+        return (self._index.count if self._index else 0) + len(self._tail)
+
+    def entry(self, game_id: int) -> Optional[ArchiveEntry]:
+        """ゲームIDのエントリ（O(log n)、なければ None）"""
+        self.refresh()
+        if self._index is not None:
+            found = self._index.find(game_id)
+            if found is not None:
+                return found
+        # 壊れたレコードを読み飛ばすとIDが飛ぶので、テールも二分探索する
+        i = bisect.bisect_left(self._tail_ids, game_id)
+        if i < len(self._tail_ids) and self._tail_ids[i] == game_id:
+            return self._tail[i]
+        return None
+
+    def read_bytes(self, entry: ArchiveEntry) -> bytes:
+        """エントリのリプレイのバイト列"""
+        assert self._map is not None
+        return self._map[entry.offset:entry.offset + entry.length]
+
+    def get(self, game_id: int) -> Replay:
+        """ゲームIDのリプレイ（なければ KeyError）"""
+        entry = self.entry(game_id)
+        if entry is None:
+            raise KeyError(game_id)
+        return parse_replay(self.read_bytes(entry))
+
+    def top(self, n: int) -> List[ArchiveEntry]:
+        """スコア上位 n 件（索引のスコア順の先頭 n 件とテールを合わせる）"""
+        self.refresh()
+        indexed: List[ArchiveEntry] = []
+        if self._index is not None:
+            indexed = [self._index.by_score(rank) for rank in range(min(n, self._index.count))]
+        if len(self._tail_by_score) != len(self._tail):
+            # テールは追記されるまで変わらないので、スコア順に並べたものを使い回す
+            self._tail_by_score = sorted(self._tail, key=_score_key)
+        return heapq.nsmallest(n, indexed + self._tail_by_score[:n], key=_score_key)
+
+    def entries(self) -> Iterator[ArchiveEntry]:
+        """全エントリを ID 順に返す"""
+        self.refresh()
+        index = self._index
+        if index is not None:
+            for i in range(index.count):
+                yield index.entry(i)
+        yield from self._tail
+
+    # --- 書き込み ---
+
+    def writer(self) -> 'ArchiveWriter':
+        """書き込みロックを取って追記する（with で使う）"""
+        return ArchiveWriter(self)
+
+    def append(self, data: bytes) -> int:
+        """リプレイ1つを追記してゲームIDを返す（1件ずつロックを取る）"""
+        with self.writer() as writer:
+            return writer.append(data)
+
+    def rebuild_index(self) -> int:
+        """データファイル全体を走査して索引を作り直し、件数を返す"""
+        with _Lock(self.lock_path):
+            self._recover()
+            self._close_index()
+            scan = scan_records(self._map, DATA_HEADER.size)  # type: ignore[arg-type]
+            entries = scan.entries
+            positions = sorted(range(len(entries)), key=lambda i: _score_key(entries[i]))
+            _write_index(self.index_path, b''.join(ENTRY.pack(*entry) for entry in entries),
+                         len(entries), positions, scan.end, scan.last_id)
+        self.refresh()
+        return len(entries)
+
+    def _recover(self) -> None:
+        """（ロック中）末尾の書きかけのレコードを切り詰める（途中の壊れたレコードは残す）"""
+        self.refresh()
+        size = os.fstat(self._data.fileno()).st_size
+        if self._tail_end < size:
+            self._close_map()
+            with open(self.path, 'r+b') as f:
+                f.truncate(self._tail_end)
+                f.flush()
+                os.fsync(f.fileno())
+            self.refresh()
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _close_index(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def _should_merge(self) -> bool:
+        """テールを索引に取り込む頃合いか（索引の件数に比例して間隔を延ばす）"""
+        indexed = self._index.count if self._index else 0
+        return len(self._tail) >= max(self.index_every, indexed // MERGE_RATIO)
+
+    def _merge_index(self) -> None:
+        """（ロック中）テールを索引に取り込んで書き直す"""
+        index = self._index
+        tail = self._tail
+        if not tail:
+            return
+        old_count = index.count if index else 0
+        if index is not None:
+            entry_bytes = index.map[INDEX_HEADER.size:index.positions_at]
+            keys = [(-score, game_id) for game_id, _, score, _, _ in ENTRY.iter_unpack(entry_bytes)]
+            old_order: Iterable[Tuple[Tuple[int, int], int]] = (
+                (keys[position], position)
+                for (position,) in POSITION.iter_unpack(index.map[index.positions_at:]))
+        else:
+            entry_bytes = b''
+            old_order = ()
+        new_order = sorted((_score_key(entry), old_count + i) for i, entry in enumerate(tail))
+        positions = [position for _, position in heapq.merge(old_order, new_order)]
+        entry_bytes += b''.join(ENTRY.pack(*entry) for entry in tail)
+        self._close_index()
+        _write_index(self.index_path, entry_bytes, old_count + len(tail), positions,
+                     self._tail_end, self._last_id)
+        self.refresh()
+
+    def close(self) -> None:
+        """mmap とファイルを閉じる"""
+        self._close_map()
+        self._close_index()
+        self._data.close()
+
+    def __enter__(self) -> 'ReplayArchive':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _write_index(path: str, entry_bytes: bytes, count: int, positions: Sequence[int],
+                 data_size: int, last_id: int) -> None:
+    """索引ファイルを一時ファイルに書いて fsync し、置き換える（途中で落ちても古い索引が残る）"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, ARCHIVE_VERSION, count, data_size, last_id))
+        f.write(entry_bytes)
+        f.write(b''.join(POSITION.pack(position) for position in positions))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _create_data_file(path: str) -> None:
+    """（ロック中）ヘッダだけのデータファイルを一時ファイルに書いて置く（ヘッダの途中は見せない）"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(DATA_HEADER.pack(DATA_MAGIC, ARCHIVE_VERSION))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _check_data_header(header: bytes) -> None:
+    """データファイルのヘッダを検証する（不正なら ValueError）"""
+    if len(header) < DATA_HEADER.size:
+        raise ValueError("データファイルのヘッダが短すぎます")
+    magic, version = DATA_HEADER.unpack(header)
+    if magic != DATA_MAGIC:
+        raise ValueError("リプレイアーカイブではありません")
+    if version != ARCHIVE_VERSION:
+        raise ValueError(f"未対応のアーカイブのバージョンです: {version}")
+
+
+class _Lock:
+    """ロックファイルの排他ロック（プロセス間）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> '_Lock':
+        self._file = open(self.path, 'a+b')
+        if sys.platform == 'win32':
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        assert self._file is not None
+        if sys.platform == 'win32':
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class ArchiveWriter:
+    """書き込みロックを持っている間の追記（with を抜けるとデータを fsync する）"""
+
+    def __init__(self, archive: ReplayArchive):
+        self.archive = archive
+        self._lock = _Lock(archive.lock_path)
+        self._stream: Optional[BinaryIO] = None
+        self._next_id = 0
+        self.appended: List[int] = []
+
+    def __enter__(self) -> 'ArchiveWriter':
+        self._lock.__enter__()
+        try:
+            archive = self.archive
+            archive._recover()
+            # 壊れて読めないレコードのIDも再利用しない
+            self._next_id = archive._last_id + 1
+            self._stream = open(archive.path, 'ab')
+        except BaseException:
+            self._lock.__exit__(None, None, None)
+            raise
+        return self
+
+    def append(self, data: bytes) -> int:
+        """リプレイのバイト列を追記してゲームIDを返す（壊れたリプレイは ReplayError）"""
+        assert self._stream is not None
+        check_replay(data)
+        game_id = self._next_id
+        header = RECORD_HEADER.pack(RECORD_MAGIC, game_id, len(data), zlib.crc32(data))
+        self._stream.write(header + data)
+        self._next_id += 1
+        self.appended.append(game_id)
+        return game_id
+
+    def __exit__(self, *exc_info: object) -> None:
+        archive = self.archive
+        try:
+            assert self._stream is not None
+            self._stream.flush()
+            os.fsync(self._stream.fileno())
+            self._stream.close()
+            archive.refresh()
+            if archive._should_merge():
+                archive._merge_index()
+        finally:
+            self._lock.__exit__(None, None, None)
+
+    def flush_index(self) -> None:
+        """テールの件数に関係なく索引を書き直す"""
+        assert self._stream is not None
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+        self.archive.refresh()
+        self.archive._merge_index()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='python -m tetris_game.archive',
+                                     description="リプレイアーカイブの操作")
+    parser.add_argument('path', help="アーカイブのデータファイル")
+    parser.add_argument('--add', nargs='+', metavar='PATH', help="リプレイファイルまたはディレクトリを追記")
+    parser.add_argument('--top', type=int, metavar='N', help="スコア上位 N 件を表示")
+    parser.add_argument('--get', type=int, metavar='ID', help="ゲームIDのリプレイを取り出す")
+    parser.add_argument('--out', help="--get で取り出したリプレイの保存先")
+    parser.add_argument('--rebuild', action='store_true', help="索引を作り直す")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """python -m tetris_game.archive のエントリーポイント"""
+    args = parse_args(argv)
+    with ReplayArchive(args.path) as archive:
+        if args.rebuild:
+            print(f"indexed {archive.rebuild_index()} replays", file=sys.stderr)
+        if args.add:
+            with archive.writer() as writer:
+                for path in find_replays(args.add):
+                    with open(path, 'rb') as f:
+                        writer.append(f.read())
+                writer.flush_index()
+            print(f"added {len(writer.appended)} replays", file=sys.stderr)
+        if args.top:
+            for ranked in archive.top(args.top):
+                print(f"id={ranked.game_id} seed={ranked.seed} score={ranked.score}")
+        if args.get is not None:
+            entry = archive.entry(args.get)
+            if entry is None:
+                print(f"id={args.get} は見つかりません", file=sys.stderr)
+                return 1
+            data = archive.read_bytes(entry)
+            if args.out:
+                with open(args.out, 'wb') as f:
+                    f.write(data)
+            else:
+                header = parse_replay(data).header
+                print(f"id={entry.game_id} seed={header.seed} score={header.score} "
+                      f"lines={header.lines} ticks={header.ticks}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""NumPyで N 個のゲームを同時に進めるバッチエンジンモジュール
+
+盤面を ``(N, H, W)`` の uint8 配列にまとめ、移動・回転・落下・重力を全ゲームへ
+ベクトル演算で適用する。ルールは ``GameEngine`` と同一で、同じシードとランダマイザを
+与えれば同じ結果になる。numpy は ``data`` エクストラで導入する。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.randomizer import create_randomizer
+
+# アクション番号
+ACTION_NONE = 0
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_DOWN = 3
+ACTION_ROTATE = 4
+ACTION_HARD_DROP = 5
+
+NUM_KINDS = len(GameEngine.SHAPES)
+MAX_ROTATIONS = max(len(shape) for shape in GameEngine.SHAPES)
+
+# (形状, 回転, セル, dx/dy) のセル表。回転数が4未満の形状は回転番号を剰余で埋める
+CELL_TABLE = np.array(
+    [[shape[r % len(shape)].cells for r in range(MAX_ROTATIONS)] for shape in GameEngine.SHAPES],
+    dtype=np.int64,
+)
+ROTATION_COUNTS = np.array([len(shape) for shape in GameEngine.SHAPES], dtype=np.int64)
+
+
+class BatchGameEngine:
+    """N 個のテトリスを1つの配列で同時に管理するクラス"""
+
+    def __init__(self, seeds: Sequence[int], grid_width: int = 10, grid_height: int = 20,
+                 randomizer: str = 'uniform', max_catch_up: int = GameEngine.MAX_CATCH_UP):
+        if max_catch_up < 1:
+            raise ValueError("max_catch_up は1以上を指定してください")
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.num_games = n = len(seeds)
+        self.seeds = list(seeds)
+        self.max_catch_up = max_catch_up
+        self._randomizers = [create_randomizer(randomizer, NUM_KINDS, seed) for seed in seeds]
+
+        self.boards = np.zeros((n, grid_height, grid_width), dtype=np.uint8)
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.next_kind = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.fall_time = np.zeros(n, dtype=np.int64)
+        self.fall_speed = np.full(n, 500, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+
+        # GameEngine と同じく current → next の順に引く
+        self.kind[:] = [self._draw(i) for i in range(n)]
+        self.next_kind[:] = [self._draw(i) for i in range(n)]
+        self.x[:] = grid_width // 2 - 2
+
+    def _draw(self, game: int) -> int:
+        """ゲーム game の次の形状番号を引く"""
+        return self._randomizers[game].next()
+
+    def _cells(self, idx: np.ndarray, rotation: np.ndarray, x: np.ndarray,
+               y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """対象ゲームのピースの絶対セル座標 (M, 4) を返す"""
+        cells = CELL_TABLE[self.kind[idx], rotation]
+        return x[:, None] + cells[:, :, 0], y[:, None] + cells[:, :, 1]
+
+    def _fits(self, idx: np.ndarray, rotation: np.ndarray, x: np.ndarray,
+              y: np.ndarray) -> np.ndarray:
+        """対象ゲームのピースを指定位置に置けるか（GameEngine.is_valid_position と同じ判定）"""
+        xs, ys = self._cells(idx, rotation, x, y)
+        inside = (xs >= 0) & (xs < self.grid_width) & (ys < self.grid_height)
+        visible = inside & (ys >= 0)
+        values = self.boards[
+            idx[:, None],
+            np.clip(ys, 0, self.grid_height - 1),
+            np.clip(xs, 0, self.grid_width - 1),
+        ]
+        fits: np.ndarray = inside.all(axis=1) & ~(visible & (values != 0)).any(axis=1)
+        return fits
+
+    def _try_move(self, idx: np.ndarray, dx: int, dy: int) -> np.ndarray:
+        """対象ゲームのピースを移動し、成功したかを返す"""
+        ok = self._fits(idx, self.rotation[idx], self.x[idx] + dx, self.y[idx] + dy)
+        moved = idx[ok]
+        self.x[moved] += dx
+        self.y[moved] += dy
+        return ok
+
+    def drop_distances(self, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """対象ゲームのピースがあと何段落下できるか
+
+        各セルについて同じ列の真下にある最初のブロックまでの距離を求め、その最小値を取る。
+        """
+        if idx is None:
+            idx = np.arange(self.num_games)
+        height = self.grid_height
+        xs, ys = self._cells(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        columns = self.boards[idx[:, None], :, np.clip(xs, 0, self.grid_width - 1)] != 0
+        rows = np.arange(height)
+        blocked = columns & (rows[None, None, :] > ys[:, :, None])
+        first = np.where(blocked.any(axis=2), blocked.argmax(axis=2), height)
+        distances: np.ndarray = (first - 1 - ys).min(axis=1)
+        return distances
+
+    def apply(self, actions: Sequence[int]) -> None:
+        """各ゲームにアクションを1つずつ適用（ゲームオーバーのゲームは無視）"""
+        codes = np.asarray(actions, dtype=np.int64)
+        alive = ~self.game_over
+
+        for action, dx, dy in ((ACTION_LEFT, -1, 0), (ACTION_RIGHT, 1, 0), (ACTION_DOWN, 0, 1)):
+            idx = np.flatnonzero(alive & (codes == action))
+            if idx.size:
+                self._try_move(idx, dx, dy)
+
+        idx = np.flatnonzero(alive & (codes == ACTION_ROTATE))
+        if idx.size:
+            new_rotation = (self.rotation[idx] + 1) % ROTATION_COUNTS[self.kind[idx]]
+            ok = self._fits(idx, new_rotation, self.x[idx], self.y[idx])
+            self.rotation[idx[ok]] = new_rotation[ok]
+
+        idx = np.flatnonzero(alive & (codes == ACTION_HARD_DROP))
+        if idx.size:
+            self.y[idx] += self.drop_distances(idx)
+
+    def update(self, dt: int) -> None:
+        """全ゲームの時間を dt ミリ秒進める（GameEngine.update と同じ固定タイムステップ）
+
+        落下時刻に達したゲームに重力ステップを適用し、端数は fall_time に残す。
+        max_catch_up 回を超えて溜まった時間は捨てる。
+        """
+        self.fall_time[~self.game_over] += dt
+        for _ in range(self.max_catch_up):
+            due = np.flatnonzero(~self.game_over & (self.fall_time >= self.fall_speed))
+            if not due.size:
+                return
+            self.fall_time[due] -= self.fall_speed[due]
+            self.gravity(due)
+        over = np.flatnonzero(~self.game_over & (self.fall_time >= self.fall_speed))
+        self.fall_time[over] %= self.fall_speed[over]
+
+    def advance(self, ticks: int) -> None:
+        """全ゲームの重力ステップを ticks 回まとめて進める（早送り用）"""
+        for _ in range(ticks):
+            alive = np.flatnonzero(~self.game_over)
+            if not alive.size:
+                return
+            self.gravity(alive)
+
+    def step(self, actions: Sequence[int], dt: int) -> None:
+        """アクション適用と時間経過をまとめて行う"""
+        self.apply(actions)
+        self.update(dt)
+
+    def gravity(self, idx: np.ndarray) -> None:
+        """対象ゲームのピースを1段落とし、落ちられなければ固定・ライン消去・次ピース出現"""
+        moved = self._try_move(idx, 0, 1)
+        locked = idx[~moved]
+        if locked.size:
+            self._lock(locked)
+
+    def _lock(self, idx: np.ndarray) -> None:
+        """ピースを盤面に固定して後続処理を行う"""
+        xs, ys = self._cells(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        visible = ys >= 0
+        games = np.broadcast_to(idx[:, None], xs.shape)
+        colors = np.broadcast_to((self.kind[idx] + 1)[:, None], xs.shape)
+        self.boards[games[visible], ys[visible], xs[visible]] = colors[visible]
+
+        self._clear_lines(idx)
+
+        self.kind[idx] = self.next_kind[idx]
+        self.next_kind[idx] = [self._draw(i) for i in idx]
+        self.rotation[idx] = 0
+        self.x[idx] = self.grid_width // 2 - 2
+        self.y[idx] = 0
+        spawned = self._fits(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        self.game_over[idx[~spawned]] = True
+
+    def _clear_lines(self, idx: np.ndarray) -> None:
+        """対象ゲームの満杯行を消去してスコア・レベルを更新"""
+        boards = self.boards[idx]
+        full = (boards != 0).all(axis=2)
+        counts = full.sum(axis=1)
+
+        cleared = counts > 0
+        if cleared.any():
+            # 満杯行を安定ソートで上に集め、その行をゼロにする
+            order = np.argsort(~full[cleared], axis=1, kind='stable')
+            compacted = np.take_along_axis(boards[cleared], order[:, :, None], axis=1)
+            compacted[np.arange(self.grid_height)[None, :] < counts[cleared][:, None]] = 0
+            self.boards[idx[cleared]] = compacted
+
+        self.lines_cleared[idx] += counts
+        self.score[idx] += counts * 100 * self.level[idx]
+        self.level[idx] = self.lines_cleared[idx] // 10 + 1
+        self.fall_speed[idx] = np.maximum(50, 500 - (self.level[idx] - 1) * 50)
+
+    def get_grid(self, game: int) -> List[List[int]]:
+        """ゲーム game のグリッドを2次元リストで取得"""
+        grid: List[List[int]] = self.boards[game].tolist()
+        return grid
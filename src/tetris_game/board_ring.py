@@ -0,0 +1,257 @@
+"""共有メモリの盤面リングモジュール
+
+シミュレーションプロセスが盤面を ``multiprocessing.shared_memory`` 上のスロットに書き、
+描画・ダッシュボード・記録用の別プロセスが pickle なしで読む。
+
+    セグメント先頭（RING_HEADER）
+        マジック, バージョン, スロット数, 幅, 高さ, スロットの大きさ, 書き込み回数
+    スロット（SLOT_HEADER ＋ 行優先・1セル1バイトの色）
+        シーケンス番号, スコア, ライン数, レベル, ピース数, 操作中ピース, 次ピース, ゲームオーバー
+
+各スロットは書き手が1つだけのシークロックで守る。書き手はシーケンス番号を奇数にしてから
+中身を書き、書き終えたら偶数に戻す。読み手は読む前後でシーケンス番号が同じ偶数なら
+一貫した内容を読めたとみなし、違えば読み直す。書き手は読み手を待たない。
+
+``publish(engine)`` は書き込み回数でスロットを順に回すリングとして使い、
+``publish(engine, slot)`` はワーカーごとに決まったスロットへ書くのに使う。
+
+    python -m tetris_game.board_ring <name> --slot 0
+"""
+
+import argparse
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Sequence, Tuple
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.snapshot import GameStateSnapshot
+
+RING_MAGIC = b'TBRG'
+RING_VERSION = 1
+# マジック, バージョン, スロット数, 幅, 高さ, スロットの大きさ, 書き込み回数
+RING_HEADER = struct.Struct('<4sHHBBxxIQ')
+HEAD_OFFSET = RING_HEADER.size - 8
+# シーケンス番号, スコア, ライン数, レベル, ピース数,
+# 操作中ピース(形状, 回転, x, y), 次ピース(同), ゲームオーバー
+SLOT_HEADER = struct.Struct('<QQIIIBBhhBBhhBxxx')
+SEQ = struct.Struct('<Q')
+
+# 読み直しの上限（書き手が止まっていれば1回で読める）
+MAX_READ_RETRIES = 10_000
+
+
+def _slot_size(width: int, height: int) -> int:
+    """1スロットの大きさ（8バイト境界に揃える）"""
+    return (SLOT_HEADER.size + width * height + 7) // 8 * 8
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    """既存のセグメントを開く（閉じても消えないよう、リソーストラッカーに登録しない）"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        pass
+    # Python 3.12 以前は開いただけでも登録され、終了時に unlink されてしまう。後から登録を
+    # 外すと fork したプロセスでは作成側の登録まで消えるので、開く間だけ登録を止める
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    setattr(resource_tracker, 'register', lambda name, rtype: None)
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        setattr(resource_tracker, 'register', register)
+
+
+class BoardRing:
+    """共有メモリ上の盤面スロットの並び（作成側が unlink する）"""
+
+    def __init__(self, segment: shared_memory.SharedMemory, owner: bool):
+        self.segment = segment
+        self.owner = owner
+        buf = segment.buf
+        if buf is None:
+            raise ValueError("共有メモリが閉じられています")
+        self.buf: memoryview = buf
+        magic, version, slots, width, height, slot_size, _ = RING_HEADER.unpack_from(self.buf)
+        if magic != RING_MAGIC:
+            raise ValueError("盤面リングの共有メモリではありません")
+        if version != RING_VERSION:
+            raise ValueError(f"未対応の盤面リングのバージョンです: {version}")
+        self.slots: int = slots
+        self.width: int = width
+        self.height: int = height
+        self.slot_size: int = slot_size
+
+    @classmethod
+    def create(cls, slots: int, width: int = 10, height: int = 20,
+               name: Optional[str] = None) -> 'BoardRing':
+        """新しいセグメントを作る（全スロットはシーケンス番号0の未書き込み状態）"""
+        if slots < 1:
+            raise ValueError("slots は1以上を指定してください")
+        slot_size = _slot_size(width, height)
+        segment = shared_memory.SharedMemory(name=name, create=True,
+                                             size=RING_HEADER.size + slots * slot_size)
+        buf = segment.buf
+        assert buf is not None
+        buf[:RING_HEADER.size + slots * slot_size] = bytes(RING_HEADER.size + slots * slot_size)
+        RING_HEADER.pack_into(buf, 0, RING_MAGIC, RING_VERSION, slots, width, height, slot_size, 0)
+        return cls(segment, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'BoardRing':
+        """別プロセスが作ったセグメントに接続"""
+        return cls(_open_segment(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        """attach に渡す名前"""
+        return self.segment.name
+
+    @property
+    def head(self) -> int:
+        """publish でリングに書いた回数"""
+        head: int = SEQ.unpack_from(self.buf, HEAD_OFFSET)[0]
+        return head
+
+    def _offset(self, slot: int) -> int:
+        """スロットの先頭位置"""
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"スロット番号が範囲外です: {slot}")
+        return RING_HEADER.size + slot * self.slot_size
+
+    def publish(self, engine: GameEngine, slot: Optional[int] = None) -> int:
+        """エンジンの盤面をスロットに書き、書いたスロット番号を返す
+
+        slot を省略するとリングの次のスロットに書いて書き込み回数を進める。
+        1つのスロットに同時に書くのは1プロセスだけにすること。
+        """
+        head = None
+        if slot is None:
+            head = self.head
+            slot = head % self.slots
+        offset = self._offset(slot)
+        buf = self.buf
+        sequence = SEQ.unpack_from(buf, offset)[0] + 1
+        SEQ.pack_into(buf, offset, sequence)  # 奇数: 書き込み中
+        current = engine.current_piece
+        upcoming = engine.next_piece
+        assert current is not None and upcoming is not None
+        SLOT_HEADER.pack_into(
+            buf, offset, sequence, engine.score, engine.lines_cleared, engine.level,
+            engine.pieces_placed, current.kind, current.rotation, current.x, current.y,
+            upcoming.kind, upcoming.rotation, upcoming.x, upcoming.y, engine.game_over)
+        start = offset + SLOT_HEADER.size
+        buf[start:start + self.width * self.height] = engine.board.cell_bytes()
+        SEQ.pack_into(buf, offset, sequence + 1)  # 偶数: 書き込み完了
+        if head is not None:
+            SEQ.pack_into(buf, HEAD_OFFSET, head + 1)
+        return slot
+
+    def read_begin(self, slot: int) -> int:
+        """読み始めのシーケンス番号（書き込み中なら終わるまで待つ）"""
+        offset = self._offset(slot)
+        buf = self.buf
+        for _ in range(MAX_READ_RETRIES):
+            sequence: int = SEQ.unpack_from(buf, offset)[0]
+            if not sequence & 1:
+                return sequence
+            time.sleep(0)
+        raise TimeoutError(f"スロット {slot} の書き込みが終わりません")
+
+    def read_retry(self, slot: int, sequence: int) -> bool:
+        """read_begin の後に書き込みがあったか（True なら読んだ内容を捨てて読み直す）"""
+        current: int = SEQ.unpack_from(self.buf, self._offset(slot))[0]
+        return current != sequence
+
+    def cells_view(self, slot: int) -> memoryview:
+        """スロットの盤面の (高さ, 幅) の memoryview（コピーなし）
+
+        共有メモリを直接指すので、read_begin / read_retry で挟んで使う。
+        """
+        start = self._offset(slot) + SLOT_HEADER.size
+        return self.buf[start:start + self.width * self.height].cast('B', (self.height, self.width))
+
+    def read(self, slot: int) -> Optional[Tuple[int, GameStateSnapshot]]:
+        """スロットの一貫した内容を (シーケンス番号, 状態) で返す（未書き込みなら None）"""
+        offset = self._offset(slot)
+        buf = self.buf
+        count = self.width * self.height
+        for _ in range(MAX_READ_RETRIES):
+            sequence = self.read_begin(slot)
+            if sequence == 0:
+                return None
+            fields = SLOT_HEADER.unpack_from(buf, offset)
+            cells = bytes(buf[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + count])
+            if not self.read_retry(slot, sequence):
+                state = GameStateSnapshot(self.width, self.height, cells,
+                                          fields[5:9], fields[9:13], fields[1], fields[2],
+                                          fields[3], fields[4], bool(fields[13]))
+                return sequence, state
+        raise TimeoutError(f"スロット {slot} を一貫した状態で読めません")
+
+    def latest(self) -> Optional[Tuple[int, GameStateSnapshot]]:
+        """publish でリングに最後に書かれた盤面（まだなければ None）"""
+        head = self.head
+        if head == 0:
+            return None
+        return self.read((head - 1) % self.slots)
+
+    def close(self) -> None:
+        """このプロセスの対応付けを外す（作成側はセグメントも削除する）"""
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+    def __enter__(self) -> 'BoardRing':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def render(state: GameStateSnapshot) -> str:
+    """状態をテキストの盤面にする（操作中ピースは @、固定ブロックは #）"""
+    rows = [['#' if cell else '.' for cell in state.cells[y * state.width:(y + 1) * state.width]]
+            for y in range(state.height)]
+    kind, rotation, x, y = state.current_piece
+    for dx, dy in GameEngine.SHAPES[kind][rotation].cells:
+        if 0 <= y + dy < state.height and 0 <= x + dx < state.width:
+            rows[y + dy][x + dx] = '@'
+    return '\n'.join(''.join(row) for row in rows)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='python -m tetris_game.board_ring',
+                                     description="共有メモリの盤面リングを覗く")
+    parser.add_argument('name', help="共有メモリの名前")
+    parser.add_argument('--slot', type=int, default=None, help="表示するスロット（省略時は最新）")
+    parser.add_argument('--watch', type=float, default=0.0, help="この秒数ごとに表示し直す（0で1回だけ）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """python -m tetris_game.board_ring のエントリーポイント"""
+    args = parse_args(argv)
+    with BoardRing.attach(args.name) as ring:
+        try:
+            while True:
+                result = ring.latest() if args.slot is None else ring.read(args.slot)
+                if result is None:
+                    print("(まだ書き込まれていません)")
+                else:
+                    sequence, state = result
+                    print(f"seq={sequence} score={state.score} lines={state.lines_cleared} "
+                          f"level={state.level} pieces={state.pieces_placed}")
+                    print(render(state))
+                if not args.watch:
+                    return 0
+                time.sleep(args.watch)
+        except KeyboardInterrupt:
+            return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
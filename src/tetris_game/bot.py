@@ -0,0 +1,274 @@
+"""ビームサーチによる自動プレイモジュール
+
+現在のピースと次のピース（プレビュー）について ``enumerate_placements`` で
+固定位置を列挙し、重み付きヒューリスティック（穴・高さの合計・凸凹・消去ライン数）で
+評価して上位 ``beam_width`` 個の盤面だけを次の深さへ展開する。
+
+先読み中の盤面は行ビットマスクのリストで持つ。葉の評価は盤面のバッチ単位で行い、
+``workers`` を指定すると、プロセス間通信の元が取れる大きさのバッチだけプロセスプールに
+分割して並列に評価する（``parallel_threshold``）。既定のビーム幅ではバッチが小さく、
+2ワーカーではプールを使わない。
+
+    tetris-bot --games 10 --beam-width 8 --workers 4
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from tetris_game.features import heuristic_features
+from tetris_game.game_engine import GameEngine
+from tetris_game.grid import GRID_BACKENDS
+from tetris_game.placements import Placement, placements_from_masks
+from tetris_game.randomizer import RANDOMIZERS
+from tetris_game.shapes import Rotation
+
+DEFAULT_BEAM_WIDTH = 8
+DEFAULT_DEPTH = 2
+DEFAULT_MAX_PIECES = 1000
+
+# 並列評価の損益分岐の見積もりに使う計測値（秒）: 葉1つの評価、プールへの1バッチの往復、
+# 葉1つの受け渡し
+LEAF_SECONDS = 9e-6
+BATCH_OVERHEAD_SECONDS = 1.2e-3
+TRANSFER_SECONDS = 1.1e-6
+
+Board = Tuple[int, ...]  # 行ごとの占有ビットマスク（ビット x が列 x）
+
+
+class Weights(NamedTuple):
+    """評価関数の重み（値が大きい盤面ほど良い）"""
+
+    holes: float = -0.35663
+    aggregate_height: float = -0.510066
+    bumpiness: float = -0.184483
+    lines: float = 0.760666
+
+
+class Leaf(NamedTuple):
+    """評価対象の盤面"""
+
+    board: Board
+    lines: int  # 根からここまでに消したライン数
+
+
+class _Node(NamedTuple):
+    """ビーム内の探索ノード"""
+
+    board: Board
+    lines: int
+    first: Placement  # 根で選んだ固定位置
+
+
+def lock_board(board: Sequence[int], rotation: Rotation, x: int, y: int,
+               full_mask: int) -> Tuple[Board, int]:
+    """固定位置にピースを書き込み、満杯行を消した盤面と消去ライン数を返す"""
+    rows = list(board)
+    for dy, mask in rotation.row_masks:
+        row = y + dy
+        if row >= 0:
+            rows[row] |= mask << x if x >= 0 else mask >> -x
+    kept = [mask for mask in rows if mask != full_mask]
+    cleared = len(rows) - len(kept)
+    if cleared:
+        kept[:0] = [0] * cleared
+    return tuple(kept), cleared
+
+
+def evaluate_leaves(leaves: Sequence[Leaf], width: int, weights: Weights) -> List[float]:
+    """葉の盤面をまとめて評価（プロセスプールのワーカーからも呼ばれる）"""
+    scores = []
+    for board, lines in leaves:
+        holes, aggregate_height, bumpiness = heuristic_features(board, width)
+        scores.append(weights.holes * holes
+                      + weights.aggregate_height * aggregate_height
+                      + weights.bumpiness * bumpiness
+                      + weights.lines * lines)
+    return scores
+
+
+def parallel_threshold(workers: int) -> Optional[int]:
+    """workers 個のプロセスに分けた方が速くなる葉の数（元が取れなければ None）"""
+    if workers < 2:
+        return None
+    saved = LEAF_SECONDS * (1 - 1 / workers) - TRANSFER_SECONDS
+    if saved <= 0:
+        return None
+    return math.ceil(BATCH_OVERHEAD_SECONDS / saved)
+
+
+class BeamSearchBot:
+    """ビームサーチで次の固定位置を選ぶボット"""
+
+    def __init__(self, weights: Optional[Weights] = None, beam_width: int = DEFAULT_BEAM_WIDTH,
+                 depth: int = DEFAULT_DEPTH, workers: int = 0,
+                 min_parallel_leaves: Optional[int] = None):
+        if beam_width < 1 or depth < 1:
+            raise ValueError("beam_width と depth は1以上を指定してください")
+        self.weights = weights or Weights()
+        self.beam_width = beam_width
+        # 先読みできるのは現在と次のピースまで
+        self.depth = min(depth, 2)
+        self.workers = workers
+        # これより少ない葉はその場で評価する（省略時はワーカー数から見積もる、None は使わない）
+        if min_parallel_leaves is None and workers > 0:
+            min_parallel_leaves = parallel_threshold(workers)
+        self.min_parallel_leaves = min_parallel_leaves
+        self.parallel_batches = 0
+        self._executor: Optional[Executor] = None
+
+    def close(self) -> None:
+        """プロセスプールを終了"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'BeamSearchBot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def evaluate(self, leaves: Sequence[Leaf], width: int) -> List[float]:
+        """葉のバッチを評価（十分に大きければワーカーへ分割）"""
+        threshold = self.min_parallel_leaves
+        if self.workers < 1 or threshold is None or len(leaves) < threshold:
+            return evaluate_leaves(leaves, width, self.weights)
+        self.parallel_batches += 1
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        size = -(-len(leaves) // self.workers)
+        chunks = [leaves[i:i + size] for i in range(0, len(leaves), size)]
+        futures = [self._executor.submit(evaluate_leaves, chunk, width, self.weights)
+                   for chunk in chunks]
+        scores: List[float] = []
+        for future in futures:
+            scores.extend(future.result())
+        return scores
+
+    def choose(self, engine: GameEngine) -> Optional[Placement]:
+        """engine の操作中ピースをどこに固定するかを選ぶ（置き場所がなければ None）"""
+        piece = engine.current_piece
+        upcoming = engine.next_piece
+        if piece is None or upcoming is None or engine.game_over:
+            return None
+        width = engine.grid_width
+        height = engine.grid_height
+        full_mask = (1 << width) - 1
+        shapes = engine.SHAPES
+        spawn_x = width // 2 - 2
+
+        kinds = [piece.kind, upcoming.kind][:self.depth]
+        root = tuple(engine.board.row_masks())
+        beam: List[Optional[_Node]] = [None]
+        for depth, kind in enumerate(kinds):
+            shape = shapes[kind]
+            children: List[_Node] = []
+            for node in beam:
+                if node is None:
+                    board, lines = root, 0
+                    start = (piece.rotation, piece.x, piece.y)
+                else:
+                    board, lines = node.board, node.lines
+                    start = (0, spawn_x, 0)
+                for placement in placements_from_masks(board, width, height, shape, *start):
+                    child, cleared = lock_board(
+                        board, shape[placement.rotation], placement.x, placement.y, full_mask)
+                    children.append(_Node(child, lines + cleared,
+                                          placement if node is None else node.first))
+            if not children:
+                break
+            scores = self.evaluate([Leaf(node.board, node.lines) for node in children], width)
+            ranked = sorted(range(len(children)), key=scores.__getitem__, reverse=True)
+            beam = [children[i] for i in ranked[:self.beam_width]]
+
+        best = beam[0]
+        return best.first if best is not None else None
+
+
+def play_game(engine: GameEngine, bot: BeamSearchBot,
+              max_pieces: int = DEFAULT_MAX_PIECES) -> Dict[str, float]:
+    """ゲームオーバーか max_pieces 個固定するまでボットに操作させて結果を返す"""
+    start = time.perf_counter()
+    while not engine.game_over and engine.pieces_placed < max_pieces:
+        placement = bot.choose(engine)
+        if placement is None:
+            break
+        for action in placement.path:
+            engine.apply_action(action)
+        # 落下待ちの時間を一度に進めて固定させる
+        engine.update(engine.fall_speed)
+    return {
+        'score': engine.score,
+        'lines': engine.lines_cleared,
+        'level': engine.level,
+        'pieces': engine.pieces_placed,
+        'game_over': engine.game_over,
+        'duration': time.perf_counter() - start,
+    }
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='tetris-bot', description="ビームサーチボットで自動プレイ")
+    parser.add_argument('--games', type=int, default=1, help="連続して実行するゲーム数")
+    parser.add_argument('--seed', type=int, default=0, help="最初のゲームのシード（以降+1ずつ）")
+    parser.add_argument('--max-pieces', type=int, default=DEFAULT_MAX_PIECES, help="1ゲームの最大ピース数")
+    parser.add_argument('--beam-width', type=int, default=DEFAULT_BEAM_WIDTH, help="ビーム幅")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, choices=(1, 2),
+                        help="先読みするピース数（現在のピース＋次のピース）")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="葉の評価に使うプロセス数（0で使わない）")
+    parser.add_argument('--min-parallel-leaves', type=int, default=None,
+                        help="これ以上の葉をまとめて評価するときだけワーカーを使う"
+                             "（省略時はワーカー数から見積もる）")
+    parser.add_argument('--width', type=int, default=10)
+    parser.add_argument('--height', type=int, default=20)
+    parser.add_argument('--backend', default='list', choices=tuple(GRID_BACKENDS),
+                        help="グリッドバックエンド")
+    parser.add_argument('--randomizer', default='uniform', choices=tuple(RANDOMIZERS),
+                        help="ピース生成方式")
+    parser.add_argument('--json', action='store_true', help="結果をJSON Linesで出力")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """tetris-bot のエントリーポイント"""
+    args = parse_args(argv)
+
+    total_pieces = 0
+    total_lines = 0
+    started = time.perf_counter()
+    with BeamSearchBot(beam_width=args.beam_width, depth=args.depth, workers=args.workers,
+                       min_parallel_leaves=args.min_parallel_leaves) as bot:
+        for game in range(args.games):
+            seed = args.seed + game
+            engine = GameEngine(args.width, args.height, backend=args.backend,
+                                seed=seed, randomizer=args.randomizer)
+            result = play_game(engine, bot, max_pieces=args.max_pieces)
+            total_pieces += int(result['pieces'])
+            total_lines += int(result['lines'])
+            if args.json:
+                print(json.dumps(dict(result, seed=seed)))
+            else:
+                print(f"seed={seed} score={result['score']} lines={result['lines']} "
+                      f"level={result['level']} pieces={result['pieces']}")
+        if args.workers and not bot.parallel_batches:
+            print(f"warning: 葉のバッチが --min-parallel-leaves "
+                  f"({bot.min_parallel_leaves or 'なし'}) に届かず、--workers は使われませんでした"
+                  f"（--beam-width を広げるか --min-parallel-leaves を下げてください）",
+                  file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"{args.games} games, {total_pieces} pieces in {elapsed:.2f}s "
+          f"({total_pieces / elapsed if elapsed else 0:.0f} pieces/s, "
+          f"average {total_lines / args.games if args.games else 0:.1f} lines)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""観戦配信用の差分ストリームモジュール
+
+連続する ``GameStateSnapshot`` を比べ、変わった行・ピースの位置・変わったカウンタだけを
+小さなバイナリフレームにする。途中から接続した観戦者が同期できるよう、一定フレームごとに
+全体を含むキーフレームを送る。
+
+フレーム形式::
+
+    1バイト     フレーム種別（FRAME_KEY / FRAME_DELTA）
+    varint      通し番号
+    キーフレーム  GameStateSnapshot.to_bytes()
+    差分フレーム  1バイトの変更フラグ（FIELD_*）と、立っているフラグの順に:
+        FIELD_ROWS      varint(行数), 各行 varint(y) と4bitに詰めた行の色
+        FIELD_CURRENT   1バイト(形状 << 2 | 回転), zigzag varint(x), zigzag varint(y)
+        FIELD_NEXT      同上
+        FIELD_SCORE / FIELD_LINES / FIELD_LEVEL / FIELD_PIECES   varint(新しい値)
+        FIELD_GAME_OVER 値なし（game_over が反転した）
+
+ピースが1段落ちただけのフレームは4バイト程度、何も変わらなければ3バイトになる。
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from tetris_game.replay import decode_varint, encode_varint
+from tetris_game.snapshot import GameStateSnapshot, PieceState, pack_nibbles, unpack_nibbles
+
+FRAME_KEY = 0
+FRAME_DELTA = 1
+
+FIELD_ROWS = 1
+FIELD_CURRENT = 2
+FIELD_NEXT = 4
+FIELD_SCORE = 8
+FIELD_LINES = 16
+FIELD_LEVEL = 32
+FIELD_PIECES = 64
+FIELD_GAME_OVER = 128
+
+DEFAULT_KEYFRAME_INTERVAL = 60
+
+
+def _zigzag(value: int) -> int:
+    """符号付き整数を varint 用の非負整数にする（0, -1, 1, -2 → 0, 1, 2, 3）"""
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    """_zigzag の逆"""
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _encode_piece(piece: PieceState, out: bytearray) -> None:
+    """ピースの (形状, 回転, x, y) を書き出す"""
+    kind, rotation, x, y = piece
+    out.append(kind << 2 | rotation)
+    encode_varint(_zigzag(x), out)
+    encode_varint(_zigzag(y), out)
+
+
+def _decode_piece(data: bytes, pos: int) -> Tuple[PieceState, int]:
+    """_encode_piece の逆（(ピース, 次の位置) を返す）"""
+    packed = data[pos]
+    x, pos = decode_varint(data, pos + 1)
+    y, pos = decode_varint(data, pos)
+    return (packed >> 2, packed & 3, _unzigzag(x), _unzigzag(y)), pos
+
+
+class DeltaEncoder:
+    """連続する状態を差分フレームにエンコードする（観戦配信の送信側）"""
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval は1以上を指定してください")
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self._previous: Optional[GameStateSnapshot] = None
+        self._since_keyframe = 0
+
+    def request_keyframe(self) -> None:
+        """次のフレームをキーフレームにする（新しい観戦者が接続したときなど）"""
+        self._previous = None
+
+    def encode(self, state: GameStateSnapshot) -> bytes:
+        """状態を1フレームにエンコード（直前の状態との差分、必要ならキーフレーム）"""
+        previous = self._previous
+        out = bytearray()
+        if (previous is None or self._since_keyframe >= self.keyframe_interval
+                or (previous.width, previous.height) != (state.width, state.height)):
+            out.append(FRAME_KEY)
+            encode_varint(self.sequence, out)
+            out += state.to_bytes()
+            self._since_keyframe = 1
+        else:
+            out.append(FRAME_DELTA)
+            encode_varint(self.sequence, out)
+            self._encode_delta(previous, state, out)
+            self._since_keyframe += 1
+        self._previous = state
+        self.sequence += 1
+        return bytes(out)
+
+    @staticmethod
+    def _encode_delta(previous: GameStateSnapshot, state: GameStateSnapshot,
+                      out: bytearray) -> None:
+        """差分フレームの本体（変更フラグと変わった項目）を書き出す"""
+        flags_at = len(out)
+        out.append(0)
+        flags = 0
+
+        if state.cells != previous.cells:
+            width = state.width
+            old = previous.cells
+            new = state.cells
+            changed = [y for y in range(state.height)
+                       if new[y * width:(y + 1) * width] != old[y * width:(y + 1) * width]]
+            flags |= FIELD_ROWS
+            encode_varint(len(changed), out)
+            for y in changed:
+                encode_varint(y, out)
+                out += pack_nibbles(new[y * width:(y + 1) * width])
+        if state.current_piece != previous.current_piece:
+            flags |= FIELD_CURRENT
+            _encode_piece(state.current_piece, out)
+        if state.next_piece != previous.next_piece:
+            flags |= FIELD_NEXT
+            _encode_piece(state.next_piece, out)
+        for field, new_value, old_value in (
+                (FIELD_SCORE, state.score, previous.score),
+                (FIELD_LINES, state.lines_cleared, previous.lines_cleared),
+                (FIELD_LEVEL, state.level, previous.level),
+                (FIELD_PIECES, state.pieces_placed, previous.pieces_placed)):
+            if new_value != old_value:
+                flags |= field
+                encode_varint(new_value, out)
+        if state.game_over != previous.game_over:
+            flags |= FIELD_GAME_OVER
+        out[flags_at] = flags
+
+
+class DeltaDecoder:
+    """差分フレームから状態を組み立て直す（観戦配信の受信側）
+
+    キーフレームを受け取るまで、またはフレームの抜けを検出した後は次のキーフレームまで
+    ``decode`` は None を返す（``synced`` が False の間）。
+    """
+
+    def __init__(self) -> None:
+        self.state: Optional[GameStateSnapshot] = None
+        self.sequence: Optional[int] = None
+
+    @property
+    def synced(self) -> bool:
+        """差分フレームを適用できる状態か"""
+        return self.state is not None
+
+    def decode(self, frame: bytes) -> Optional[GameStateSnapshot]:
+        """1フレームを適用して現在の状態を返す（同期していなければ None）"""
+        if not frame:
+            raise ValueError("空のフレームです")
+        kind = frame[0]
+        sequence, pos = decode_varint(frame, 1)
+        if kind == FRAME_KEY:
+            self.state = GameStateSnapshot.from_bytes(frame[pos:])
+        elif kind == FRAME_DELTA:
+            if self.state is None or self.sequence is None or sequence != self.sequence + 1:
+                # キーフレームをまだ受け取っていないか、抜けたフレームがあるので次のキーフレームまで待つ
+                self.state = None
+                return None
+            self.state = self._apply_delta(self.state, frame, pos)
+        else:
+            raise ValueError(f"未知のフレーム種別です: {kind}")
+        self.sequence = sequence
+        return self.state
+
+    @staticmethod
+    def _apply_delta(state: GameStateSnapshot, frame: bytes, pos: int) -> GameStateSnapshot:
+        """差分フレームの本体を state に適用した新しい状態を返す"""
+        flags = frame[pos]
+        pos += 1
+        changes: Dict[str, Any] = {}
+        if flags & FIELD_ROWS:
+            width = state.width
+            row_size = (width + 1) // 2
+            cells = bytearray(state.cells)
+            count, pos = decode_varint(frame, pos)
+            for _ in range(count):
+                y, pos = decode_varint(frame, pos)
+                cells[y * width:(y + 1) * width] = unpack_nibbles(frame[pos:pos + row_size], width)
+                pos += row_size
+            changes['cells'] = bytes(cells)
+        if flags & FIELD_CURRENT:
+            changes['current_piece'], pos = _decode_piece(frame, pos)
+        if flags & FIELD_NEXT:
+            changes['next_piece'], pos = _decode_piece(frame, pos)
+        for field, name in ((FIELD_SCORE, 'score'), (FIELD_LINES, 'lines_cleared'),
+                            (FIELD_LEVEL, 'level'), (FIELD_PIECES, 'pieces_placed')):
+            if flags & field:
+                changes[name], pos = decode_varint(frame, pos)
+        if flags & FIELD_GAME_OVER:
+            changes['game_over'] = not state.game_over
+        if pos != len(frame):
+            raise ValueError("フレームの長さが一致しません")
+        return state._replace(**changes)
@@ -0,0 +1,143 @@
+"""盤面特徴量モジュール
+
+ヒューリスティック評価に使う特徴量を求める。
+
+- 列の高さ（床からのセル数）と高さの合計
+- 穴（列の最上段ブロックより下にある空きセル）の数
+- 凸凹（隣り合う列の高さの差の絶対値の合計）
+- 行遷移（左右の壁を埋まっているとみなし、行内で空きと埋まりが切り替わる回数。
+  最も高いブロックより上の行は数えない）
+- 井戸の深さ（列ごとに、両隣の低い方の高さから自分の高さを引いた値。壁の高さは盤面の高さ）
+
+``batch_features`` は (N, H, W) の配列で与えた N 個の盤面を NumPy の配列演算でまとめて
+計算する（numpy は ``data`` エクストラ）。``board_features`` は1つの盤面を行ビットマスクの
+ビット演算で計算する高速パスで、グリッドバックエンドにも2次元リストにも使える。
+"""
+
+from typing import Any, List, NamedTuple, Sequence, Tuple, Union
+
+from tetris_game.grid import Grid
+
+try:
+    import numpy as np
+except ImportError:  # 単一盤面の計算だけなら numpy は不要
+    np = None  # type: ignore[assignment]
+
+
+class BoardFeatures(NamedTuple):
+    """1つの盤面の特徴量"""
+
+    column_heights: Tuple[int, ...]
+    aggregate_height: int
+    holes: int
+    bumpiness: int
+    row_transitions: int
+    well_depths: Tuple[int, ...]
+
+
+class BatchFeatures(NamedTuple):
+    """N 個の盤面の特徴量（先頭の次元がゲーム）"""
+
+    column_heights: Any  # (N, W)
+    aggregate_height: Any  # (N,)
+    holes: Any  # (N,)
+    bumpiness: Any  # (N,)
+    row_transitions: Any  # (N,)
+    well_depths: Any  # (N, W)
+
+
+def _well_depths(heights: Sequence[int], wall: int) -> Tuple[int, ...]:
+    """列ごとの井戸の深さ"""
+    padded = [wall, *heights, wall]
+    return tuple(max(0, min(padded[x], padded[x + 2]) - padded[x + 1]) for x in range(len(heights)))
+
+
+def _heights_and_holes(masks: Sequence[int], width: int) -> Tuple[List[int], int]:
+    """上の行から1回なめて列の高さと穴の数を求める"""
+    height = len(masks)
+    heights = [0] * width
+    seen = 0
+    holes = 0
+    for y, mask in enumerate(masks):
+        if seen:
+            holes += bin(seen & ~mask).count('1')
+        new = mask & ~seen
+        if new:
+            seen |= new
+            x = 0
+            while new:
+                if new & 1:
+                    heights[x] = height - y
+                new >>= 1
+                x += 1
+    return heights, holes
+
+
+def _bumpiness(heights: Sequence[int]) -> int:
+    """隣り合う列の高さの差の絶対値の合計"""
+    return sum(abs(heights[x] - heights[x + 1]) for x in range(len(heights) - 1))
+
+
+def heuristic_features(masks: Sequence[int], width: int) -> Tuple[int, int, int]:
+    """行ビットマスクの盤面の (穴の数, 高さの合計, 凸凹)（ボットの評価関数用の軽量版）"""
+    heights, holes = _heights_and_holes(masks, width)
+    return holes, sum(heights), _bumpiness(heights)
+
+
+def mask_features(masks: Sequence[int], width: int) -> BoardFeatures:
+    """行ビットマスク（ビット x が列 x、上の行から順）で表した盤面の特徴量"""
+    height = len(masks)
+    heights, holes = _heights_and_holes(masks, width)
+    inner = (1 << width) - 1
+    walls = 1 | (1 << (width + 1))
+    transitions = 0
+    stack_top = height - max(heights, default=0)
+    for mask in masks[stack_top:]:
+        # 壁を両端に足した行で、隣り合うビットが異なる箇所を数える
+        row = (mask << 1) | walls
+        transitions += bin((row ^ (row >> 1)) & (inner << 1 | 1)).count('1')
+    return BoardFeatures(tuple(heights), sum(heights), holes, _bumpiness(heights), transitions,
+                         _well_depths(heights, height))
+
+
+def board_features(board: Union[Grid, Sequence[Sequence[int]]]) -> BoardFeatures:
+    """グリッドバックエンドまたは2次元リスト（engine.grid）の特徴量"""
+    if isinstance(board, Grid):
+        return mask_features(board.row_masks(), board.width)
+    masks: List[int] = []
+    for row in board:
+        mask = 0
+        if any(row):
+            for x, cell in enumerate(row):
+                if cell:
+                    mask |= 1 << x
+        masks.append(mask)
+    return mask_features(masks, len(board[0]) if masks else 0)
+
+
+def batch_features(boards: Any) -> BatchFeatures:
+    """(N, H, W) の盤面配列（0 が空き）の特徴量をまとめて計算"""
+    if np is None:
+        raise ImportError("batch_features には numpy が必要です（pip install tetris-game[data]）")
+    filled = np.asarray(boards) != 0
+    if filled.ndim != 3:
+        raise ValueError("boards は (N, H, W) の配列を指定してください")
+    n, height, width = filled.shape
+
+    top = filled.argmax(axis=1)
+    heights = np.where(filled.any(axis=1), height - top, 0)
+    aggregate = heights.sum(axis=1)
+    holes = aggregate - filled.sum(axis=(1, 2))
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+    walled = np.pad(filled, ((0, 0), (0, 0), (1, 1)), constant_values=True)
+    per_row = (walled[:, :, 1:] != walled[:, :, :-1]).sum(axis=2)
+    stack_top = height - heights.max(axis=1, initial=0)
+    in_stack = np.arange(height)[None, :] >= stack_top[:, None]
+    transitions = np.where(in_stack, per_row, 0).sum(axis=1)
+
+    wall = np.full((n, 1), height, dtype=heights.dtype)
+    padded = np.concatenate([wall, heights, wall], axis=1)
+    wells = np.maximum(0, np.minimum(padded[:, :-2], padded[:, 2:]) - heights)
+
+    return BatchFeatures(heights, aggregate, holes, bumpiness, transitions, wells)
@@ -1,7 +1,26 @@
 """テトリスゲームエンジンモジュール"""
 
 import random
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple, Union
+
+from tetris_game.grid import Grid, create_grid
+from tetris_game.piece import Piece
+from tetris_game.placements import Placement, enumerate_placements
+from tetris_game.randomizer import Randomizer, create_randomizer
+from tetris_game.shapes import compile_shapes
+from tetris_game.snapshot import EngineSnapshot, GameStateSnapshot, PieceState
+from tetris_game.zobrist import bag_hash, piece_hash
+
+# フレームモードの1秒あたりフレーム数（ミリ秒の落下間隔と同じ速さになるよう換算する）
+FPS = 60
+
+# run_frames の1フレーム分の入力（なし / アクション名 / アクション名の並び）
+FrameInput = Union[None, str, Sequence[str]]
+
+
+def gravity_frames(level: int) -> int:
+    """レベルごとの1段落下に要するフレーム数（60FPSで fall_speed のミリ秒と同じ速さ）"""
+    return max(3, 30 - (level - 1) * 3)
 
 
 class GameEngine:
@@ -127,133 +146,259 @@ class GameEngine:
         ]
     ]
     
-    def __init__(self, grid_width: int = 10, grid_height: int = 20):
+    # apply_action で使える入力名（pygame版のキー操作に対応）
+    ACTIONS = ('left', 'right', 'down', 'rotate', 'drop')
+    
+    # クラス定義時に一度だけコンパイルした形状テーブル（ピースの 'shape' はこちらを参照）
+    SHAPES = compile_shapes(TETRIS_SHAPES)
+    
+    # update 1回で追いつく重力ステップ数の上限の既定値
+    MAX_CATCH_UP = 8
+    
+    def __init__(self, grid_width: int = 10, grid_height: int = 20, backend: str = 'list',
+                 seed: Optional[int] = None, randomizer: str = 'uniform',
+                 max_catch_up: int = MAX_CATCH_UP):
+        if max_catch_up < 1:
+            raise ValueError("max_catch_up は1以上を指定してください")
         self.grid_width = grid_width
         self.grid_height = grid_height
-        self.grid: List[List[int]] = [[0 for _ in range(grid_width)] for _ in range(grid_height)]
-        self.current_piece: Optional[Dict[str, Any]] = None
-        self.next_piece: Optional[Dict[str, Any]] = None
+        self.board: Grid = create_grid(backend, grid_width, grid_height)
+        # シード省略時はグローバル乱数から決める（random.seed() 済みなら再現可能）
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.randomizer: Randomizer = create_randomizer(randomizer, len(self.SHAPES), self.seed)
+        self.current_piece: Optional[Piece] = None
+        self.next_piece: Optional[Piece] = None
         self.score = 0
         self.lines_cleared = 0
         self.level = 1
         self.fall_time = 0
         self.fall_speed = 500  # ミリ秒
+        self.fall_frames = 0
+        self.frames_per_row = gravity_frames(1)
         self.game_over = False
+        self.pieces_placed = 0
+        self.max_catch_up = max_catch_up
         
         # 初期ピースを生成
         self.current_piece = self.get_new_piece()
         self.next_piece = self.get_new_piece()
     
-    def get_new_piece(self) -> Dict[str, Any]:
+    @property
+    def grid(self) -> List[List[int]]:
+        """グリッドの2次元リスト表現（listバックエンドでは内部リストそのもの）
+
+        listバックエンドではこのリストへの書き込みも盤面に反映され、row_fill などの集計は
+        次に読むときに作り直される。取得したリストを保持して後から書き込んではいけない。
+        """
+        return self.board.to_list()
+    
+    @property
+    def state_hash(self) -> int:
+        """盤面・操作中ピース・次ピース・袋の残りの 64bit Zobrist ハッシュ
+        
+        盤面部分は place_piece / clear_lines で差分更新され、ピース部分は表引きだけで求まる。
+        bag ランダマイザでは袋にまだ残っている形状の集合も含める（uniform では空）。
+        """
+        piece = self.current_piece
+        upcoming = self.next_piece
+        assert piece is not None and upcoming is not None
+        board = self.board
+        board.sync()
+        keys = board.keys
+        value = board.grid_hash ^ piece_hash(
+            piece.kind, piece.rotation, piece.x, piece.y, upcoming.kind, keys)
+        return value ^ bag_hash(self.randomizer.bag_remaining(), keys)
+    
+    @property
+    def row_fill(self) -> Tuple[int, ...]:
+        """行ごとの占有セル数（place_piece / clear_lines で差分更新）"""
+        return self.board.row_fill
+    
+    @property
+    def column_heights(self) -> Tuple[int, ...]:
+        """列ごとの積み上がり高さ（床からのセル数）"""
+        return self.board.column_heights
+    
+    def get_new_piece(self) -> Piece:
         """新しいテトリスピースを生成"""
-        shape_index = random.randint(0, len(self.TETRIS_SHAPES) - 1)
-        return {
-            'shape': self.TETRIS_SHAPES[shape_index],
-            'rotation': 0,
-            'x': self.grid_width // 2 - 2,
-            'y': 0,
-            'color': shape_index + 1
-        }
+        shape_index = self.randomizer.next()
+        return Piece(shape_index, self.SHAPES[shape_index], 0, self.grid_width // 2 - 2, 0)
     
-    def is_valid_position(self, piece: Dict[str, Any], dx: int = 0, dy: int = 0, rotation: Optional[int] = None) -> bool:
+    def is_valid_position(self, piece: Piece, dx: int = 0, dy: int = 0,
+                          rotation: Optional[int] = None) -> bool:
         """ピースの位置が有効かチェック"""
         if rotation is None:
-            rotation = piece['rotation']
-        
-        shape = piece['shape'][rotation]
+            rotation = piece.rotation
         
-        for y, row in enumerate(shape):
-            for x, cell in enumerate(row):
-                if cell == '#':
-                    new_x = piece['x'] + x + dx
-                    new_y = piece['y'] + y + dy
-                    
-                    if (new_x < 0 or new_x >= self.grid_width or 
-                        new_y >= self.grid_height or
-                        (new_y >= 0 and self.grid[new_y][new_x] != 0)):
-                        return False
-        return True
+        return self.board.fits(piece.shape[rotation], piece.x + dx, piece.y + dy)
     
-    def place_piece(self, piece: Dict[str, Any]) -> None:
+    def place_piece(self, piece: Piece) -> None:
         """ピースをグリッドに配置"""
-        shape = piece['shape'][piece['rotation']]
-        for y, row in enumerate(shape):
-            for x, cell in enumerate(row):
-                if cell == '#':
-                    grid_x = piece['x'] + x
-                    grid_y = piece['y'] + y
-                    if grid_y >= 0:
-                        self.grid[grid_y][grid_x] = piece['color']
+        self.board.place(piece.shape[piece.rotation], piece.x, piece.y, piece.kind + 1)
     
-    def clear_lines(self) -> int:
-        """完成したラインをクリアしてスコアを更新"""
-        lines_to_clear = []
-        for y in range(self.grid_height):
-            if all(self.grid[y][x] != 0 for x in range(self.grid_width)):
-                lines_to_clear.append(y)
+    def piece_rows(self, piece: Piece) -> range:
+        """ピースが占めるグリッド内の行範囲"""
+        _, min_dy, _, max_dy = piece.shape[piece.rotation].bbox
+        return range(max(piece.y + min_dy, 0), min(piece.y + max_dy + 1, self.grid_height))
+    
+    def clear_lines(self, rows: Optional[Iterable[int]] = None) -> int:
+        """完成したラインをクリアしてスコアを更新
         
-        for y in lines_to_clear:
-            del self.grid[y]
-            self.grid.insert(0, [0 for _ in range(self.grid_width)])
+        rows を渡した場合はその行（ロックしたピースが触れた行）だけを row_fill で調べる。
+        省略した場合は全行を調べる。
+        """
+        lines_to_clear = self.board.full_rows(rows)
+        self.board.remove_rows(lines_to_clear)
         
         lines_cleared = len(lines_to_clear)
         self.lines_cleared += lines_cleared
         self.score += lines_cleared * 100 * self.level
         self.level = self.lines_cleared // 10 + 1
         self.fall_speed = max(50, 500 - (self.level - 1) * 50)
+        self.frames_per_row = gravity_frames(self.level)
         
         return lines_cleared
     
     def move_piece(self, dx: int, dy: int) -> bool:
         """ピースを移動"""
-        if self.current_piece and self.is_valid_position(self.current_piece, dx, dy):
-            self.current_piece['x'] += dx
-            self.current_piece['y'] += dy
+        piece = self.current_piece
+        if piece is not None and self.board.fits(piece.shape[piece.rotation],
+                                                 piece.x + dx, piece.y + dy):
+            piece.x += dx
+            piece.y += dy
             return True
         return False
     
     def rotate_piece(self) -> bool:
         """ピースを回転"""
-        if not self.current_piece:
+        piece = self.current_piece
+        if piece is None:
             return False
             
-        original_rotation = self.current_piece['rotation']
-        new_rotation = (original_rotation + 1) % len(self.current_piece['shape'])
+        new_rotation = (piece.rotation + 1) % len(piece.shape)
         
-        if self.is_valid_position(self.current_piece, rotation=new_rotation):
-            self.current_piece['rotation'] = new_rotation
+        if self.board.fits(piece.shape[new_rotation], piece.x, piece.y):
+            piece.rotation = new_rotation
             return True
         return False
     
+    def drop_distance(self, piece: Piece) -> int:
+        """ピースがあと何段落下できるか（ゴースト表示にも使う）"""
+        return self.board.drop_distance(piece.shape[piece.rotation], piece.x, piece.y)
+    
     def hard_drop(self) -> None:
         """ピースを一気に落下"""
         if self.current_piece:
-            while self.move_piece(0, 1):
-                pass
+            self.current_piece.y += self.drop_distance(self.current_piece)
+    
+    def enumerate_placements(self, piece: Optional[Piece] = None) -> List[Placement]:
+        """piece（省略時は操作中ピース）が到達できる全固定位置を入力列付きで列挙"""
+        if piece is None:
+            piece = self.current_piece
+        if piece is None:
+            return []
+        return enumerate_placements(self.board, piece.shape, piece.rotation, piece.x, piece.y)
+    
+    def apply_action(self, action: str) -> bool:
+        """ACTIONS の名前で入力を適用（ヘッドレス実行やリプレイ用）"""
+        if action == 'left':
+            return self.move_piece(-1, 0)
+        if action == 'right':
+            return self.move_piece(1, 0)
+        if action == 'down':
+            return self.move_piece(0, 1)
+        if action == 'rotate':
+            return self.rotate_piece()
+        if action == 'drop':
+            self.hard_drop()
+            return True
+        raise ValueError(f"未知のアクションです: {action}")
     
-    def update(self, dt: int) -> None:
-        """ゲーム状態を更新"""
+    def update(self, dt: int) -> int:
+        """ゲーム時間を dt ミリ秒進める（固定タイムステップ）
+        
+        溜まった時間で落下時刻に達した回数だけ重力ステップを適用し、端数は fall_time に残す。
+        1回の呼び出しで適用するのは max_catch_up 回までで、それを超えて溜まった時間は捨てる。
+        適用した重力ステップ数を返す。
+        """
         if self.game_over or not self.current_piece:
-            return
+            return 0
         
         self.fall_time += dt
         
-        if self.fall_time >= self.fall_speed:
-            if not self.move_piece(0, 1):
-                self.place_piece(self.current_piece)
-                self.clear_lines()
-                
-                self.current_piece = self.next_piece
-                self.next_piece = self.get_new_piece()
-                
-                if not self.is_valid_position(self.current_piece):
-                    self.game_over = True
+        steps = 0
+        while self.fall_time >= self.fall_speed and not self.game_over:
+            if steps >= self.max_catch_up:
+                self.fall_time %= self.fall_speed
+                break
+            self.fall_time -= self.fall_speed
+            self.gravity_step()
+            steps += 1
+        return steps
+    
+    def advance(self, ticks: int) -> int:
+        """重力ステップを ticks 回まとめて進める（早送り用、fall_time の端数はそのまま）
+        
+        ゲームオーバーになった時点で止まり、実際に進めた回数を返す。
+        """
+        steps = 0
+        while steps < ticks and not self.game_over and self.current_piece:
+            self.gravity_step()
+            steps += 1
+        return steps
+    
+    def run_frames(self, n: int, inputs: Optional[Sequence[FrameInput]] = None) -> int:
+        """フレームモードで n フレーム進める（時間計算なしの整数カウンタだけで重力を扱う）
+        
+        inputs[i] は i フレーム目の重力より前に適用する入力で、None・アクション名・
+        アクション名の並びのいずれか。inputs が n より短ければ残りのフレームは入力なし。
+        ゲームオーバーになった時点で止まり、実際に進めたフレーム数を返す。
+        """
+        if inputs is None:
+            inputs = ()
+        count = len(inputs)
+        apply_action = self.apply_action
+        gravity_step = self.gravity_step
+        fall_frames = self.fall_frames
+        frame = 0
+        while frame < n and not self.game_over and self.current_piece:
+            if frame < count:
+                actions = inputs[frame]
+                if actions is not None:
+                    if isinstance(actions, str):
+                        apply_action(actions)
+                    else:
+                        for action in actions:
+                            apply_action(action)
+            frame += 1
+            fall_frames += 1
+            if fall_frames >= self.frames_per_row:
+                fall_frames = 0
+                gravity_step()
+        self.fall_frames = fall_frames
+        return frame
+    
+    def gravity_step(self) -> None:
+        """重力で1段落とし、落ちられなければ固定・ライン消去・次ピース出現"""
+        if not self.move_piece(0, 1):
+            piece = self.current_piece
+            assert piece is not None and self.next_piece is not None
+            self.place_piece(piece)
+            self.clear_lines(self.piece_rows(piece))
+            self.pieces_placed += 1
+            
+            self.current_piece = piece = self.next_piece
+            self.next_piece = self.get_new_piece()
             
-            self.fall_time = 0
+            if not self.is_valid_position(piece):
+                self.game_over = True
     
-    def reset_game(self) -> None:
-        """ゲームをリセット"""
-        self.grid = [[0 for _ in range(self.grid_width)] for _ in range(self.grid_height)]
+    def reset_game(self, seed: Optional[int] = None) -> None:
+        """ゲームをリセット（seed を渡すとその値でピース列をやり直す）"""
+        if seed is not None:
+            self.seed = seed
+            self.randomizer.reseed(seed)
+        self.board.clear()
         self.current_piece = self.get_new_piece()
         self.next_piece = self.get_new_piece()
         self.score = 0
@@ -261,10 +406,73 @@ class GameEngine:
         self.level = 1
         self.fall_time = 0
         self.fall_speed = 500
+        self.fall_frames = 0
+        self.frames_per_row = gravity_frames(1)
         self.game_over = False
+        self.pieces_placed = 0
+    
+    def snapshot(self) -> EngineSnapshot:
+        """探索・巻き戻し用に現在の状態を不変な形で保存"""
+        current = self.current_piece
+        upcoming = self.next_piece
+        assert current is not None and upcoming is not None
+        return EngineSnapshot(
+            grid=self.board.freeze(),
+            current_piece=(current.kind, current.rotation, current.x, current.y),
+            next_piece=(upcoming.kind, upcoming.rotation, upcoming.x, upcoming.y),
+            score=self.score,
+            lines_cleared=self.lines_cleared,
+            level=self.level,
+            fall_time=self.fall_time,
+            fall_speed=self.fall_speed,
+            game_over=self.game_over,
+            pieces_placed=self.pieces_placed,
+            randomizer_state=self.randomizer.getstate(),
+            fall_frames=self.fall_frames,
+        )
+    
+    def restore(self, snap: EngineSnapshot) -> None:
+        """snapshot() で保存した状態に戻す（変わった行だけ書き戻す）"""
+        self.board.thaw(snap.grid)
+        self.current_piece = self._piece_from_state(snap.current_piece)
+        self.next_piece = self._piece_from_state(snap.next_piece)
+        self.score = snap.score
+        self.lines_cleared = snap.lines_cleared
+        self.level = snap.level
+        self.fall_time = snap.fall_time
+        self.fall_speed = snap.fall_speed
+        self.game_over = snap.game_over
+        self.pieces_placed = snap.pieces_placed
+        self.randomizer.setstate(snap.randomizer_state)
+        self.fall_frames = snap.fall_frames
+        self.frames_per_row = gravity_frames(snap.level)
+    
+    def _piece_from_state(self, state: PieceState) -> Piece:
+        """(形状番号, 回転, x, y) からピースを作る"""
+        kind, rotation, x, y = state
+        return Piece(kind, self.SHAPES[kind], rotation, x, y)
+    
+    def state_snapshot(self) -> GameStateSnapshot:
+        """観測用の不変な状態を返す（描画・配信・リプレイ用ツールでコピーせずに共有できる）"""
+        current = self.current_piece
+        upcoming = self.next_piece
+        assert current is not None and upcoming is not None
+        return GameStateSnapshot(
+            width=self.grid_width,
+            height=self.grid_height,
+            cells=self.board.cell_bytes(),
+            current_piece=(current.kind, current.rotation, current.x, current.y),
+            next_piece=(upcoming.kind, upcoming.rotation, upcoming.x, upcoming.y),
+            score=self.score,
+            lines_cleared=self.lines_cleared,
+            level=self.level,
+            pieces_placed=self.pieces_placed,
+            game_over=self.game_over,
+        )
     
     def get_game_state(self) -> Dict[str, Any]:
-        """現在のゲーム状態を取得"""
+        """現在のゲーム状態を取得（grid とピースはエンジン内部への参照なので、
+        保持・共有する場合は state_snapshot() を使う）"""
         return {
             'grid': self.grid,
             'current_piece': self.current_piece,
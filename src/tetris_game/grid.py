@@ -0,0 +1,481 @@
+"""グリッドバックエンドモジュール"""
+
+from functools import reduce
+from operator import mul, xor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from tetris_game.shapes import Rotation
+from tetris_game.zobrist import MASK64, grid_hash, mix_row, zobrist_keys
+
+
+def _compact(buffer, rows: Sequence[int], stride: int) -> None:
+    """消去行（昇順）の間にある区間を、下の区間から順にスライス代入で下へずらす
+
+    buffer は1行あたり stride 要素の行優先シーケンス。先頭 len(rows) 行は呼び出し側で埋める。
+    """
+    shift = 0
+    for i in range(len(rows) - 1, -1, -1):
+        shift += 1
+        top = rows[i - 1] + 1 if i > 0 else 0
+        bottom = rows[i]
+        if bottom > top:
+            moved = buffer[top * stride:bottom * stride]
+            buffer[(top + shift) * stride:(bottom + shift) * stride] = moved
+
+
+class GridState(NamedTuple):
+    """``Grid.freeze()`` が返す盤面の不変な表現"""
+
+    rows: Tuple[bytes, ...]  # 行ごとの色（1セル1バイト）
+    row_fill: Tuple[int, ...]
+    column_heights: Tuple[int, ...]
+    row_keys: Tuple[int, ...]
+    grid_hash: int
+
+
+class Grid:
+    """グリッドバックエンドの共通部分
+
+    行ごとの占有セル数 ``row_fill`` と列ごとの高さ ``column_heights``（床からのセル数）を
+    配置・消去のたびに差分更新する。盤面の Zobrist ハッシュ ``grid_hash`` も同様に
+    差分更新する。セルの持ち方はサブクラスが決める。
+
+    スナップショット用に各行の内容を bytes で保持するキャッシュも持つ。変更のない行は
+    同じ bytes オブジェクトのまま使い回すので、連続したスナップショット同士で行が共有される。
+
+    ``to_list()`` が内部のセルそのものを返すバックエンドでは、そのリストへの書き込みを
+    検出できないので、``to_list()`` を呼んだら集計を「古い」とみなし、次に集計を読むときに
+    ``reindex()`` で作り直す。
+    """
+
+    name = ''
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._row_fill: List[int] = [0] * height
+        self._heights: List[int] = [0] * width
+        self._empty_row = bytes(width)
+        # None は「内容が変わったので作り直しが必要」を表す
+        self._row_cache: List[Optional[bytes]] = [self._empty_row] * height
+        self.keys = zobrist_keys(width, height)
+        self._row_keys: List[int] = [0] * height
+        self.grid_hash = 0
+        # to_list() で渡したセルが外から書き換えられたかもしれない
+        self._stale = False
+
+    @property
+    def row_fill(self) -> Tuple[int, ...]:
+        """行ごとの占有セル数（読み取り専用）"""
+        self.sync()
+        return tuple(self._row_fill)
+
+    @property
+    def column_heights(self) -> Tuple[int, ...]:
+        """列ごとの高さ（読み取り専用）"""
+        self.sync()
+        return tuple(self._heights)
+
+    def sync(self) -> None:
+        """to_list() の後なら、外から書き換えられたかもしれないセルから集計し直す"""
+        if self._stale:
+            self.reindex()
+
+    def occupied(self, x: int, y: int) -> bool:
+        """セル (x, y) が埋まっているか"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """全セルを空にする"""
+        self._row_fill = [0] * self.height
+        self._heights = [0] * self.width
+        self._row_cache = [self._empty_row] * self.height
+        self._row_keys = [0] * self.height
+        self.grid_hash = 0
+        self._stale = False
+
+    def reindex(self) -> None:
+        """セルの内容から row_fill / column_heights / grid_hash を再集計"""
+        self._stale = False
+        self._row_cache = [None] * self.height
+        self._row_keys, self.grid_hash = grid_hash(
+            [self.row_bytes(y) for y in range(self.height)], self.keys)
+        width = self.width
+        height = self.height
+        occupied = self.occupied
+        self._row_fill = [sum(1 for x in range(width) if occupied(x, y)) for y in range(height)]
+        heights = [0] * width
+        for x in range(width):
+            for y in range(height):
+                if occupied(x, y):
+                    heights[x] = height - y
+                    break
+        self._heights = heights
+
+    def _index_place(self, shape: Rotation, x: int, y: int, color: int) -> None:
+        """配置したセルを row_fill / column_heights / grid_hash に反映"""
+        row_fill = self._row_fill
+        heights = self._heights
+        row_cache = self._row_cache
+        row_keys = self._row_keys
+        keys = self.keys
+        cell_keys = keys.cell
+        height = self.height
+        value = self.grid_hash
+        for dx, dy in shape.cells:
+            new_y = y + dy
+            if new_y >= 0:
+                row_fill[new_y] += 1
+                row_cache[new_y] = None
+                if height - new_y > heights[x + dx]:
+                    heights[x + dx] = height - new_y
+                old_key = row_keys[new_y]
+                new_key = old_key ^ cell_keys[x + dx][color]
+                row_keys[new_y] = new_key
+                value ^= mix_row(old_key, new_y, keys) ^ mix_row(new_key, new_y, keys)
+        self.grid_hash = value
+
+    def _index_remove(self, rows: Sequence[int]) -> None:
+        """消去した行を row_fill / column_heights に反映（セルは詰め終わっている前提）"""
+        count = len(rows)
+        _compact(self._row_fill, rows, 1)
+        self._row_fill[:count] = [0] * count
+        _compact(self._row_cache, rows, 1)
+        self._row_cache[:count] = [self._empty_row] * count
+
+        height = self.height
+        heights = self._heights
+
+        # 動くのは積み上がりの最上段 top から最後の消去行までなので、その範囲の寄与だけ
+        # 入れ替える（空行の行キーは 0 で寄与も 0）
+        multipliers = self.keys.row
+        row_keys = self._row_keys
+        top = height - max(heights)
+        end = rows[-1] + 1
+        old = reduce(xor, map(mul, row_keys[top:end], multipliers[top:end]), 0)
+        _compact(row_keys, rows, 1)
+        row_keys[:count] = [0] * count
+        new = reduce(xor, map(mul, row_keys[top + count:end], multipliers[top + count:end]), 0)
+        self.grid_hash ^= (old ^ new) & MASK64
+
+        # 消去行はすべて満杯なので、各列の最上段は rows[0] 以上にある。
+        # 最上段が rows[0] より上なら count 段下がるだけ、rows[0] ちょうどなら下を探し直す。
+        topmost = height - rows[0]
+        occupied = self.occupied
+        for x in range(self.width):
+            if heights[x] > topmost:
+                heights[x] -= count
+            else:
+                new_height = 0
+                for y in range(rows[0] + 1, height):
+                    if occupied(x, y):
+                        new_height = height - y
+                        break
+                heights[x] = new_height
+
+    def row_masks(self) -> List[int]:
+        """行ごとの占有ビットマスク（ビット x が列 x）のリスト"""
+        width = self.width
+        occupied = self.occupied
+        return [sum(1 << x for x in range(width) if occupied(x, y)) for y in range(self.height)]
+
+    def row_bytes(self, y: int) -> bytes:
+        """行 y の色を1セル1バイトで返す"""
+        raise NotImplementedError
+
+    def write_row(self, y: int, colors: bytes) -> None:
+        """行 y を1セル1バイトの色で上書き（row_fill 等は更新しない）"""
+        raise NotImplementedError
+
+    def _fill_row_cache(self) -> List[bytes]:
+        """行キャッシュのうち作り直しが必要な行を埋めて返す"""
+        self.sync()
+        cache = self._row_cache
+        for y, row in enumerate(cache):
+            if row is None:
+                cache[y] = self.row_bytes(y)
+        return cache  # type: ignore[return-value]
+
+    def cell_bytes(self) -> bytes:
+        """盤面全体を行優先・1セル1バイトの色で返す"""
+        return b''.join(self._fill_row_cache())
+
+    def freeze(self) -> GridState:
+        """盤面の不変な表現を返す"""
+        cache = self._fill_row_cache()
+        return GridState(
+            rows=tuple(cache),
+            row_fill=tuple(self._row_fill),
+            column_heights=tuple(self._heights),
+            row_keys=tuple(self._row_keys),
+            grid_hash=self.grid_hash,
+        )
+
+    def thaw(self, state: GridState) -> None:
+        """freeze の結果に戻す（キャッシュと同一オブジェクトの行は書き換えない）"""
+        # 外から書き換えられた行もキャッシュと同一に見えるので、先に作り直しておく
+        self.sync()
+        cache = self._row_cache
+        for y, row in enumerate(state.rows):
+            if cache[y] is not row:
+                self.write_row(y, row)
+                cache[y] = row
+        self._row_fill = list(state.row_fill)
+        self._heights = list(state.column_heights)
+        self._row_keys = list(state.row_keys)
+        self.grid_hash = state.grid_hash
+
+    def drop_distance(self, shape: Rotation, x: int, y: int) -> int:
+        """(x, y) の形状があと何段落下できるか
+
+        形状の各列の最下段セルがその列の積み上がり（スカイライン）より上にあれば、
+        column_heights と底面プロファイルだけで O(列数) で求まる。
+        オーバーハングの下に潜り込んでいる場合は1段ずつの衝突判定にフォールバックする。
+        """
+        self.sync()
+        height = self.height
+        heights = self._heights
+        distance = height
+        for dx, bottom in shape.bottom_profile:
+            gap = height - heights[x + dx] - 1 - (y + bottom)
+            if gap < 0:
+                distance = 0
+                while self.fits(shape, x, y + distance + 1):
+                    distance += 1
+                return distance
+            if gap < distance:
+                distance = gap
+        return distance
+
+    def fits(self, shape: Rotation, x: int, y: int) -> bool:
+        """形状を (x, y) に置けるかチェック"""
+        raise NotImplementedError
+
+    def place(self, shape: Rotation, x: int, y: int, color: int) -> None:
+        """形状を (x, y) に書き込む"""
+        raise NotImplementedError
+
+    def full_rows(self, candidates: Optional[Iterable[int]] = None) -> List[int]:
+        """満杯の行番号を上から順に返す
+
+        candidates を指定した場合は row_fill を使ってその行だけを調べる。省略した場合は全行。
+        """
+        self.sync()
+        if candidates is None:
+            candidates = range(self.height)
+        row_fill = self._row_fill
+        width = self.width
+        return sorted(y for y in candidates if row_fill[y] == width)
+
+    def remove_rows(self, rows: Sequence[int]) -> None:
+        """指定行（昇順）を消去して上の行を詰める"""
+        raise NotImplementedError
+
+    def to_list(self) -> List[List[int]]:
+        """2次元リスト表現を返す"""
+        raise NotImplementedError
+
+
+class ListGrid(Grid):
+    """2次元リストでセルを保持する標準バックエンド"""
+
+    name = 'list'
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        self.cells: List[List[int]] = [[0 for _ in range(width)] for _ in range(height)]
+
+    def occupied(self, x: int, y: int) -> bool:
+        """セル (x, y) が埋まっているか"""
+        return self.cells[y][x] != 0
+
+    def clear(self) -> None:
+        """全セルを空にする"""
+        super().clear()
+        for row in self.cells:
+            for x in range(self.width):
+                row[x] = 0
+
+    def fits(self, shape: Rotation, x: int, y: int) -> bool:
+        """形状を (x, y) に置けるかチェック"""
+        width = self.width
+        height = self.height
+        cells = self.cells
+        for dx, dy in shape.cells:
+            new_x = x + dx
+            new_y = y + dy
+            if (new_x < 0 or new_x >= width or
+                    new_y >= height or
+                    (new_y >= 0 and cells[new_y][new_x] != 0)):
+                return False
+        return True
+
+    def place(self, shape: Rotation, x: int, y: int, color: int) -> None:
+        """形状を (x, y) に書き込む"""
+        self.sync()
+        for dx, dy in shape.cells:
+            if y + dy >= 0:
+                self.cells[y + dy][x + dx] = color
+        self._index_place(shape, x, y, color)
+
+    def remove_rows(self, rows: Sequence[int]) -> None:
+        """指定行（昇順）を消去し、残りの行を1パスで下へ詰める
+
+        消えた行のリストはゼロクリアして最上段に再利用する。
+        """
+        if not rows:
+            return
+        self.sync()
+        cells = self.cells
+        freed = [cells[y] for y in rows]
+        _compact(cells, rows, 1)
+        empty = [0] * self.width
+        for y, row in enumerate(freed):
+            row[:] = empty
+            cells[y] = row
+        self._index_remove(rows)
+
+    def row_masks(self) -> List[int]:
+        """行ごとの占有ビットマスク（ビット x が列 x）のリスト"""
+        masks = []
+        for row in self.cells:
+            mask = 0
+            if any(row):
+                for x, cell in enumerate(row):
+                    if cell:
+                        mask |= 1 << x
+            masks.append(mask)
+        return masks
+
+    def row_bytes(self, y: int) -> bytes:
+        """行 y の色を1セル1バイトで返す"""
+        return bytes(self.cells[y])
+
+    def write_row(self, y: int, colors: bytes) -> None:
+        """行 y を1セル1バイトの色で上書き"""
+        self.cells[y][:] = colors
+
+    def to_list(self) -> List[List[int]]:
+        """2次元リスト表現を返す（内部リストそのもの。書き込みは次に集計を読むときに反映）"""
+        self._stale = True
+        return self.cells
+
+
+class BitboardGrid(Grid):
+    """各行を整数ビットマスクで保持するバックエンド
+
+    ビット x が列 x の占有を表す。色は ``colors`` に行優先で1セル1バイト保持する。
+    """
+
+    name = 'bitboard'
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        self.full_mask = (1 << width) - 1
+        self.rows: List[int] = [0] * height
+        self.colors = bytearray(width * height)
+
+    def occupied(self, x: int, y: int) -> bool:
+        """セル (x, y) が埋まっているか"""
+        return bool(self.rows[y] >> x & 1)
+
+    def clear(self) -> None:
+        """全セルを空にする"""
+        super().clear()
+        self.rows = [0] * self.height
+        self.colors = bytearray(self.width * self.height)
+
+    def fits(self, shape: Rotation, x: int, y: int) -> bool:
+        """形状を (x, y) に置けるか行単位のビット演算でチェック"""
+        width = self.width
+        height = self.height
+        rows = self.rows
+        for dy, mask in shape.row_masks:
+            if x >= 0:
+                shifted = mask << x
+            else:
+                if mask & ((1 << -x) - 1):
+                    return False
+                shifted = mask >> -x
+            if shifted >> width:
+                return False
+            new_y = y + dy
+            if new_y >= height:
+                return False
+            if new_y >= 0 and rows[new_y] & shifted:
+                return False
+        return True
+
+    def place(self, shape: Rotation, x: int, y: int, color: int) -> None:
+        """形状を (x, y) に書き込む"""
+        width = self.width
+        rows = self.rows
+        colors = self.colors
+        for dx, dy in shape.cells:
+            new_y = y + dy
+            if new_y >= 0:
+                rows[new_y] |= 1 << (x + dx)
+                colors[new_y * width + x + dx] = color
+        self._index_place(shape, x, y, color)
+
+    def full_rows(self, candidates: Optional[Iterable[int]] = None) -> List[int]:
+        """満杯の行番号を上から順に返す（行マスクの比較だけで判定）"""
+        self.sync()
+        if candidates is None:
+            candidates = range(self.height)
+        full = self.full_mask
+        rows = self.rows
+        return sorted(y for y in candidates if rows[y] == full)
+
+    def remove_rows(self, rows: Sequence[int]) -> None:
+        """指定行（昇順）を消去し、残りの行と色を1パスで下へ詰める"""
+        if not rows:
+            return
+        count = len(rows)
+        _compact(self.rows, rows, 1)
+        _compact(self.colors, rows, self.width)
+        self.rows[:count] = [0] * count
+        self.colors[:count * self.width] = bytes(count * self.width)
+        self._index_remove(rows)
+
+    def row_masks(self) -> List[int]:
+        """行ごとの占有ビットマスク（内部の行マスクのコピー）"""
+        return list(self.rows)
+
+    def row_bytes(self, y: int) -> bytes:
+        """行 y の色を1セル1バイトで返す"""
+        return bytes(self.colors[y * self.width:(y + 1) * self.width])
+
+    def cell_bytes(self) -> bytes:
+        """盤面全体を行優先・1セル1バイトの色で返す（colors のコピー）"""
+        return bytes(self.colors)
+
+    def write_row(self, y: int, colors: bytes) -> None:
+        """行 y を1セル1バイトの色で上書きし、行マスクも作り直す"""
+        self.colors[y * self.width:(y + 1) * self.width] = colors
+        mask = 0
+        for x, color in enumerate(colors):
+            if color:
+                mask |= 1 << x
+        self.rows[y] = mask
+
+    def to_list(self) -> List[List[int]]:
+        """描画用の2次元リストビューを生成"""
+        width = self.width
+        colors = self.colors
+        return [list(colors[y * width:(y + 1) * width]) for y in range(self.height)]
+
+
+GRID_BACKENDS: Dict[str, Type[Grid]] = {
+    ListGrid.name: ListGrid,
+    BitboardGrid.name: BitboardGrid,
+}
+
+
+def create_grid(backend: str, width: int, height: int) -> Grid:
+    """名前からグリッドバックエンドを生成"""
+    try:
+        grid_class = GRID_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"未知のグリッドバックエンドです: {backend}") from None
+    return grid_class(width, height)
@@ -0,0 +1,172 @@
+"""ヘッドレス実行モジュール
+
+pygame / SDL を一切 import せずに ``GameEngine`` を最大速度で回す。
+ポリシー（毎ティック入力を返す関数）か、入力スクリプトファイルで操作する。
+
+    tetris-sim --policy random --games 100 --seed 1
+    tetris-sim --script inputs.txt
+    tetris-sim --games 100 --record-dir replays/
+
+入力スクリプトは1行に ``<tick> <action>`` を書く（``#`` 以降はコメント）。
+action は ``GameEngine.ACTIONS`` のいずれか。
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.grid import GRID_BACKENDS
+from tetris_game.randomizer import RANDOMIZERS
+from tetris_game.replay import ReplayRecorder
+
+# 1ティックで進めるミリ秒（pygame版の60FPS相当）
+DEFAULT_DT = 16
+DEFAULT_MAX_TICKS = 100_000
+
+Policy = Callable[[GameEngine], Optional[str]]
+
+
+def idle_policy(engine: GameEngine) -> Optional[str]:
+    """何も入力しないポリシー（重力だけで進む）"""
+    return None
+
+
+def make_random_policy(seed: Optional[int] = None, input_rate: float = 0.2) -> Policy:
+    """一定確率でランダムな入力をするポリシーを生成"""
+    rng = random.Random(seed)
+    actions = GameEngine.ACTIONS
+
+    def policy(engine: GameEngine) -> Optional[str]:
+        if rng.random() < input_rate:
+            return rng.choice(actions)
+        return None
+
+    return policy
+
+
+def load_script(lines: Iterable[str]) -> Dict[int, List[str]]:
+    """入力スクリプトを {tick: [action, ...]} に変換"""
+    events: Dict[int, List[str]] = {}
+    for number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        try:
+            tick_text, action = line.split()
+            tick = int(tick_text)
+        except ValueError:
+            raise ValueError(f"{number}行目: '<tick> <action>' の形式ではありません") from None
+        if action not in GameEngine.ACTIONS:
+            raise ValueError(f"{number}行目: 未知のアクションです: {action}")
+        events.setdefault(tick, []).append(action)
+    return events
+
+
+def run_game(engine: GameEngine,
+             policy: Optional[Policy] = None,
+             script: Optional[Dict[int, List[str]]] = None,
+             dt: int = DEFAULT_DT,
+             max_ticks: int = DEFAULT_MAX_TICKS) -> Dict[str, float]:
+    """ゲームオーバーか max_ticks までエンジンを回して結果を返す"""
+    start = time.perf_counter()
+    tick = 0
+    while tick < max_ticks and not engine.game_over:
+        if script is not None:
+            for action in script.get(tick, ()):
+                engine.apply_action(action)
+        if policy is not None:
+            chosen = policy(engine)
+            if chosen is not None:
+                engine.apply_action(chosen)
+        engine.update(dt)
+        tick += 1
+    return {
+        'score': engine.score,
+        'lines': engine.lines_cleared,
+        'level': engine.level,
+        'pieces': engine.pieces_placed,
+        'ticks': tick,
+        'game_over': engine.game_over,
+        'duration': time.perf_counter() - start,
+    }
+
+
+def make_policy(name: str, seed: Optional[int]) -> Policy:
+    """名前からポリシーを生成"""
+    if name == 'idle':
+        return idle_policy
+    if name == 'random':
+        return make_random_policy(seed)
+    raise ValueError(f"未知のポリシーです: {name}")
+
+
+POLICIES: Tuple[str, ...] = ('idle', 'random')
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='tetris-sim', description="ヘッドレスでテトリスを最大速度で実行")
+    parser.add_argument('--policy', choices=POLICIES, default='random', help="入力ポリシー")
+    parser.add_argument('--script', help="入力スクリプトファイル（指定時はポリシーを使わない）")
+    parser.add_argument('--games', type=int, default=1, help="連続して実行するゲーム数")
+    parser.add_argument('--seed', type=int, default=0, help="最初のゲームのシード（以降+1ずつ）")
+    parser.add_argument('--dt', type=int, default=DEFAULT_DT, help="1ティックのミリ秒")
+    parser.add_argument('--max-ticks', type=int, default=DEFAULT_MAX_TICKS, help="1ゲームの最大ティック数")
+    parser.add_argument('--width', type=int, default=10)
+    parser.add_argument('--height', type=int, default=20)
+    parser.add_argument('--backend', default='list', choices=tuple(GRID_BACKENDS),
+                        help="グリッドバックエンド")
+    parser.add_argument('--randomizer', default='uniform', choices=tuple(RANDOMIZERS),
+                        help="ピース生成方式")
+    parser.add_argument('--record-dir', help="各ゲームのリプレイを <seed>.trp として保存するディレクトリ")
+    parser.add_argument('--json', action='store_true', help="結果をJSON Linesで出力")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """tetris-sim のエントリーポイント"""
+    args = parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            script = load_script(f)
+
+    if args.record_dir:
+        os.makedirs(args.record_dir, exist_ok=True)
+
+    total_ticks = 0
+    started = time.perf_counter()
+    for game in range(args.games):
+        seed = args.seed + game
+        engine = GameEngine(args.width, args.height, backend=args.backend,
+                            seed=seed, randomizer=args.randomizer)
+        policy = None if script is not None else make_policy(args.policy, seed)
+        recorder = None
+        if args.record_dir:
+            recorder = ReplayRecorder(engine, os.path.join(args.record_dir, f'{seed}.trp'))
+        result = run_game(engine, policy=policy, script=script, dt=args.dt,
+                          max_ticks=args.max_ticks)
+        if recorder is not None:
+            recorder.close()
+        total_ticks += int(result['ticks'])
+        if args.json:
+            print(json.dumps(dict(result, seed=seed)))
+        else:
+            print(f"seed={seed} score={result['score']} lines={result['lines']} "
+                  f"level={result['level']} pieces={result['pieces']} ticks={result['ticks']}")
+
+    elapsed = time.perf_counter() - started
+    if not args.json:
+        print(f"{args.games} games, {total_ticks} ticks in {elapsed:.2f}s "
+              f"({total_ticks / elapsed if elapsed else 0:.0f} ticks/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
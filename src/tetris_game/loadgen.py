@@ -0,0 +1,237 @@
+"""ゲームサーバーの負荷生成クライアント
+
+ローカルのゲームサーバーへ多数のセッションを張り、ランダムな入力を送りながら
+「入力を送ってから、その入力を適用したフレームが届くまで」の遅延を測る（フレームヘッダの
+適用済み入力数で対応を取る）。接続先を
+指定しなければサーバーを別プロセスで起動し、終了時にサーバー側のティック統計も表示する。
+
+    python -m tetris_game.loadgen --sessions 10000 --duration 10
+    python -m tetris_game.loadgen --connect 127.0.0.1:7777 --sessions 1000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.server import ACK_MASK, FRAME_HEADER, GameServer, TickStats, percentiles
+
+# 一度に張る接続数（listen のバックログを溢れさせないため）
+CONNECT_BATCH = 500
+
+
+class LoadResult(NamedTuple):
+    """負荷試験の結果"""
+
+    sessions: int
+    connected: int
+    frames: int
+    bytes: int
+    inputs: int
+    duration: float
+    latency: Dict[str, float]  # 入力 → フレーム到着（ミリ秒）
+    server: Optional[TickStats]
+
+
+class ClientSession(asyncio.Protocol):
+    """1セッション分のクライアント（フレームを数え、入力への応答時間を記録する）"""
+
+    def __init__(self, latencies: List[float]):
+        self.latencies = latencies
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = bytearray()
+        self.frames = 0
+        self.bytes = 0
+        self.closed = False
+        self.sent = 0
+        # 応答待ちの入力を送った時刻と、その入力までの入力数
+        self.pending: Optional[float] = None
+        self.pending_count = 0
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def data_received(self, data: bytes) -> None:
+        self.bytes += len(data)
+        buffer = self.buffer
+        buffer += data
+        pos = 0
+        size = FRAME_HEADER.size
+        while len(buffer) - pos >= size:
+            length, applied = FRAME_HEADER.unpack_from(buffer, pos)
+            if len(buffer) - pos - size < length:
+                break
+            pos += size + length
+            self.frames += 1
+            # 入力数は16ビットで折り返すので差で比べる（応答待ちの入力まで適用済みなら記録）
+            acked = (applied - self.pending_count) & ACK_MASK <= ACK_MASK // 2
+            if self.pending is not None and acked:
+                self.latencies.append((time.perf_counter() - self.pending) * 1000)
+                self.pending = None
+        del buffer[:pos]
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed = True
+
+    def send(self, code: int) -> None:
+        """入力を1つ送る（応答待ちでなければ送信時刻を記録）"""
+        if self.closed or self.transport is None:
+            return
+        self.sent += 1
+        if self.pending is None:
+            self.pending = time.perf_counter()
+            self.pending_count = self.sent & ACK_MASK
+        self.transport.write(bytes((code,)))
+
+
+async def run_load(host: str, port: int, sessions: int, duration: float,
+                   input_rate: float = 0.05, tick_ms: int = 16, seed: int = 0,
+                   on_finish: Optional[Callable[[], None]] = None
+                   ) -> Tuple[int, List[ClientSession], List[float], int, float]:
+    """sessions 個の接続を張り、duration 秒ランダム入力を送る
+
+    計測が終わったら接続を切る前に on_finish を呼ぶ。
+    (接続数, セッション, 遅延サンプル, 送った入力数, 計測秒) を返す。
+    """
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    clients: List[ClientSession] = []
+    for start in range(0, sessions, CONNECT_BATCH):
+        count = min(CONNECT_BATCH, sessions - start)
+        connections = (loop.create_connection(lambda: ClientSession(latencies), host, port)
+                       for _ in range(count))
+        results = await asyncio.gather(*connections, return_exceptions=True)
+        for result in results:
+            if not isinstance(result, BaseException):
+                clients.append(result[1])
+    connected = len(clients)
+
+    rng = random.Random(seed)
+    # ハードドロップは送らない（ゲームがすぐ終わってセッションが減らないように）
+    action_count = GameEngine.ACTIONS.index('drop')
+    inputs = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        # 毎ティック input_rate の割合のセッションが入力する
+        for client in rng.sample(clients, int(len(clients) * input_rate)):
+            client.send(rng.randrange(action_count))
+            inputs += 1
+        await asyncio.sleep(tick_ms / 1000)
+    elapsed = time.perf_counter() - started
+    if on_finish is not None:
+        on_finish()
+
+    for client in clients:
+        if client.transport is not None:
+            client.transport.close()
+    await asyncio.sleep(0)
+    return connected, clients, latencies, inputs, elapsed
+
+
+def _server_process(conn: Any, tick_ms: int) -> None:
+    """別プロセスでサーバーを動かす（ポートを送り、何か受け取ったら統計を返して終了）"""
+    async def serve() -> None:
+        server = GameServer(tick_ms=tick_ms)
+        await server.start()
+        conn.send(server.address[1])
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, conn.recv)
+        conn.send(server.stats())
+        await server.close()
+
+    asyncio.run(serve())
+
+
+def raise_fd_limit() -> None:
+    """開けるファイル数のソフト上限をハード上限まで上げる（対応しない環境では何もしない）"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def load_test(sessions: int, duration: float, connect: Optional[Tuple[str, int]] = None,
+              input_rate: float = 0.05, tick_ms: int = 16, seed: int = 0) -> LoadResult:
+    """負荷試験を行う（connect が None ならサーバーを別プロセスで起動する）"""
+    raise_fd_limit()
+    process = None
+    conn = None
+    if connect is None:
+        conn, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_server_process, args=(child, tick_ms),
+                                          daemon=True)
+        process.start()
+        connect = ('127.0.0.1', conn.recv())
+
+    server_stats: List[TickStats] = []
+
+    def fetch_stats() -> None:
+        if conn is not None:
+            conn.send('stop')
+            server_stats.append(conn.recv())
+
+    try:
+        connected, clients, latencies, inputs, elapsed = asyncio.run(
+            run_load(connect[0], connect[1], sessions, duration, input_rate, tick_ms, seed,
+                     fetch_stats))
+    finally:
+        if process is not None:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    return LoadResult(sessions, connected, sum(client.frames for client in clients),
+                      sum(client.bytes for client in clients), inputs, elapsed,
+                      percentiles(latencies), server_stats[0] if server_stats else None)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='python -m tetris_game.loadgen',
+                                     description="ゲームサーバーの負荷試験")
+    parser.add_argument('--sessions', type=int, default=10_000, help="同時セッション数")
+    parser.add_argument('--duration', type=float, default=10.0, help="計測する秒数")
+    parser.add_argument('--connect', help="接続先 HOST:PORT（省略時はサーバーを別プロセスで起動）")
+    parser.add_argument('--input-rate', type=float, default=0.05, help="1ティックに入力するセッションの割合")
+    parser.add_argument('--tick-ms', type=int, default=16, help="ティック間隔（ミリ秒）")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def _format(values: Dict[str, float]) -> str:
+    """百分位点を1行にする"""
+    return ' '.join(f"{name}={value:.2f}" for name, value in values.items())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """python -m tetris_game.loadgen のエントリーポイント"""
+    args = parse_args(argv)
+    connect = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(':')
+        connect = (host, int(port))
+    result = load_test(args.sessions, args.duration, connect, args.input_rate, args.tick_ms,
+                       args.seed)
+
+    print(f"sessions: {result.connected}/{result.sessions} connected")
+    print(f"frames: {result.frames} ({result.frames / result.duration:.0f}/s, "
+          f"{result.bytes / max(result.frames, 1):.1f} bytes/frame), inputs: {result.inputs}")
+    print(f"input->frame latency ms: {_format(result.latency)}")
+    if result.server is not None:
+        stats = result.server
+        print(f"server ticks: {stats.ticks}, frames sent {stats.frames_sent}, "
+              f"skipped {stats.frames_skipped}, disconnected {stats.disconnected}")
+        print(f"server tick duration ms: {_format(stats.duration)}")
+        print(f"server tick lateness ms: {_format(stats.lateness)}")
+    return 0 if result.connected == result.sessions else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,9 +5,7 @@ import pygame
 import sys
 import os
 from tetris_game.game_engine import GameEngine
-
-# 初期化
-pygame.init()
+from tetris_game.stats import StatsStore
 
 # ゲーム設定
 GRID_WIDTH = 10
@@ -31,11 +29,15 @@ GRAY = (128, 128, 128)
 SHAPE_COLORS = [BLACK, CYAN, YELLOW, PURPLE, GREEN, RED, BLUE, ORANGE]
 
 class TetrisGame:
-    def __init__(self):
+    def __init__(self, stats=None):
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("テトリス")
         self.clock = pygame.time.Clock()
         self.tetris = GameEngine(GRID_WIDTH, GRID_HEIGHT)
+        # ゲームオーバーになったら結果を統計ストアに記録する
+        self.stats = stats
+        self.play_ms = 0
+        self.result_recorded = False
         
         # Windows対応日本語フォント設定
         self.font = self.get_japanese_font(36)
@@ -162,23 +164,27 @@ class TetrisGame:
     
     def draw_piece(self, piece):
         shape = piece['shape'][piece['rotation']]
-        for y, row in enumerate(shape):
-            for x, cell in enumerate(row):
-                if cell == '#':
-                    self.draw_block(piece['x'] + x, piece['y'] + y, piece['color'])
+        for x, y in shape.cells:
+            self.draw_block(piece['x'] + x, piece['y'] + y, piece['color'])
+    
+    def draw_ghost_piece(self, piece):
+        """ハードドロップ後の着地位置を枠線で表示"""
+        ghost_y = piece['y'] + self.tetris.drop_distance(piece)
+        shape = piece['shape'][piece['rotation']]
+        for x, y in shape.cells:
+            rect = pygame.Rect((piece['x'] + x) * BLOCK_SIZE, (ghost_y + y) * BLOCK_SIZE,
+                               BLOCK_SIZE, BLOCK_SIZE)
+            pygame.draw.rect(self.screen, SHAPE_COLORS[piece['color']], rect, 2)
     
     def draw_next_piece(self, piece):
         shape = piece['shape'][piece['rotation']]
         start_x = GRID_WIDTH * BLOCK_SIZE + 20
         start_y = 100
         
-        for y, row in enumerate(shape):
-            for x, cell in enumerate(row):
-                if cell == '#':
-                    colors = [BLACK, CYAN, YELLOW, PURPLE, GREEN, RED, BLUE, ORANGE]
-                    rect = pygame.Rect(start_x + x * 20, start_y + y * 20, 20, 20)
-                    pygame.draw.rect(self.screen, colors[piece['color']], rect)
-                    pygame.draw.rect(self.screen, WHITE, rect, 1)
+        for x, y in shape.cells:
+            rect = pygame.Rect(start_x + x * 20, start_y + y * 20, 20, 20)
+            pygame.draw.rect(self.screen, SHAPE_COLORS[piece['color']], rect)
+            pygame.draw.rect(self.screen, WHITE, rect, 1)
     
     def draw_info(self):
         info_x = GRID_WIDTH * BLOCK_SIZE + 20
@@ -209,6 +215,8 @@ class TetrisGame:
             if self.tetris.game_over:
                 if event.key == pygame.K_r:
                     self.tetris.reset_game()
+                    self.play_ms = 0
+                    self.result_recorded = False
             else:
                 if event.key == pygame.K_LEFT:
                     self.tetris.move_piece(-1, 0)
@@ -221,6 +229,14 @@ class TetrisGame:
                 elif event.key == pygame.K_SPACE:
                     self.tetris.hard_drop()
     
+    def record_result(self):
+        """終わったゲームの結果を統計ストアに積む"""
+        self.result_recorded = True
+        if self.stats is not None:
+            tetris = self.tetris
+            self.stats.record(tetris.score, tetris.lines_cleared, tetris.level,
+                              tetris.pieces_placed, self.play_ms, seed=tetris.seed)
+
     def run(self):
         running = True
         
@@ -233,7 +249,11 @@ class TetrisGame:
                 else:
                     self.handle_input(event)
             
+            if not self.tetris.game_over:
+                self.play_ms += dt
             self.tetris.update(dt)
+            if self.tetris.game_over and not self.result_recorded:
+                self.record_result()
             
             self.screen.fill(BLACK)
             
@@ -245,6 +265,7 @@ class TetrisGame:
             
             # 現在のピースを描画
             if not self.tetris.game_over:
+                self.draw_ghost_piece(self.tetris.current_piece)
                 self.draw_piece(self.tetris.current_piece)
             
             self.draw_grid()
@@ -253,12 +274,16 @@ class TetrisGame:
             
             pygame.display.flip()
         
+        if self.stats is not None:
+            self.stats.close()
         pygame.quit()
         sys.exit()
 
 def main():
     """メインエントリーポイント"""
-    game = TetrisGame()
+    # 初期化（import時ではなく起動時に行う）
+    pygame.init()
+    game = TetrisGame(StatsStore())
     game.run()
 
 if __name__ == "__main__":
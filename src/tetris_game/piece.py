@@ -0,0 +1,76 @@
+"""テトリスピースモジュール"""
+
+from typing import Any, Iterator, Tuple
+
+from tetris_game.shapes import CompiledShape, Rotation
+
+
+class Piece:
+    """形状・回転・位置を保持する固定レイアウトのピース
+
+    ``piece['x']`` のような辞書形式のアクセスにも対応しているため、
+    以前の ``Dict[str, Any]`` 表現を前提にした描画コードやテストもそのまま動く。
+    """
+
+    __slots__ = ('kind', 'shape', 'rotation', 'x', 'y')
+
+    # 辞書互換アクセスで使えるキー
+    KEYS: Tuple[str, ...] = ('shape', 'rotation', 'x', 'y', 'color', 'kind')
+    _WRITABLE_KEYS = frozenset(('rotation', 'x', 'y'))
+
+    def __init__(self, kind: int, shape: CompiledShape, rotation: int = 0, x: int = 0, y: int = 0):
+        self.kind = kind
+        self.shape = shape
+        self.rotation = rotation
+        self.x = x
+        self.y = y
+
+    @property
+    def color(self) -> int:
+        """描画色番号（形状番号 + 1）"""
+        return self.kind + 1
+
+    @property
+    def rotation_shape(self) -> Rotation:
+        """現在の回転のコンパイル済み形状"""
+        return self.shape[self.rotation]
+
+    def copy(self) -> 'Piece':
+        """同じ状態のピースを複製"""
+        return Piece(self.kind, self.shape, self.rotation, self.x, self.y)
+
+    # 辞書互換アダプタ
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        if key not in self._WRITABLE_KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def keys(self) -> Tuple[str, ...]:
+        """辞書互換のキー一覧"""
+        return self.KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """辞書互換の get"""
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Piece):
+            return NotImplemented
+        return ((self.kind, self.rotation, self.x, self.y)
+                == (other.kind, other.rotation, other.x, other.y))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Piece(kind={self.kind}, rotation={self.rotation}, x={self.x}, y={self.y})"
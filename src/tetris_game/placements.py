@@ -0,0 +1,154 @@
+"""固定位置の列挙モジュール
+
+操作中ピースが到達できるすべての固定位置を、(回転, x, y) 上の幅優先探索で1回の
+呼び出しで求める。盤面は行ビットマスクにしてから探索し、形状は回転・x ごとに
+シフト済みの行マスク表へ変換しておくので、1状態の判定は数回の AND で済む。
+
+探索の辺は ``GameEngine.ACTIONS`` の各入力（左右移動・ソフトドロップ・回転・
+ハードドロップ）で、重力による自然落下は考えない（入力は次の落下までに行う前提）。
+"""
+
+from typing import List, NamedTuple, Sequence, Tuple
+
+from tetris_game.grid import Grid
+from tetris_game.shapes import CompiledShape
+
+# 入力列の記録用コード（_ACTION_NAMES の添字）
+_ROTATE, _LEFT, _RIGHT, _DOWN, _DROP = range(5)
+_ACTION_NAMES = ('rotate', 'left', 'right', 'down', 'drop')
+
+
+class Placement(NamedTuple):
+    """到達可能な固定位置と、そこへ運ぶ入力列"""
+
+    rotation: int
+    x: int
+    y: int
+    path: Tuple[str, ...]  # GameEngine.ACTIONS の名前の列
+
+
+def enumerate_placements(board: Grid, shape: CompiledShape,
+                         rotation: int, x: int, y: int) -> List[Placement]:
+    """(rotation, x, y) にある形状から到達できる固定位置を重複なく列挙
+
+    固定位置は「それ以上下に動けない状態」で、占有セルが同じになるものは最初に
+    見つかった（入力数が最も少ない）1つだけを返す。同じ手数の経路では回転・左・右・
+    下・ハードドロップの順に優先する。開始位置に置けない場合は空リスト。
+    """
+    return placements_from_masks(board.row_masks(), board.width, board.height,
+                                 shape, rotation, x, y)
+
+
+def placements_from_masks(masks: Sequence[int], width: int, height: int, shape: CompiledShape,
+                          rotation: int, x: int, y: int) -> List[Placement]:
+    """行ビットマスクで表した盤面に対する enumerate_placements（探索ボットの先読み用）"""
+    num_rotations = len(shape)
+
+    # 状態 (r, x, y) を1つの整数に詰める。x と y の両端に番兵を1つずつ置き、
+    # 左右・下への移動が隣の回転・列へ回り込まないようにする
+    x_min = min(-rot.bbox[0] for rot in shape) - 1
+    x_max = max(width - rot.bbox[2] for rot in shape) + 1
+    y_min = y
+    rows = max(height - y_min, 0) + 1
+    column = rows
+    block = (x_max - x_min) * rows
+    size = num_rotations * block
+
+    # 列ごとの占有ビット（ビット k が行 y_min + k）。y_min より上の行は探索に関係しない
+    columns = [0] * width
+    for row in range(max(y_min, 0), height):
+        mask = masks[row]
+        bit = 1 << (row - y_min)
+        px = 0
+        while mask:
+            if mask & 1:
+                columns[px] |= bit
+            mask >>= 1
+            px += 1
+
+    # 置ける状態と、各状態からハードドロップしたときの着地状態を列ごとに下から求める
+    free = bytearray(size)
+    landing = [0] * size
+    for r, rot in enumerate(shape):
+        min_dx, _, max_dx, max_dy = rot.bbox
+        for px in range(-min_dx, width - max_dx):
+            blocked = 0
+            for dx, dy in rot.cells:
+                blocked |= columns[px + dx] >> dy if dy >= 0 else columns[px + dx] << -dy
+            base = r * block + (px - x_min) * column
+            land = -1
+            for k in range(height - max_dy - y_min - 1, -1, -1):
+                if blocked >> k & 1:
+                    land = -1
+                else:
+                    i = base + k
+                    free[i] = 1
+                    if land < 0:
+                        land = i
+                    landing[i] = land
+
+    start = -1
+    if 0 <= rotation < num_rotations:
+        start = rotation * block + (x - x_min) * column + (y - y_min)
+    if not (x_min < x < x_max and 0 <= start < size and free[start]):
+        return []
+
+    parents = [-1] * size
+    actions = bytearray(size)
+    parents[start] = start
+    queue = [start]
+    locks = []
+    seen_cells = set()
+    last_block = (num_rotations - 1) * block
+
+    # 探索中に queue を伸ばしながら先頭から順に処理する（幅優先）
+    for i in queue:
+        grounded = not free[i + 1]
+        if grounded:
+            r, rest = divmod(i, block)
+            px = rest // column + x_min
+            py = rest % column + y_min
+            rot = shape[r]
+            cells = tuple((py + dy, mask << px if px >= 0 else mask >> -px)
+                          for dy, mask in rot.row_masks)
+            if cells not in seen_cells:
+                seen_cells.add(cells)
+                locks.append((r, px, py, i))
+
+        if num_rotations > 1:
+            j = i + block if i < last_block else i - last_block
+            if free[j] and parents[j] < 0:
+                parents[j] = i
+                actions[j] = _ROTATE
+                queue.append(j)
+        j = i - column
+        if free[j] and parents[j] < 0:
+            parents[j] = i
+            actions[j] = _LEFT
+            queue.append(j)
+        j = i + column
+        if free[j] and parents[j] < 0:
+            parents[j] = i
+            actions[j] = _RIGHT
+            queue.append(j)
+        if not grounded:
+            j = i + 1
+            if parents[j] < 0:
+                parents[j] = i
+                actions[j] = _DOWN
+                queue.append(j)
+            j = landing[i]
+            if parents[j] < 0:
+                parents[j] = i
+                actions[j] = _DROP
+                queue.append(j)
+
+    placements = []
+    for r, px, py, i in locks:
+        path = []
+        while i != start:
+            path.append(_ACTION_NAMES[actions[i]])
+            i = parents[i]
+        path.reverse()
+        placements.append(Placement(r, px, py, tuple(path)))
+    return placements
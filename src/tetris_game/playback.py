@@ -0,0 +1,180 @@
+"""リプレイの再生・検証モジュール
+
+記録されたシードと入力列からゲームをヘッドレスで最大速度で再シミュレーションし、
+ヘッダに記録された最終スコア・ライン数・局面ハッシュと突き合わせる。描画も実時間の
+待ちもない。ディレクトリ内のリプレイはプロセスプールで並列に検証する。
+
+食い違いは最初に見つかったティックで報告する。
+
+- 記録時に成功した入力（リプレイには成功した移動・回転だけが残る）が失敗した
+- update で固定されたピースの数が LOCK イベントの数と合わない
+- 最後まで再生したときのスコア・ライン数・state_hash がヘッダと合わない
+
+    tetris-replay replays/ --workers 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.grid import GRID_BACKENDS
+from tetris_game.replay import ADVANCE_CODE, DT_CODE, LOCK_CODE, Replay, ReplayError, load_replay
+
+REPLAY_PATTERN = '*.trp'
+
+
+class Divergence(NamedTuple):
+    """再生結果が記録と食い違った箇所"""
+
+    tick: int
+    reason: str
+
+
+class VerifyResult(NamedTuple):
+    """1つのリプレイの検証結果"""
+
+    path: str
+    ok: bool
+    seed: Optional[int]
+    score: int
+    lines: int
+    ticks: int
+    divergence: Optional[Divergence]
+    duration: float
+
+
+def replay_game(replay: Replay, backend: str = 'list') -> Tuple[GameEngine, Optional[Divergence]]:
+    """リプレイを再生し、(最終局面のエンジン, 最初の食い違い) を返す"""
+    header = replay.header
+    engine = GameEngine(header.width, header.height, backend=backend,
+                        seed=header.seed, randomizer=header.randomizer,
+                        max_catch_up=header.max_catch_up)
+    actions = GameEngine.ACTIONS
+    events = replay.events
+    count = len(events)
+    update = engine.update
+    apply_action = engine.apply_action
+    i = 0
+    dt = 0
+
+    for tick in range(header.ticks + 1):
+        # このティックの update より前のイベント（入力と dt の変更）
+        while i < count:
+            event = events[i]
+            if event.tick != tick or event.code == LOCK_CODE:
+                break
+            if event.code == DT_CODE:
+                dt = event.value
+            elif event.code == ADVANCE_CODE:
+                engine.advance(event.value)
+            elif not apply_action(actions[event.code]):
+                return engine, Divergence(tick, f"入力 '{actions[event.code]}' を適用できません")
+            i += 1
+        if tick == header.ticks:
+            break
+
+        placed = engine.pieces_placed
+        update(dt)
+        locked = engine.pieces_placed - placed
+        expected = 0
+        while i < count and events[i].tick == tick and events[i].code == LOCK_CODE:
+            expected += 1
+            i += 1
+        if locked != expected:
+            reason = "記録にない固定が起きました" if locked > expected else "記録された固定が起きません"
+            return engine, Divergence(tick, reason)
+
+    if i < count:
+        return engine, Divergence(events[i].tick, "ゲーム終了後にイベントが残っています")
+    for name, expected_value, actual in (
+            ('score', header.score, engine.score),
+            ('lines', header.lines, engine.lines_cleared),
+            ('state_hash', header.state_hash, engine.state_hash)):
+        if expected_value != actual:
+            message = f"{name} が一致しません: 記録 {expected_value}, 再生 {actual}"
+            return engine, Divergence(header.ticks, message)
+    return engine, None
+
+
+def verify_replay(path: str, backend: str = 'list') -> VerifyResult:
+    """リプレイファイルを1つ検証（壊れたファイルも結果として返す）"""
+    start = time.perf_counter()
+    try:
+        replay = load_replay(path)
+    except (OSError, ReplayError) as exc:
+        return VerifyResult(path, False, None, 0, 0, 0, Divergence(0, str(exc)),
+                            time.perf_counter() - start)
+    engine, divergence = replay_game(replay, backend)
+    return VerifyResult(path, divergence is None, replay.header.seed, engine.score,
+                        engine.lines_cleared, replay.header.ticks, divergence,
+                        time.perf_counter() - start)
+
+
+def find_replays(paths: Iterable[str]) -> List[str]:
+    """ファイルとディレクトリの並びからリプレイファイルの一覧を作る"""
+    found: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, REPLAY_PATTERN))))
+        else:
+            found.append(path)
+    return found
+
+
+def verify_replays(paths: Sequence[str], workers: Optional[int] = None,
+                   backend: str = 'list', chunk_size: int = 16) -> Iterator[VerifyResult]:
+    """複数のリプレイを並列に検証し、paths の順に結果を返す（workers=0 はこのプロセス内）"""
+    if workers == 0 or len(paths) <= 1:
+        for path in paths:
+            yield verify_replay(path, backend)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(verify_replay, paths, [backend] * len(paths), chunksize=chunk_size)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='tetris-replay', description="リプレイを再生して結果を検証")
+    parser.add_argument('paths', nargs='+', help="リプレイファイルまたはディレクトリ")
+    parser.add_argument('--workers', type=int, default=None, help="ワーカープロセス数（省略時はCPU数、0で使わない）")
+    parser.add_argument('--backend', default='list', choices=tuple(GRID_BACKENDS),
+                        help="再生に使うグリッドバックエンド")
+    parser.add_argument('--verbose', action='store_true', help="一致したリプレイも表示")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """tetris-replay のエントリーポイント（食い違いがあれば終了コード1）"""
+    args = parse_args(argv)
+    paths = find_replays(args.paths)
+
+    failed = 0
+    ticks = 0
+    started = time.perf_counter()
+    for result in verify_replays(paths, workers=args.workers, backend=args.backend):
+        ticks += result.ticks
+        if result.ok:
+            if args.verbose:
+                print(f"OK   {result.path} seed={result.seed} score={result.score} "
+                      f"lines={result.lines}")
+            continue
+        failed += 1
+        divergence = result.divergence
+        if divergence is not None:
+            print(f"FAIL {result.path} tick={divergence.tick}: {divergence.reason}")
+        else:
+            print(f"FAIL {result.path}")
+
+    elapsed = time.perf_counter() - started
+    print(f"{len(paths) - failed}/{len(paths)} replays verified, {ticks} ticks in {elapsed:.2f}s "
+          f"({ticks / elapsed if elapsed else 0:.0f} ticks/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
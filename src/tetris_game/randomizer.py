@@ -0,0 +1,120 @@
+"""ピース生成（ランダマイザ）モジュール
+
+各 ``GameEngine`` が自分専用のシード付き乱数を持ち、次に出る形状番号の列を
+チャンク単位で先に生成してキューに貯めておく。
+"""
+
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type
+
+# 1回の補充で生成するおおよその個数
+DEFAULT_CHUNK_SIZE = 64
+
+
+class Randomizer:
+    """形状番号キューの共通部分"""
+
+    name = ''
+
+    def __init__(self, num_kinds: int, seed: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.num_kinds = num_kinds
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+        self._queue: Deque[int] = deque()
+        # getstate() の乱数状態キャッシュ。補充で乱数を進めるまで同じオブジェクトを返す
+        self._rng_state: Any = None
+
+    def _generate(self) -> List[int]:
+        """キューに追加する1チャンク分の形状番号を生成"""
+        raise NotImplementedError
+
+    def _refill(self) -> None:
+        """キューに1チャンク補充"""
+        self._rng_state = None
+        self._queue.extend(self._generate())
+
+    def next(self) -> int:
+        """次の形状番号を取り出す"""
+        if not self._queue:
+            self._refill()
+        return self._queue.popleft()
+
+    def peek(self, count: int) -> List[int]:
+        """取り出さずに先頭 count 個の形状番号を見る"""
+        while len(self._queue) < count:
+            self._refill()
+        return [self._queue[i] for i in range(count)]
+
+    def bag_remaining(self) -> Tuple[int, ...]:
+        """今後の出方を決める、まだ出ていない形状（独立に選ぶ方式では空）"""
+        return ()
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """シードを設定し直してキューを空にする"""
+        self.seed = seed
+        self.rng.seed(seed)
+        self._rng_state = None
+        self._queue.clear()
+
+    def getstate(self) -> Tuple[Any, Tuple[int, ...]]:
+        """乱数状態とキューの内容を取得（乱数状態は補充するまで共有される）"""
+        if self._rng_state is None:
+            self._rng_state = self.rng.getstate()
+        return self._rng_state, tuple(self._queue)
+
+    def setstate(self, state: Tuple[Any, Tuple[int, ...]]) -> None:
+        """getstate で取得した状態に戻す"""
+        rng_state, queue = state
+        if rng_state is not self._rng_state:
+            self.rng.setstate(rng_state)
+            self._rng_state = rng_state
+        self._queue.clear()
+        self._queue.extend(queue)
+
+
+class UniformRandomizer(Randomizer):
+    """毎回独立に一様な形状を選ぶ（従来の random.randint と同じ分布）"""
+
+    name = 'uniform'
+
+    def _generate(self) -> List[int]:
+        randint = self.rng.randint
+        last = self.num_kinds - 1
+        return [randint(0, last) for _ in range(self.chunk_size)]
+
+
+class BagRandomizer(Randomizer):
+    """全形状を1つずつ入れた袋をシャッフルして順に出す（7-bag）"""
+
+    name = 'bag'
+
+    def _generate(self) -> List[int]:
+        pieces: List[int] = []
+        for _ in range(max(1, self.chunk_size // self.num_kinds)):
+            bag = list(range(self.num_kinds))
+            self.rng.shuffle(bag)
+            pieces.extend(bag)
+        return pieces
+
+    def bag_remaining(self) -> Tuple[int, ...]:
+        """いまの袋にまだ残っている形状（キューは袋の残り＋丸ごとの袋でできている）"""
+        queue = self._queue
+        return tuple(queue[i] for i in range(len(queue) % self.num_kinds))
+
+
+RANDOMIZERS: Dict[str, Type[Randomizer]] = {
+    UniformRandomizer.name: UniformRandomizer,
+    BagRandomizer.name: BagRandomizer,
+}
+
+
+def create_randomizer(name: str, num_kinds: int, seed: Optional[int] = None) -> Randomizer:
+    """名前からランダマイザを生成"""
+    try:
+        randomizer_class = RANDOMIZERS[name]
+    except KeyError:
+        raise ValueError(f"未知のランダマイザです: {name}") from None
+    return randomizer_class(num_kinds, seed)
@@ -0,0 +1,383 @@
+"""リプレイ記録モジュール
+
+``GameEngine`` の入力（move_piece / rotate_piece / hard_drop）と ``update`` のティックを
+フックし、シードと入力イベント列だけをコンパクトなバイナリで書き出す。
+
+ファイル構成::
+
+    ヘッダ（固定長, HEADER_FORMAT）
+        マジック, バージョン, フラグ, 盤面サイズ, ランダマイザ, max_catch_up, シード,
+        総ティック数, イベント数, 最終スコア・ライン数・レベル・ピース数,
+        最終局面の state_hash, 本体の CRC32, ヘッダ自身の CRC32
+    本体（イベント列）
+        varint((前のイベントからのティック差 << 3) | コード)
+        コード DT_CODE / ADVANCE_CODE のときだけ続けて varint(値)
+
+コード 0〜4 は ``GameEngine.ACTIONS`` の添字。ティック差は「前のイベントから update が
+何回呼ばれたか」で、update の dt は変わったときだけ DT_CODE で記録する。
+update でピースが固定されるたびに LOCK_CODE も記録し、再生時に食い違いが起きた
+ティックを特定できるようにしている（1ピース1バイト程度）。
+dt が一定なら1ゲーム数百バイトに収まる。
+
+エンコード済みのバイト列はゲームループ側ではバッファに溜めるだけで、ファイルへの
+書き込みと CRC の計算は専用のライタースレッドが行う。ヘッダの最終結果と CRC は
+``close()`` でファイル先頭を書き直して確定する。
+"""
+
+import io
+import queue
+import struct
+import threading
+import zlib
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.randomizer import RANDOMIZERS
+
+MAGIC = b'TRPL'
+VERSION = 3
+# バージョン2以前は update が固定タイムステップになる前の記録なので再生できない
+SUPPORTED_VERSIONS = (3,)
+
+# マジック, バージョン, フラグ, 幅, 高さ, ランダマイザ, max_catch_up, シード, ティック数,
+# イベント数, スコア, ライン数, レベル, ピース数, state_hash, 本体CRC32, ヘッダCRC32
+HEADER_FORMAT = '<4sHHHHBxHQIIQIIIQII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+FLAG_COMPLETE = 1  # close() で最終結果と CRC が書き込まれた
+FLAG_GAME_OVER = 2
+
+DT_CODE = 5
+LOCK_CODE = 6  # 直前の update でピースが固定された（固定1回につき1つ）
+ADVANCE_CODE = 7  # GameEngine.advance(値)
+CODE_BITS = 3
+
+# ランダマイザ名とヘッダに書く番号の対応
+RANDOMIZER_NAMES: Tuple[str, ...] = tuple(RANDOMIZERS)
+
+# ライタースレッドへ渡すバッファの大きさの目安
+FLUSH_BYTES = 4096
+
+
+class ReplayError(ValueError):
+    """リプレイファイルが壊れている・未対応のバージョン"""
+
+
+class ReplayHeader(NamedTuple):
+    """リプレイファイルのヘッダ"""
+
+    version: int
+    flags: int
+    width: int
+    height: int
+    randomizer: str
+    max_catch_up: int
+    seed: int
+    ticks: int
+    events: int
+    score: int
+    lines: int
+    level: int
+    pieces: int
+    state_hash: int
+    body_crc: int
+
+    @property
+    def complete(self) -> bool:
+        """close() まで書き終わったファイルか"""
+        return bool(self.flags & FLAG_COMPLETE)
+
+    @property
+    def game_over(self) -> bool:
+        """記録終了時にゲームオーバーだったか"""
+        return bool(self.flags & FLAG_GAME_OVER)
+
+
+class ReplayEvent(NamedTuple):
+    """デコードした入力イベント"""
+
+    tick: int  # それまでに呼ばれた update の回数
+    code: int  # GameEngine.ACTIONS の添字、DT_CODE、LOCK_CODE、ADVANCE_CODE
+    value: int  # DT_CODE のときの dt、ADVANCE_CODE のときのステップ数（それ以外は 0）
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """符号なし整数を LEB128 で out に追加"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """pos から LEB128 を1つ読み、(値, 次の位置) を返す"""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("イベント列が途中で切れています")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def pack_header(header: ReplayHeader) -> bytes:
+    """ヘッダをバイト列にする（末尾にヘッダ自身の CRC32 を付ける）"""
+    body = struct.pack(HEADER_FORMAT[:-1], MAGIC, header.version, header.flags,
+                       header.width, header.height, RANDOMIZER_NAMES.index(header.randomizer),
+                       header.max_catch_up, header.seed, header.ticks, header.events,
+                       header.score, header.lines, header.level, header.pieces, header.state_hash,
+                       header.body_crc)
+    return body + struct.pack('<I', zlib.crc32(body))
+
+
+def unpack_header(data: bytes) -> ReplayHeader:
+    """バイト列からヘッダを読む（マジック・バージョン・CRC を検証）"""
+    if len(data) < 6 or data[:4] != MAGIC:
+        raise ReplayError("リプレイファイルではありません")
+    version = struct.unpack_from('<H', data, 4)[0]
+    if version not in SUPPORTED_VERSIONS:
+        raise ReplayError(f"未対応のリプレイバージョンです: {version}")
+    if len(data) < HEADER_SIZE:
+        raise ReplayError("ヘッダが短すぎます")
+    fields = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
+    if zlib.crc32(data[:HEADER_SIZE - 4]) != fields[-1]:
+        raise ReplayError("ヘッダのチェックサムが一致しません")
+    try:
+        randomizer = RANDOMIZER_NAMES[fields[5]]
+    except IndexError:
+        raise ReplayError(f"未知のランダマイザ番号です: {fields[5]}") from None
+    return ReplayHeader(fields[1], fields[2], fields[3], fields[4], randomizer, *fields[6:-1])
+
+
+def decode_events(body: bytes) -> Iterator[ReplayEvent]:
+    """本体のバイト列をイベント列にデコード"""
+    tick = 0
+    pos = 0
+    mask = (1 << CODE_BITS) - 1
+    while pos < len(body):
+        word, pos = decode_varint(body, pos)
+        tick += word >> CODE_BITS
+        code = word & mask
+        value = 0
+        if code == DT_CODE or code == ADVANCE_CODE:
+            value, pos = decode_varint(body, pos)
+        yield ReplayEvent(tick, code, value)
+
+
+class Replay(NamedTuple):
+    """読み込んだリプレイ"""
+
+    header: ReplayHeader
+    events: List[ReplayEvent]
+
+
+def parse_replay(data: bytes) -> Replay:
+    """リプレイファイルの中身をヘッダとイベント列に分解（CRC を検証）"""
+    header = unpack_header(data)
+    body = data[HEADER_SIZE:]
+    if not header.complete:
+        raise ReplayError("記録が完了していないリプレイです")
+    if zlib.crc32(body) != header.body_crc:
+        raise ReplayError("イベント列のチェックサムが一致しません")
+    events = list(decode_events(body))
+    if len(events) != header.events:
+        raise ReplayError("イベント数がヘッダと一致しません")
+    return Replay(header, events)
+
+
+def load_replay(path: str) -> Replay:
+    """リプレイファイルを読み込む"""
+    with open(path, 'rb') as f:
+        return parse_replay(f.read())
+
+
+class _WriterThread(threading.Thread):
+    """キューから受け取ったバイト列をファイルに書き、CRC を計算するスレッド"""
+
+    def __init__(self, stream: BinaryIO):
+        super().__init__(name='replay-writer', daemon=True)
+        self.stream = stream
+        self.queue: 'queue.Queue[Optional[bytes]]' = queue.Queue()
+        self.crc = 0
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                self.stream.write(chunk)
+                self.crc = zlib.crc32(chunk, self.crc)
+            except OSError as exc:
+                self.error = exc
+
+
+class ReplayRecorder:
+    """GameEngine の入力をフックしてリプレイファイルへ書き出す
+
+    記録開始時にエンジンのシードでゲームをやり直すので、ファイルにはシードと
+    入力だけを残せば同じゲームを再現できる。path の代わりにシーク可能なバイナリ
+    ストリーム（io.BytesIO など）を渡すと現在位置から書き、close() しても閉じない。
+    """
+
+    def __init__(self, engine: GameEngine, path: Union[str, BinaryIO]):
+        self.engine = engine
+        self.path = path
+        self.ticks = 0
+        self.events = 0
+        self.closed = False
+        self._last_tick = 0
+        self._dt: Optional[int] = None
+        self._in_update = False
+        self._buffer = bytearray()
+
+        engine.reset_game(engine.seed)
+        self._owns_stream = isinstance(path, str)
+        self._stream: BinaryIO = open(path, 'wb') if isinstance(path, str) else path
+        self._start = self._stream.tell()
+        # ヘッダは close() で確定するので、まず同じ大きさの仮ヘッダを書いておく
+        self._stream.write(pack_header(self._header(0, 0)))
+        self._writer = _WriterThread(self._stream)
+        self._writer.start()
+        self._hook()
+
+    def _header(self, flags: int, body_crc: int) -> ReplayHeader:
+        """現在の状態からヘッダを作る"""
+        engine = self.engine
+        return ReplayHeader(
+            version=VERSION, flags=flags, width=engine.grid_width, height=engine.grid_height,
+            randomizer=engine.randomizer.name, max_catch_up=engine.max_catch_up,
+            seed=engine.seed, ticks=self.ticks,
+            events=self.events, score=engine.score, lines=engine.lines_cleared,
+            level=engine.level, pieces=engine.pieces_placed, state_hash=engine.state_hash,
+            body_crc=body_crc,
+        )
+
+    def _hook(self) -> None:
+        """エンジンのメソッドをインスタンス属性で包む（apply_action 経由の入力も記録される）"""
+        engine = self.engine
+        move_piece = engine.move_piece
+        rotate_piece = engine.rotate_piece
+        hard_drop = engine.hard_drop
+        update = engine.update
+        advance = engine.advance
+        left, right, down, rotate, drop = range(len(GameEngine.ACTIONS))
+
+        moves = {(-1, 0): left, (1, 0): right, (0, 1): down}
+
+        def recorded_move_piece(dx: int, dy: int) -> bool:
+            if self._in_update:
+                return move_piece(dx, dy)
+            try:
+                code = moves[dx, dy]
+            except KeyError:
+                raise ValueError(f"リプレイに記録できない移動です: ({dx}, {dy})") from None
+            moved = move_piece(dx, dy)
+            if moved:
+                self._emit(code)
+            return moved
+
+        def recorded_rotate_piece() -> bool:
+            rotated = rotate_piece()
+            if rotated:
+                self._emit(rotate)
+            return rotated
+
+        def recorded_hard_drop() -> None:
+            hard_drop()
+            self._emit(drop)
+
+        def recorded_update(dt: int) -> int:
+            if dt != self._dt:
+                self._dt = dt
+                self._emit(DT_CODE, dt)
+            placed = engine.pieces_placed
+            self._in_update = True
+            try:
+                steps = update(dt)
+            finally:
+                self._in_update = False
+            for _ in range(engine.pieces_placed - placed):
+                self._emit(LOCK_CODE)
+            self.ticks += 1
+            return steps
+
+        def recorded_advance(ticks: int) -> int:
+            self._emit(ADVANCE_CODE, ticks)
+            self._in_update = True
+            try:
+                return advance(ticks)
+            finally:
+                self._in_update = False
+
+        def recorded_run_frames(n: int, inputs: Any = None) -> int:
+            raise ValueError("フレームモード（run_frames）はリプレイに記録できません")
+
+        # インスタンス属性はクラスのメソッドより優先される（_unhook で取り除く）
+        hooks: Dict[str, Callable[..., Any]] = {
+            'move_piece': recorded_move_piece,
+            'rotate_piece': recorded_rotate_piece,
+            'hard_drop': recorded_hard_drop,
+            'update': recorded_update,
+            'advance': recorded_advance,
+            'run_frames': recorded_run_frames,
+        }
+        vars(engine).update(hooks)
+
+    def _unhook(self) -> None:
+        """フックを外してクラスのメソッドに戻す"""
+        for name in ('move_piece', 'rotate_piece', 'hard_drop', 'update', 'advance', 'run_frames'):
+            vars(self.engine).pop(name, None)
+
+    def _emit(self, code: int, value: int = 0) -> None:
+        """イベントを1つエンコードしてバッファに追加"""
+        buffer = self._buffer
+        encode_varint((self.ticks - self._last_tick) << CODE_BITS | code, buffer)
+        if code == DT_CODE or code == ADVANCE_CODE:
+            encode_varint(value, buffer)
+        self._last_tick = self.ticks
+        self.events += 1
+        if len(buffer) >= FLUSH_BYTES:
+            self._flush()
+
+    def _flush(self) -> None:
+        """溜まったバイト列をライタースレッドへ渡す"""
+        if self._buffer:
+            self._writer.queue.put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def close(self) -> ReplayHeader:
+        """記録を終了し、ヘッダに最終結果とチェックサムを書き込んで返す"""
+        if self.closed:
+            raise ValueError("リプレイは既に閉じられています")
+        self.closed = True
+        self._unhook()
+        self._flush()
+        self._writer.queue.put(None)
+        self._writer.join()
+        try:
+            if self._writer.error is not None:
+                raise self._writer.error
+            flags = FLAG_COMPLETE | (FLAG_GAME_OVER if self.engine.game_over else 0)
+            header = self._header(flags, self._writer.crc)
+            self._stream.seek(self._start)
+            self._stream.write(pack_header(header))
+            self._stream.seek(0, io.SEEK_END)
+        finally:
+            if self._owns_stream:
+                self._stream.close()
+        return header
+
+    def __enter__(self) -> 'ReplayRecorder':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self.closed:
+            self.close()
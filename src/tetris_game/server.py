@@ -0,0 +1,331 @@
+"""asyncio ゲームサーバーモジュール
+
+1つのイベントループで多数のリモートプレイヤーのセッションを扱う。ゲームごとのタスクは
+作らず、共有のティックタイマーが全セッションの ``GameEngine`` をまとめて進める。
+
+- クライアント → サーバー: 1入力1バイト（``GameEngine.ACTIONS`` の添字）
+- サーバー → クライアント: ``<HH`` の（長さ, 適用済みの入力数の下位16ビット）＋
+  ``DeltaEncoder`` のフレーム。クライアントは入力数で、どの入力までが反映されたフレームかを知る
+
+局面が変わったティックと入力を受け取ったティックだけフレームを送り、1セッションあたり
+1ティック1回の write にまとめる。送信バッファが溜まった遅いクライアントにはそのティックの送信を
+見送り、追いついたら次のキーフレームで同期させる（バッファが上限を超えたら切断する）。
+
+入力も同じように抑える。1ティックに適用するのは ``max_inputs_per_tick`` 個までで、残りは次の
+ティックに回す。未適用の入力が ``input_high_water`` を超えたら受信を止め、減ったら再開する。
+
+    python -m tetris_game.server --port 7777
+"""
+
+import argparse
+import asyncio
+import struct
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from tetris_game.delta import DEFAULT_KEYFRAME_INTERVAL, DeltaEncoder
+from tetris_game.game_engine import GameEngine
+from tetris_game.grid import GRID_BACKENDS
+from tetris_game.randomizer import RANDOMIZERS
+
+# フレームの長さ, 適用済みの入力数（下位16ビット）
+FRAME_HEADER = struct.Struct('<HH')
+ACK_MASK = 0xFFFF
+DEFAULT_TICK_MS = 16
+# これ以上送信バッファが溜まったセッションにはフレームを送らない
+DEFAULT_HIGH_WATER = 16 * 1024
+# これ以上溜まったら切断する
+DEFAULT_MAX_BUFFER = 256 * 1024
+# 1ティックに1セッションへ適用する入力の上限
+DEFAULT_MAX_INPUTS_PER_TICK = 16
+# 未適用の入力がこれを超えたら受信を止める
+DEFAULT_INPUT_HIGH_WATER = 256
+# この数のティック以上遅れたら、遅れを取り戻さずに予定を今に合わせる
+MAX_LAG_TICKS = 4
+STATS_WINDOW = 10_000
+
+
+def percentiles(samples: Sequence[float],
+                points: Sequence[float] = (50, 90, 99)) -> Dict[str, float]:
+    """サンプルの百分位点と最大値（{'p50': ..., 'max': ...}）"""
+    if not samples:
+        return {**{f'p{point:g}': 0.0 for point in points}, 'max': 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    result = {f'p{point:g}': ordered[min(last, int(round(point / 100 * last)))] for point in points}
+    result['max'] = ordered[last]
+    return result
+
+
+class TickStats(NamedTuple):
+    """直近のティックの統計（ミリ秒）"""
+
+    ticks: int
+    sessions: int
+    duration: Dict[str, float]  # tick() の処理時間
+    lateness: Dict[str, float]  # 予定時刻からの開始の遅れ
+    frames_sent: int
+    frames_skipped: int
+    disconnected: int
+
+
+class Session(asyncio.Protocol):
+    """1クライアント分の接続とゲーム（入力は受信時に溜め、ティックでまとめて適用）"""
+
+    def __init__(self, server: 'GameServer'):
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self.engine = server.new_engine()
+        self.encoder = DeltaEncoder(server.keyframe_interval)
+        self.inputs = bytearray()
+        self.applied = 0
+        self.paused = False
+        self.reading_paused = False
+        self.closed = False
+        # 前回のフレームから局面が変わった（または入力に応答していない）か
+        self._dirty = True
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+        self.server.sessions.append(self)
+
+    def data_received(self, data: bytes) -> None:
+        self.inputs += data
+        if not self.reading_paused and len(self.inputs) > self.server.input_high_water:
+            # 入力を送りすぎるクライアントは適用が追いつくまで読まない
+            assert self.transport is not None
+            self.transport.pause_reading()
+            self.reading_paused = True
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed = True
+
+    def pause_writing(self) -> None:
+        self.paused = True
+
+    def resume_writing(self) -> None:
+        self.paused = False
+
+    def tick(self, dt: int) -> bool:
+        """入力を適用して dt ミリ秒進め、局面が変わったか入力があればフレームを書く（送ったら True）
+
+        入力があったティックは局面が変わらなくても（空の差分フレームで）応答する。
+        適用する入力は max_inputs_per_tick 個までで、残りは次のティックに回す。
+        """
+        engine = self.engine
+        transport = self.transport
+        assert transport is not None
+        inputs = self.inputs
+        received = bool(inputs)
+        if received:
+            actions = GameEngine.ACTIONS
+            count = min(len(inputs), self.server.max_inputs_per_tick)
+            for code in inputs[:count]:
+                if code >= len(actions):
+                    self.close()
+                    return False
+                engine.apply_action(actions[code])
+            del inputs[:count]
+            self.applied += count
+            if self.reading_paused and len(inputs) <= self.server.input_high_water // 2:
+                transport.resume_reading()
+                self.reading_paused = False
+        # 重力ステップがあれば必ず局面が変わるので、局面を比べなくてよい
+        if engine.update(dt) or received:
+            self._dirty = True
+        if not self._dirty:
+            return False
+        buffered = transport.get_write_buffer_size()
+        if buffered > self.server.max_buffer:
+            self.close()
+            return False
+        if self.paused or buffered > self.server.high_water:
+            # 遅いクライアントには送らず、追いついたらキーフレームから送り直す
+            self.server.frames_skipped += 1
+            self.encoder.request_keyframe()
+            return False
+        frame = self.encoder.encode(engine.state_snapshot())
+        transport.write(FRAME_HEADER.pack(len(frame), self.applied & ACK_MASK) + frame)
+        self._dirty = False
+        if engine.game_over:
+            self.close()
+        return True
+
+    def close(self) -> None:
+        """送信済みのデータを流してから切断"""
+        self.closed = True
+        if self.transport is not None:
+            self.transport.close()
+
+
+class GameServer:
+    """共有ティックタイマーで全セッションを進める TCP ゲームサーバー"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, tick_ms: int = DEFAULT_TICK_MS,
+                 backend: str = 'list', randomizer: str = 'uniform',
+                 keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 high_water: int = DEFAULT_HIGH_WATER, max_buffer: int = DEFAULT_MAX_BUFFER,
+                 max_inputs_per_tick: int = DEFAULT_MAX_INPUTS_PER_TICK,
+                 input_high_water: int = DEFAULT_INPUT_HIGH_WATER):
+        if tick_ms < 1:
+            raise ValueError("tick_ms は1以上を指定してください")
+        if max_inputs_per_tick < 1:
+            raise ValueError("max_inputs_per_tick は1以上を指定してください")
+        self.host = host
+        self.port = port
+        self.tick_ms = tick_ms
+        self.backend = backend
+        self.randomizer = randomizer
+        self.keyframe_interval = keyframe_interval
+        self.high_water = high_water
+        self.max_buffer = max_buffer
+        self.max_inputs_per_tick = max_inputs_per_tick
+        self.input_high_water = input_high_water
+        self.sessions: List[Session] = []
+        self.ticks = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.disconnected = 0
+        self._durations: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self._lateness: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self._server: Optional[asyncio.Server] = None
+        self._ticker: Optional['asyncio.Task[None]'] = None
+
+    def new_engine(self) -> GameEngine:
+        """新しいセッション用のエンジン（シードはランダム）"""
+        return GameEngine(backend=self.backend, randomizer=self.randomizer)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """待ち受け中の (ホスト, ポート)（port=0 なら割り当てられたポート）"""
+        if self._server is None:
+            return self.host, self.port
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return host, port
+
+    async def start(self) -> None:
+        """待ち受けとティックタイマーを開始"""
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: Session(self), self.host, self.port,
+                                                backlog=4096)
+        self._ticker = loop.create_task(self._run_ticks())
+
+    async def close(self) -> None:
+        """ティックを止め、全セッションを切断"""
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for session in self.sessions:
+            session.close()
+        self.sessions = []
+
+    async def serve_forever(self) -> None:
+        """start() して止められるまで動かす"""
+        await self.start()
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await self.close()
+
+    def tick(self, dt: int) -> None:
+        """全セッションを dt ミリ秒進め、切断されたセッションを外す"""
+        sent = 0
+        alive = []
+        for session in self.sessions:
+            if not session.closed and session.tick(dt):
+                sent += 1
+            if session.closed:
+                self.disconnected += 1
+            else:
+                alive.append(session)
+        self.sessions = alive
+        self.frames_sent += sent
+        self.ticks += 1
+
+    async def _run_ticks(self) -> None:
+        """共有ティックタイマー（実際の経過時間をミリ秒に直して update に渡す）"""
+        loop = asyncio.get_running_loop()
+        interval = self.tick_ms / 1000
+        scheduled = last = loop.time()
+        carry = 0.0
+        while True:
+            scheduled += interval
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                if -delay > interval * MAX_LAG_TICKS:
+                    scheduled = loop.time()
+                # 遅れていても受信・送信の処理を挟む
+                await asyncio.sleep(0)
+            now = loop.time()
+            self._lateness.append((now - scheduled) * 1000)
+            carry += (now - last) * 1000
+            last = now
+            dt = int(carry)
+            carry -= dt
+            started = time.perf_counter()
+            self.tick(dt)
+            self._durations.append((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> TickStats:
+        """直近 STATS_WINDOW ティックの統計"""
+        return TickStats(self.ticks, len(self.sessions), percentiles(self._durations),
+                         percentiles(self._lateness), self.frames_sent, self.frames_skipped,
+                         self.disconnected)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='python -m tetris_game.server',
+                                     description="テトリスの TCP ゲームサーバー")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--tick-ms', type=int, default=DEFAULT_TICK_MS, help="ティック間隔（ミリ秒）")
+    parser.add_argument('--backend', default='list', choices=tuple(GRID_BACKENDS),
+                        help="グリッドバックエンド")
+    parser.add_argument('--randomizer', default='uniform', choices=tuple(RANDOMIZERS),
+                        help="ピース生成方式")
+    parser.add_argument('--stats-every', type=float, default=5.0, help="統計を表示する間隔（秒、0で表示しない）")
+    return parser.parse_args(argv)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """サーバーを動かし、定期的に統計を標準エラーへ出す"""
+    server = GameServer(args.host, args.port, args.tick_ms, args.backend, args.randomizer)
+    await server.start()
+    host, port = server.address
+    print(f"listening on {host}:{port}", file=sys.stderr)
+    try:
+        while True:
+            await asyncio.sleep(args.stats_every or 3600)
+            if args.stats_every:
+                stats = server.stats()
+                print(f"sessions={stats.sessions} ticks={stats.ticks} "
+                      f"tick_ms p50={stats.duration['p50']:.2f} p99={stats.duration['p99']:.2f} "
+                      f"late_ms p99={stats.lateness['p99']:.2f} skipped={stats.frames_skipped}",
+                      file=sys.stderr)
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """python -m tetris_game.server のエントリーポイント"""
+    args = parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
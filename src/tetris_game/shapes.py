@@ -0,0 +1,53 @@
+"""テトリミノ形状のコンパイルモジュール
+
+``GameEngine.TETRIS_SHAPES`` の 5x5 文字列表現を、クラス定義時に一度だけ
+占有セルのオフセット・行ビットマスク・バウンディングボックス・列ごとの底面へ変換する。
+"""
+
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+
+class Rotation(NamedTuple):
+    """コンパイル済みの回転形状"""
+
+    cells: Tuple[Tuple[int, int], ...]  # 占有セルの (dx, dy)
+    row_masks: Tuple[Tuple[int, int], ...]  # (dy, ビットマスク)。ビット dx が列 dx
+    bbox: Tuple[int, int, int, int]  # (min_dx, min_dy, max_dx, max_dy)
+    bottom_profile: Tuple[Tuple[int, int], ...]  # 列ごとの最下段セル (dx, max_dy)
+
+
+CompiledShape = Tuple[Rotation, ...]
+
+
+def compile_rotation(matrix: Sequence[str]) -> Rotation:
+    """1回転分の文字列行列をコンパイル"""
+    cells = tuple(
+        (dx, dy)
+        for dy, row in enumerate(matrix)
+        for dx, cell in enumerate(row)
+        if cell == '#'
+    )
+    if not cells:
+        raise ValueError("形状に占有セルがありません")
+
+    masks: Dict[int, int] = {}
+    for dx, dy in cells:
+        masks[dy] = masks.get(dy, 0) | (1 << dx)
+
+    bottoms: Dict[int, int] = {}
+    for dx, dy in cells:
+        bottoms[dx] = max(bottoms.get(dx, dy), dy)
+
+    xs = [dx for dx, _ in cells]
+    ys = [dy for _, dy in cells]
+    return Rotation(
+        cells=cells,
+        row_masks=tuple(sorted(masks.items())),
+        bbox=(min(xs), min(ys), max(xs), max(ys)),
+        bottom_profile=tuple(sorted(bottoms.items())),
+    )
+
+
+def compile_shapes(shapes: Sequence[Sequence[Sequence[str]]]) -> Tuple[CompiledShape, ...]:
+    """全形状の全回転をコンパイル"""
+    return tuple(tuple(compile_rotation(matrix) for matrix in rotations) for rotations in shapes)
@@ -0,0 +1,298 @@
+"""並列自己対戦シミュレーションモジュール
+
+シードごとに1ゲームをヘッドレスで実行し、``ProcessPoolExecutor`` で全コアに分散する。
+結果は終わったチャンクから順に返すので、100万ゲーム規模でも結果を溜め込まない。
+
+- シードはチャンク単位で投入し、投入済みで未完了のチャンク数に上限を設ける
+- ワーカープロセスはスイープ全体で使い回す
+- 各ワーカーはエンジンを1つ持ち、``reset_game(seed)`` で再利用する
+  （``recycle_every`` ゲームごとに作り直す）
+- ジェネレータを途中で閉じると未着手のチャンクを取り消し、ワーカーを終了させる
+- ``board_ring`` を指定すると各ワーカーが自分のスロットへ ``publish_every`` ティックごとに
+  盤面を書くので、別プロセスのビューアーから実行中の盤面を覗ける（``board_ring`` モジュール）
+- ``archive`` を指定すると各ゲームをリプレイとして記録し、チャンクごとに1回ロックを取って
+  リプレイアーカイブへまとめて追記する（``archive`` モジュール）。結果には ``game_id`` が付く
+
+    python -m tetris_game.sim --games 1000000 --workers 8 --json
+"""
+
+import argparse
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Generator, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from tetris_game.archive import ReplayArchive
+from tetris_game.board_ring import BoardRing
+from tetris_game.game_engine import GameEngine
+from tetris_game.grid import GRID_BACKENDS
+from tetris_game.headless import (DEFAULT_DT, DEFAULT_MAX_TICKS, POLICIES, Policy, make_policy,
+                                  run_game)
+from tetris_game.randomizer import RANDOMIZERS
+from tetris_game.replay import ReplayRecorder
+from tetris_game.stats import StatsStore
+
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_RECYCLE_EVERY = 1000
+DEFAULT_PUBLISH_EVERY = 30
+
+
+class SimConfig(NamedTuple):
+    """全ゲーム共通の設定（ワーカー初期化時に1回だけ渡す）"""
+
+    width: int = 10
+    height: int = 20
+    backend: str = 'list'
+    randomizer: str = 'uniform'
+    policy: str = 'random'
+    dt: int = DEFAULT_DT
+    max_ticks: int = DEFAULT_MAX_TICKS
+    recycle_every: int = DEFAULT_RECYCLE_EVERY  # エンジンを作り直すまでのゲーム数
+    board_ring: Optional[str] = None  # 盤面を書く共有メモリの名前
+    publish_every: int = DEFAULT_PUBLISH_EVERY  # 盤面を書くティック間隔
+    archive: Optional[str] = None  # リプレイを追記するアーカイブのパス
+
+
+class _EnginePool:
+    """プロセス内で1つのエンジンを使い回す"""
+
+    def __init__(self, config: SimConfig, slot: int = 0):
+        self.config = config
+        self.engine: Optional[GameEngine] = None
+        self.games = 0
+        self.ring: Optional[BoardRing] = None
+        self.slot = slot
+        if config.board_ring is not None:
+            self.ring = BoardRing.attach(config.board_ring)
+            self.slot = slot % self.ring.slots
+        self.archive: Optional[ReplayArchive] = None
+        if config.archive is not None:
+            self.archive = ReplayArchive(config.archive)
+
+    def engine_for(self, seed: int) -> GameEngine:
+        """seed のゲームを始めた状態のエンジンを返す"""
+        config = self.config
+        if self.engine is None or self.games >= config.recycle_every:
+            self.engine = GameEngine(config.width, config.height, backend=config.backend,
+                                     seed=seed, randomizer=config.randomizer)
+            self.games = 0
+        else:
+            self.engine.reset_game(seed)
+        self.games += 1
+        return self.engine
+
+    def play(self, seed: int) -> Dict[str, Any]:
+        """seed のゲームを1つ実行して結果を返す"""
+        engine = self.engine_for(seed)
+        return dict(self._run(engine, make_policy(self.config.policy, seed)), seed=seed)
+
+    def play_chunk(self, seeds: Sequence[int]) -> List[Dict[str, Any]]:
+        """seeds のゲームを順に実行し、アーカイブがあればリプレイをまとめて追記する"""
+        if self.archive is None:
+            return [self.play(seed) for seed in seeds]
+        results = []
+        replays = []
+        for seed in seeds:
+            stream = io.BytesIO()
+            engine = self.engine_for(seed)
+            recorder = ReplayRecorder(engine, stream)
+            result = self._run(engine, make_policy(self.config.policy, seed))
+            results.append(dict(result, seed=seed))
+            recorder.close()
+            replays.append(stream.getvalue())
+        with self.archive.writer() as writer:
+            for result, data in zip(results, replays):
+                result['game_id'] = writer.append(data)
+        return results
+
+    def _run(self, engine: GameEngine, policy: Policy) -> Dict[str, Any]:
+        """始めたゲームを最後まで進める（盤面リングがあれば盤面を書く）"""
+        config = self.config
+        if self.ring is not None:
+            policy = self._publishing(policy)
+        result = run_game(engine, policy=policy, dt=config.dt, max_ticks=config.max_ticks)
+        if self.ring is not None:
+            self.ring.publish(engine, self.slot)
+        return result
+
+    def _publishing(self, policy: Policy) -> Policy:
+        """publish_every ティックごとに盤面を共有メモリへ書くようにポリシーを包む"""
+        ring = self.ring
+        slot = self.slot
+        every = self.config.publish_every
+        ticks = 0
+
+        def publishing_policy(engine: GameEngine) -> Optional[str]:
+            nonlocal ticks
+            if ticks % every == 0:
+                ring.publish(engine, slot)  # type: ignore[union-attr]
+            ticks += 1
+            return policy(engine)
+
+        return publishing_policy
+
+    def close(self) -> None:
+        """共有メモリの対応付けとアーカイブを閉じる"""
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+
+# ワーカープロセスごとのエンジン（_init_worker で作る）
+_worker_pool: Optional[_EnginePool] = None
+
+
+def _init_worker(config: SimConfig, worker_counter: Any) -> None:
+    """ワーカープロセスの初期化（Ctrl+C は親プロセスだけが受け取る）
+
+    盤面リングのスロットはワーカーの起動順に割り当てる。
+    """
+    global _worker_pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with worker_counter.get_lock():
+        slot = worker_counter.value
+        worker_counter.value += 1
+    _worker_pool = _EnginePool(config, slot)
+
+
+def _run_chunk(seeds: Sequence[int]) -> List[Dict[str, Any]]:
+    """ワーカーで1チャンク分のゲームを実行"""
+    assert _worker_pool is not None
+    return _worker_pool.play_chunk(seeds)
+
+
+def run_games(seeds: Iterable[int], config: Optional[SimConfig] = None,
+              workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              max_pending: Optional[int] = None) -> Generator[Dict[str, Any], None, None]:
+    """seeds の各ゲームを並列に実行し、終わった順に結果を返す
+
+    workers を省略すると CPU 数、0 を指定するとこのプロセス内で順に実行する。
+    未完了のチャンクは max_pending（省略時は workers の4倍）までしか投入しない。
+    """
+    if config is None:
+        config = SimConfig()
+    if chunk_size < 1:
+        raise ValueError("chunk_size は1以上を指定してください")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    seed_iter = iter(seeds)
+    if workers == 0:
+        pool = _EnginePool(config)
+        try:
+            while True:
+                chunk = list(itertools.islice(seed_iter, chunk_size))
+                if not chunk:
+                    break
+                yield from pool.play_chunk(chunk)
+        finally:
+            pool.close()
+        return
+
+    limit = max_pending or workers * 4
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                   initargs=(config, multiprocessing.Value('i', 0)))
+    pending: Set[Future] = set()
+    try:
+        while True:
+            while len(pending) < limit:
+                chunk = list(itertools.islice(seed_iter, chunk_size))
+                if not chunk:
+                    break
+                pending.add(executor.submit(_run_chunk, chunk))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        # 途中で閉じられた場合は未着手のチャンクを捨て、実行中のチャンクだけ待つ
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='python -m tetris_game.sim',
+                                     description="ヘッドレスのゲームを全コアで並列実行")
+    parser.add_argument('--games', type=int, default=100, help="実行するゲーム数")
+    parser.add_argument('--seed', type=int, default=0, help="最初のゲームのシード（以降+1ずつ）")
+    parser.add_argument('--workers', type=int, default=None, help="ワーカープロセス数（省略時はCPU数）")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="1回に投入するゲーム数")
+    parser.add_argument('--recycle-every', type=int, default=DEFAULT_RECYCLE_EVERY,
+                        help="ワーカーのエンジンを作り直すまでのゲーム数")
+    parser.add_argument('--policy', choices=POLICIES, default='random', help="入力ポリシー")
+    parser.add_argument('--dt', type=int, default=DEFAULT_DT, help="1ティックのミリ秒")
+    parser.add_argument('--max-ticks', type=int, default=DEFAULT_MAX_TICKS, help="1ゲームの最大ティック数")
+    parser.add_argument('--width', type=int, default=10)
+    parser.add_argument('--height', type=int, default=20)
+    parser.add_argument('--backend', default='list', choices=tuple(GRID_BACKENDS),
+                        help="グリッドバックエンド")
+    parser.add_argument('--randomizer', default='uniform', choices=tuple(RANDOMIZERS),
+                        help="ピース生成方式")
+    parser.add_argument('--publish-boards', action='store_true',
+                        help="ワーカーの盤面を共有メモリに書く（名前は標準エラーに表示）")
+    parser.add_argument('--publish-every', type=int, default=DEFAULT_PUBLISH_EVERY,
+                        help="盤面を書くティック間隔")
+    parser.add_argument('--archive', help="各ゲームのリプレイを追記するリプレイアーカイブ")
+    parser.add_argument('--stats', metavar='DB', help="結果を記録する統計データベース（stats モジュール）")
+    parser.add_argument('--json', action='store_true', help="結果をJSON Linesで出力")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """python -m tetris_game.sim のエントリーポイント"""
+    args = parse_args(argv)
+    ring = None
+    if args.publish_boards:
+        ring = BoardRing.create(args.workers or os.cpu_count() or 1, args.width, args.height)
+        print(f"boards: python -m tetris_game.board_ring {ring.name} --slot 0", file=sys.stderr)
+    config = SimConfig(args.width, args.height, args.backend, args.randomizer, args.policy,
+                       args.dt, args.max_ticks, args.recycle_every,
+                       ring.name if ring is not None else None, args.publish_every, args.archive)
+    seeds = range(args.seed, args.seed + args.games)
+    store = StatsStore(args.stats) if args.stats else None
+
+    finished = 0
+    status = 0
+    started = time.perf_counter()
+    results = run_games(seeds, config, workers=args.workers, chunk_size=args.chunk_size)
+    try:
+        for result in results:
+            finished += 1
+            if store is not None:
+                store.record(result['score'], result['lines'], result['level'], result['pieces'],
+                             result['ticks'] * args.dt, seed=result['seed'], source='sim')
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"seed={result['seed']} score={result['score']} lines={result['lines']} "
+                      f"level={result['level']} pieces={result['pieces']} "
+                      f"duration={result['duration']:.3f}s")
+    except KeyboardInterrupt:
+        status = 130
+    finally:
+        results.close()
+        if ring is not None:
+            ring.close()
+        if store is not None:
+            store.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{finished}/{args.games} games in {elapsed:.2f}s "
+          f"({finished / elapsed if elapsed else 0:.0f} games/s)", file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
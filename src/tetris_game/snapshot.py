@@ -0,0 +1,114 @@
+"""エンジン状態スナップショットモジュール"""
+
+import struct
+from typing import Any, NamedTuple, Tuple
+
+from tetris_game.grid import GridState
+
+# (形状番号, 回転, x, y)
+PieceState = Tuple[int, int, int, int]
+
+
+class EngineSnapshot(NamedTuple):
+    """``GameEngine.snapshot()`` が返す不変な状態
+
+    盤面は行ごとの bytes（1セル1バイトの色）のタプルで持つ。変更されていない行や
+    乱数状態は直前のスナップショットと同じオブジェクトを共有する。
+    """
+
+    grid: GridState
+    current_piece: PieceState
+    next_piece: PieceState
+    score: int
+    lines_cleared: int
+    level: int
+    fall_time: int
+    fall_speed: int
+    game_over: bool
+    pieces_placed: int
+    randomizer_state: Any
+    fall_frames: int = 0
+
+
+# to_bytes() の先頭に付けるヘッダ
+# マジック, バージョン, 幅, 高さ, フラグ, 操作中ピース(形状, 回転, x, y), 次ピース(同),
+# スコア, ライン数, レベル, ピース数
+STATE_MAGIC = b'TS'
+STATE_VERSION = 1
+STATE_HEADER_FORMAT = '<2sBBBBBBhhBBhhQIII'
+STATE_HEADER_SIZE = struct.calcsize(STATE_HEADER_FORMAT)
+STATE_FLAG_GAME_OVER = 1
+
+# 1バイト → 上位・下位ニブルの2セル
+_NIBBLE_PAIRS = [bytes((byte >> 4, byte & 0x0F)) for byte in range(256)]
+
+
+def pack_nibbles(cells: bytes) -> bytes:
+    """1セル1バイトの色（0〜15）を1バイト2セルに詰める（奇数個なら末尾を0で埋める）"""
+    if cells and max(cells) > 0x0F:
+        raise ValueError("4bit に収まらない色があります")
+    if len(cells) % 2:
+        cells += b'\x00'
+    return bytes(high << 4 | low for high, low in zip(cells[0::2], cells[1::2]))
+
+
+def unpack_nibbles(packed: bytes, count: int) -> bytes:
+    """pack_nibbles の逆（先頭 count セルを返す）"""
+    return b''.join(map(_NIBBLE_PAIRS.__getitem__, packed))[:count]
+
+
+class GameStateSnapshot(NamedTuple):
+    """``GameEngine.state_snapshot()`` が返す観測用の不変な状態
+
+    描画・ネットワーク配信・リプレイ用ツールがコピーなしで共有できるよう、盤面は
+    行優先・1セル1バイトの bytes で持つ。``to_bytes()`` は盤面を4bitに詰めた
+    コンパクトな表現で、``from_bytes()`` で元に戻せる。
+    """
+
+    width: int
+    height: int
+    cells: bytes  # 行優先、1セル1バイトの色
+    current_piece: PieceState
+    next_piece: PieceState
+    score: int
+    lines_cleared: int
+    level: int
+    pieces_placed: int
+    game_over: bool
+
+    @property
+    def grid_view(self) -> memoryview:
+        """盤面の (高さ, 幅) の読み取り専用 memoryview（コピーなし、view[y, x] で参照）"""
+        return memoryview(self.cells).cast('B', (self.height, self.width))
+
+    def cell(self, x: int, y: int) -> int:
+        """(x, y) の色（0 は空き）"""
+        return self.cells[y * self.width + x]
+
+    def to_bytes(self) -> bytes:
+        """固定長ヘッダ＋4bitに詰めた盤面のバイト列にする"""
+        header = struct.pack(
+            STATE_HEADER_FORMAT, STATE_MAGIC, STATE_VERSION, self.width, self.height,
+            STATE_FLAG_GAME_OVER if self.game_over else 0,
+            *self.current_piece, *self.next_piece,
+            self.score, self.lines_cleared, self.level, self.pieces_placed)
+        return header + pack_nibbles(self.cells)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GameStateSnapshot':
+        """to_bytes() の結果から復元（形式が合わなければ ValueError）"""
+        if len(data) < STATE_HEADER_SIZE:
+            raise ValueError("状態データが短すぎます")
+        fields = struct.unpack_from(STATE_HEADER_FORMAT, data)
+        magic, version, width, height, flags = fields[:5]
+        if magic != STATE_MAGIC:
+            raise ValueError("状態データではありません")
+        if version != STATE_VERSION:
+            raise ValueError(f"未対応の状態データのバージョンです: {version}")
+        count = width * height
+        packed = data[STATE_HEADER_SIZE:]
+        if len(packed) != (count + 1) // 2:
+            raise ValueError("盤面の長さが一致しません")
+        score, lines_cleared, level, pieces_placed = fields[13:]
+        return cls(width, height, unpack_nibbles(packed, count), fields[5:9], fields[9:13],
+                   score, lines_cleared, level, pieces_placed, bool(flags & STATE_FLAG_GAME_OVER))
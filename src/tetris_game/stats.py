@@ -0,0 +1,339 @@
+"""プレイ統計ストアモジュール
+
+ゲーム結果を SQLite（WAL モード）に保存し、ランキングと日別の集計を返す。
+
+- ``record()`` はキューに積むだけで戻るので、ゲームループやシミュレーションを止めない
+- 書き込みはバックグラウンドのスレッドが ``batch_size`` 件（または ``flush_interval`` 秒）ごとに
+  1トランザクションの ``executemany`` でまとめて行う
+- 日別の集計表（daily）を同じトランザクションで更新するので、累計は日数分の行を足すだけで済む
+- スコア上位は (score DESC, id) の索引、日別は day の主キーで引く
+
+    python -m tetris_game.stats --top 10 --days 7
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_STATS_PATH = os.path.join(os.path.expanduser('~'), '.tetris_game', 'stats.db')
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.5
+# flush() で書き込みスレッドの生存を確かめる間隔（秒）
+FLUSH_POLL_INTERVAL = 0.1
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,
+    seed INTEGER,
+    score INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    pieces INTEGER NOT NULL,
+    play_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_score ON games (score DESC, id);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    plays INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    play_ms INTEGER NOT NULL,
+    lines INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+INSERT_GAME = ("INSERT INTO games "
+               "(played_at, day, source, seed, score, lines, level, pieces, play_ms) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+UPSERT_DAILY = ("INSERT INTO daily (day, plays, best_score, play_ms, lines) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day) DO UPDATE SET plays = plays + excluded.plays, "
+                "best_score = MAX(best_score, excluded.best_score), "
+                "play_ms = play_ms + excluded.play_ms, lines = lines + excluded.lines")
+
+
+class GameRecord(NamedTuple):
+    """1ゲームの結果"""
+
+    played_at: float  # 終了時刻（UNIX 時間）
+    source: str  # 'game' / 'sim' など
+    seed: Optional[int]
+    score: int
+    lines: int
+    level: int
+    pieces: int
+    play_ms: int  # ゲーム内の経過時間
+
+
+class StatsSummary(NamedTuple):
+    """累計の統計"""
+
+    plays: int
+    best_score: int
+    play_ms: int
+    lines: int
+
+
+class DailyStats(NamedTuple):
+    """1日分の集計"""
+
+    day: str  # 'YYYY-MM-DD'（ローカル時刻）
+    plays: int
+    best_score: int
+    play_ms: int
+    lines: int
+
+
+class ScoreEntry(NamedTuple):
+    """ランキングの1行"""
+
+    game_id: int
+    played_at: float
+    source: str
+    seed: Optional[int]
+    score: int
+    lines: int
+    level: int
+
+
+def day_of(timestamp: float) -> str:
+    """UNIX 時間のローカル日付（'YYYY-MM-DD'）"""
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """WAL モードで接続し、スキーマを用意する"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL では NORMAL でもコミット済みのデータは壊れない（電源断で直近のコミットが消えうるだけ）
+    conn.execute('PRAGMA synchronous=NORMAL')
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version > SCHEMA_VERSION:
+        conn.close()
+        raise ValueError(f"未対応の統計データベースのバージョンです: {version}")
+    conn.executescript(SCHEMA)
+    conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+    return conn
+
+
+def write_batch(conn: sqlite3.Connection, records: Sequence[GameRecord]) -> None:
+    """結果をまとめて1トランザクションで書き、日別の集計表も更新する"""
+    rows = []
+    daily: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for record in records:
+        day = day_of(record.played_at)
+        rows.append((record.played_at, day, record.source, record.seed, record.score,
+                     record.lines, record.level, record.pieces, record.play_ms))
+        totals = daily[day]
+        totals[0] += 1
+        totals[1] = max(totals[1], record.score)
+        totals[2] += record.play_ms
+        totals[3] += record.lines
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.executemany(INSERT_GAME, rows)
+        conn.executemany(UPSERT_DAILY, [(day, *totals) for day, totals in daily.items()])
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+class _StatsWriter(threading.Thread):
+    """キューの結果をまとめて書き込むスレッド"""
+
+    def __init__(self, path: str, batch_size: int, flush_interval: float):
+        super().__init__(name='stats-writer', daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: 'queue.Queue[Optional[GameRecord]]' = queue.Queue()
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        conn: Optional[sqlite3.Connection] = None
+        try:
+            conn = connect(self.path)
+            self._write_loop(conn)
+        except BaseException as exc:
+            # 止まったことを呼び出し側へ伝え、flush() が待ち続けないよう残りを捨てて終了を待つ
+            self.error = exc
+            self._drain()
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write_loop(self, conn: sqlite3.Connection) -> None:
+        """終了の合図（None）までキューの結果をまとめて書く"""
+        while True:
+            record = self.queue.get()
+            batch = [] if record is None else [record]
+            stop = record is None
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while not stop and len(batch) < self.batch_size:
+                    try:
+                        record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if record is None:
+                        stop = True
+                    else:
+                        batch.append(record)
+                if batch:
+                    write_batch(conn, batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def _drain(self) -> None:
+        """書き込みをやめた後、終了の合図までキューを空にし続ける"""
+        while True:
+            record = self.queue.get()
+            self.queue.task_done()
+            if record is None:
+                return
+
+
+class StatsStore:
+    """プレイ統計ストア（書き込みはバックグラウンドでまとめて行う）"""
+
+    def __init__(self, path: str = DEFAULT_STATS_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        if batch_size < 1:
+            raise ValueError("batch_size は1以上を指定してください")
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._writer = _StatsWriter(path, batch_size, flush_interval)
+        self._writer.start()
+        self.closed = False
+
+    def record(self, score: int, lines: int, level: int, pieces: int, play_ms: int,
+               seed: Optional[int] = None, source: str = 'game',
+               played_at: Optional[float] = None) -> None:
+        """1ゲームの結果をキューに積む（待たずに戻る）"""
+        if self.closed:
+            raise ValueError("統計ストアは既に閉じられています")
+        self._raise_writer_error()
+        self._writer.queue.put(GameRecord(time.time() if played_at is None else played_at, source,
+                                          seed, score, lines, level, pieces, play_ms))
+
+    def flush(self) -> None:
+        """キューに積んだ結果が書き込まれるまで待つ（書き込みスレッドが止まっていたら例外）"""
+        writer = self._writer
+        pending = writer.queue.all_tasks_done
+        with pending:
+            while writer.queue.unfinished_tasks and writer.error is None and writer.is_alive():
+                pending.wait(FLUSH_POLL_INTERVAL)
+        self._raise_writer_error()
+        if writer.queue.unfinished_tasks:
+            raise RuntimeError("統計の書き込みスレッドが停止しています")
+
+    def _raise_writer_error(self) -> None:
+        """書き込みスレッドで起きた例外を呼び出し側で送出する"""
+        if self._writer.error is not None:
+            raise RuntimeError("統計の書き込みに失敗しました") from self._writer.error
+
+    def summary(self) -> StatsSummary:
+        """累計（書き込み済みの分）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COALESCE(SUM(plays), 0), COALESCE(MAX(best_score), 0), '
+                'COALESCE(SUM(play_ms), 0), COALESCE(SUM(lines), 0) FROM daily').fetchone()
+        return StatsSummary(*row)
+
+    def top(self, n: int = 10, source: Optional[str] = None) -> List[ScoreEntry]:
+        """スコア上位 n 件（source を指定するとその種類のゲームだけ）"""
+        query = 'SELECT id, played_at, source, seed, score, lines, level FROM games'
+        params: Tuple[object, ...] = (n,)
+        if source is not None:
+            query += ' WHERE source = ?'
+            params = (source, n)
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY score DESC, id LIMIT ?', params).fetchall()
+        return [ScoreEntry(*row) for row in rows]
+
+    def daily(self, days: Optional[int] = None) -> List[DailyStats]:
+        """日別の集計（新しい日から、days を指定すると直近その日数分）"""
+        query = 'SELECT day, plays, best_score, play_ms, lines FROM daily ORDER BY day DESC'
+        params: Tuple[object, ...] = ()
+        if days is not None:
+            query += ' LIMIT ?'
+            params = (days,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [DailyStats(*row) for row in rows]
+
+    def reset(self) -> None:
+        """書き込み待ちの分も含めて全ての結果を消す"""
+        self.flush()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('DELETE FROM games')
+            self._conn.execute('DELETE FROM daily')
+            self._conn.execute('COMMIT')
+
+    def close(self) -> None:
+        """残りを書き込んでから閉じる"""
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.queue.put(None)
+        self._writer.join()
+        self._conn.close()
+        self._raise_writer_error()
+
+    def __enter__(self) -> 'StatsStore':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def format_play_time(play_ms: int) -> str:
+    """プレイ時間を「1.5 時間」のような表示にする"""
+    return f"{play_ms / 3_600_000:.1f} 時間"
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(prog='python -m tetris_game.stats', description="プレイ統計を表示")
+    parser.add_argument('--db', default=DEFAULT_STATS_PATH, help="統計データベースのパス")
+    parser.add_argument('--top', type=int, default=10, help="ランキングの件数")
+    parser.add_argument('--days', type=int, default=7, help="日別集計を表示する日数")
+    parser.add_argument('--source', help="ランキングに含めるゲームの種類（game / sim）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """python -m tetris_game.stats のエントリーポイント"""
+    args = parse_args(argv)
+    with StatsStore(args.db) as store:
+        summary = store.summary()
+        print(f"plays: {summary.plays}  best: {summary.best_score}  "
+              f"play time: {format_play_time(summary.play_ms)}  lines: {summary.lines}")
+        for rank, entry in enumerate(store.top(args.top, args.source), 1):
+            print(f"{rank:3d}. score={entry.score} lines={entry.lines} level={entry.level} "
+                  f"source={entry.source} seed={entry.seed} day={day_of(entry.played_at)}")
+        for day in store.daily(args.days):
+            print(f"{day.day} plays={day.plays} best={day.best_score} lines={day.lines} "
+                  f"play time={format_play_time(day.play_ms)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
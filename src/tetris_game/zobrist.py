@@ -0,0 +1,93 @@
+"""Zobristハッシュモジュール
+
+盤面・操作中ピース・次ピース・袋の残り（7-bag）を 64bit の値にまとめ、
+トランスポジションテーブルやリプレイの重複排除のキーに使う。
+
+盤面は行ごとに「列と色のキーの XOR」（行キー）を持ち、盤面ハッシュは
+``mix_row(行キー, y)`` の XOR とする。行キーが y に依存しないので、ライン消去で
+行がずれても1行あたり定数時間で更新できる。
+"""
+
+import random
+from functools import lru_cache
+from typing import List, NamedTuple, Sequence, Tuple
+
+MASK64 = (1 << 64) - 1
+
+# キー生成用の固定シード（プロセスやビルドをまたいで同じハッシュになるように）
+_KEY_SEED = 0x7E7A15
+
+# ピース座標キーの余白（x, y はグリッド外に少しはみ出しうる）
+COORD_MARGIN = 4
+
+
+class ZobristKeys(NamedTuple):
+    """グリッドサイズごとの乱数キー表"""
+
+    cell: Tuple[Tuple[int, ...], ...]  # cell[x][color]
+    row: Tuple[int, ...]  # row[y]: 行キーに掛ける奇数
+    kind: Tuple[int, ...]  # 操作中ピースの形状
+    rotation: Tuple[int, ...]
+    piece_x: Tuple[int, ...]  # x + COORD_MARGIN で引く
+    piece_y: Tuple[int, ...]  # y + COORD_MARGIN で引く
+    next_kind: Tuple[int, ...]
+    bag_kind: Tuple[int, ...]  # 袋にまだ残っている形状
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(width: int, height: int, num_kinds: int = 7, num_colors: int = 8) -> ZobristKeys:
+    """キー表を生成（同じサイズなら共有される）"""
+    rng = random.Random(_KEY_SEED)
+
+    def keys(count: int) -> Tuple[int, ...]:
+        return tuple(rng.getrandbits(64) for _ in range(count))
+
+    return ZobristKeys(
+        # 色 0（空）のキーは 0 にして、空セルがハッシュに影響しないようにする
+        cell=tuple((0,) + keys(num_colors - 1) for _ in range(width)),
+        row=tuple(key | 1 for key in keys(height)),
+        kind=keys(num_kinds),
+        rotation=keys(4),
+        piece_x=keys(width + 2 * COORD_MARGIN),
+        piece_y=keys(height + 2 * COORD_MARGIN),
+        next_kind=keys(num_kinds),
+        bag_kind=keys(num_kinds),
+    )
+
+
+def mix_row(row_key: int, y: int, keys: ZobristKeys) -> int:
+    """行キーを行番号 y に応じて盤面ハッシュへの寄与に変換"""
+    return (row_key * keys.row[y]) & MASK64
+
+
+def row_key(colors: Sequence[int], keys: ZobristKeys) -> int:
+    """1行分の色から行キーを計算"""
+    key = 0
+    cell = keys.cell
+    for x, color in enumerate(colors):
+        key ^= cell[x][color]
+    return key
+
+
+def grid_hash(rows: Sequence[Sequence[int]], keys: ZobristKeys) -> Tuple[List[int], int]:
+    """盤面全体から (行キーのリスト, 盤面ハッシュ) を計算"""
+    row_keys = [row_key(colors, keys) for colors in rows]
+    value = 0
+    for y, key in enumerate(row_keys):
+        value ^= mix_row(key, y, keys)
+    return row_keys, value
+
+
+def piece_hash(kind: int, rotation: int, x: int, y: int, next_kind: int, keys: ZobristKeys) -> int:
+    """操作中ピースの位置・回転と次ピースのハッシュ"""
+    return (keys.kind[kind] ^ keys.rotation[rotation]
+            ^ keys.piece_x[x + COORD_MARGIN] ^ keys.piece_y[y + COORD_MARGIN]
+            ^ keys.next_kind[next_kind])
+
+
+def bag_hash(kinds: Sequence[int], keys: ZobristKeys) -> int:
+    """袋に残っている形状の集合のハッシュ（順序は区別しない）"""
+    value = 0
+    for kind in kinds:
+        value ^= keys.bag_kind[kind]
+    return value
@@ -0,0 +1,213 @@
+"""リプレイアーカイブのテスト"""
+
+import io
+import multiprocessing
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game import archive as archive_module
+from tetris_game.archive import RECORD_HEADER, ReplayArchive, main
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy, run_game
+from tetris_game.replay import ReplayError, ReplayRecorder
+from tetris_game.sim import SimConfig, run_games
+
+
+def replay_bytes(seed, max_ticks=3000):
+    """ランダムポリシーで1ゲーム記録したリプレイのバイト列"""
+    stream = io.BytesIO()
+    engine = GameEngine(10, 20, seed=seed)
+    recorder = ReplayRecorder(engine, stream)
+    run_game(engine, policy=make_random_policy(seed, input_rate=0.4), max_ticks=max_ticks)
+    recorder.close()
+    return stream.getvalue()
+
+
+@pytest.fixture(scope='module')
+def replays():
+    """シード0〜11のリプレイ"""
+    return [replay_bytes(seed) for seed in range(12)]
+
+
+def append_in_child(path, data, count, queue):
+    """別プロセスから1件ずつロックを取って追記する"""
+    with ReplayArchive(path) as archive:
+        queue.put([archive.append(data) for _ in range(count)])
+
+
+class TestReplayArchive:
+    """ReplayArchive のテスト"""
+
+    @pytest.mark.parametrize("index_every", [1000, 5, 1])
+    def test_get_and_top(self, tmp_path, replays, index_every):
+        """索引済みでもテールでも ID で引けて、スコア上位が正しく並ぶことの確認"""
+        path = str(tmp_path / 'games.trpa')
+        with ReplayArchive(path, index_every=index_every) as archive:
+            with archive.writer() as writer:
+                ids = [writer.append(data) for data in replays[:7]]
+            ids += [archive.append(data) for data in replays[7:]]
+            assert ids == list(range(12))
+            assert len(archive) == 12
+            for game_id, data in zip(ids, replays):
+                assert archive.read_bytes(archive.entry(game_id)) == data
+            assert archive.get(3).header.seed == 3
+            assert archive.entry(12) is None
+            with pytest.raises(KeyError):
+                archive.get(99)
+            headers = [archive.get(game_id).header for game_id in ids]
+            expected = sorted(ids, key=lambda i: (-headers[i].score, i))[:5]
+            assert [entry.game_id for entry in archive.top(5)] == expected
+            assert [entry.game_id for entry in archive.entries()] == ids
+        assert os.path.exists(path + '.idx') == (index_every <= 7)
+
+    def test_merge_interval_grows(self, tmp_path, replays, monkeypatch):
+        """索引が大きくなるほど書き直しの間隔が延びることの確認"""
+        writes = []
+        write_index = archive_module._write_index
+        monkeypatch.setattr(archive_module, '_write_index',
+                            lambda path, *args: writes.append(args[1]) or write_index(path, *args))
+        path = str(tmp_path / 'games.trpa')
+        with ReplayArchive(path, index_every=4) as archive:
+            for i in range(200):
+                archive.append(replays[i % len(replays)])
+            assert len(archive) == 200
+            assert archive.entry(199).seed == 199 % len(replays)
+            scores = sorted((entry.score for entry in archive.entries()), reverse=True)
+            assert [entry.score for entry in archive.top(3)] == scores[:3]
+        assert writes[:8] == [4, 8, 12, 16, 20, 24, 28, 32]
+        assert len(writes) < 30
+
+    def test_reader_sees_other_writer(self, tmp_path, replays):
+        """別のインスタンスの追記と索引の書き直しを読み手が取り込むことの確認"""
+        path = str(tmp_path / 'games.trpa')
+        with ReplayArchive(path, index_every=2) as writer, ReplayArchive(path) as reader:
+            assert len(reader) == 0
+            writer.append(replays[0])
+            assert reader.get(0).header.seed == 0
+            writer.append(replays[1])
+            writer.append(replays[2])
+            assert len(reader) == 3
+            assert reader.top(1)[0] == writer.top(1)[0]
+
+    def test_truncates_partial_record(self, tmp_path, replays):
+        """書きかけのレコードを読み飛ばし、次の追記の前に切り詰めることの確認"""
+        path = str(tmp_path / 'games.trpa')
+        with ReplayArchive(path) as archive:
+            archive.append(replays[0])
+            size = os.path.getsize(path)
+        with open(path, 'ab') as f:
+            f.write(RECORD_HEADER.pack(b'RREC', 1, len(replays[1]), 0) + replays[1][:20])
+        with ReplayArchive(path) as archive:
+            assert len(archive) == 1
+            assert archive.append(replays[2]) == 1
+            assert os.path.getsize(path) == size + RECORD_HEADER.size + len(replays[2])
+            assert archive.get(1).header.seed == 2
+
+    def test_skips_corrupt_record(self, tmp_path, replays):
+        """途中の壊れたレコードを読み飛ばし、後ろのレコードを残してIDも再利用しないことの確認"""
+        path = str(tmp_path / 'games.trpa')
+        with ReplayArchive(path) as archive:
+            for data in replays[:5]:
+                archive.append(data)
+            offset = archive.entry(1).offset
+        with open(path, 'r+b') as f:
+            f.seek(offset + 100)
+            f.write(b'\xff' * 8)
+        size = os.path.getsize(path)
+        with ReplayArchive(path) as archive:
+            assert [entry.game_id for entry in archive.entries()] == [0, 2, 3, 4]
+            assert archive.entry(1) is None
+            assert archive.get(4).header.seed == 4
+            assert archive.append(replays[5]) == 5
+            assert os.path.getsize(path) == size + RECORD_HEADER.size + len(replays[5])
+            # 最後のレコードが壊れていてもそのIDは使わない
+            offset = archive.entry(5).offset
+        with open(path, 'r+b') as f:
+            f.seek(offset + 100)
+            f.write(b'\xff' * 8)
+        with ReplayArchive(path) as archive:
+            assert len(archive) == 4
+            assert archive.append(replays[6]) == 6
+            assert archive.rebuild_index() == 5
+            assert [entry.game_id for entry in archive.entries()] == [0, 2, 3, 4, 6]
+            assert archive.append(replays[7]) == 7
+
+    def test_rebuild_index(self, tmp_path, replays):
+        """壊れた索引を無視し、データファイルから作り直せることの確認"""
+        path = str(tmp_path / 'games.trpa')
+        with ReplayArchive(path, index_every=1) as archive:
+            for data in replays[:4]:
+                archive.append(data)
+            top = archive.top(4)
+        with open(path + '.idx', 'r+b') as f:
+            f.write(b'XXXX')
+        with ReplayArchive(path) as archive:
+            assert archive.top(4) == top
+            assert archive.rebuild_index() == 4
+            assert archive.top(4) == top
+        os.remove(path + '.idx')
+        with ReplayArchive(path) as archive:
+            assert archive.top(4) == top
+
+    def test_rejects_invalid_replay(self, tmp_path, replays):
+        """壊れたリプレイは追記しないことの確認"""
+        with ReplayArchive(str(tmp_path / 'games.trpa')) as archive:
+            with pytest.raises(ReplayError):
+                archive.append(replays[0][:10])
+            assert len(archive) == 0
+
+    def test_rejects_broken_data_file(self, tmp_path):
+        """ヘッダの欠けたデータファイルは開かないことの確認"""
+        path = tmp_path / 'games.trpa'
+        path.write_bytes(b'TRP')
+        with pytest.raises(ValueError):
+            ReplayArchive(str(path))
+        path.write_bytes(b'XXXX\x01\x00\x00\x00')
+        with pytest.raises(ValueError):
+            ReplayArchive(str(path))
+
+    def test_concurrent_appends(self, tmp_path, replays):
+        """複数プロセスから同時に作成・追記してもIDが重複せず、全件読めることの確認"""
+        path = str(tmp_path / 'games.trpa')
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=append_in_child,
+                                             args=(path, replays[i], 10, queue))
+                     for i in range(4)]
+        for process in processes:
+            process.start()
+        ids = sorted(game_id for _ in processes for game_id in queue.get(timeout=30))
+        for process in processes:
+            process.join()
+        assert ids == list(range(40))
+        with ReplayArchive(path) as archive:
+            assert len(archive) == 40
+            assert archive.rebuild_index() == 40
+
+    def test_sim_archive(self, tmp_path):
+        """sim の各ワーカーがリプレイをアーカイブへ追記することの確認"""
+        path = str(tmp_path / 'games.trpa')
+        config = SimConfig(max_ticks=500, archive=path)
+        results = list(run_games(range(6), config, workers=2, chunk_size=2))
+        with ReplayArchive(path) as archive:
+            assert len(archive) == 6
+            for result in results:
+                header = archive.get(result['game_id']).header
+                assert (header.seed, header.score) == (result['seed'], result['score'])
+
+    def test_cli(self, tmp_path, replays, capsys):
+        """CLI の追記・上位表示・取り出しの確認"""
+        replay_dir = tmp_path / 'replays'
+        replay_dir.mkdir()
+        for i, data in enumerate(replays[:3]):
+            (replay_dir / f'{i}.trp').write_bytes(data)
+        path = str(tmp_path / 'games.trpa')
+        assert main([path, '--add', str(replay_dir), '--top', '2']) == 0
+        assert len(capsys.readouterr().out.splitlines()) == 2
+        out = tmp_path / 'out.trp'
+        assert main([path, '--get', '1', '--out', str(out)]) == 0
+        assert out.read_bytes() == replays[1]
+        assert main([path, '--get', '5']) == 1
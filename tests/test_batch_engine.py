@@ -0,0 +1,157 @@
+"""バッチエンジンのテスト"""
+
+import pytest
+import random
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+np = pytest.importorskip("numpy")
+
+from tetris_game.batch_engine import (
+    ACTION_DOWN, ACTION_HARD_DROP, ACTION_LEFT, ACTION_NONE, ACTION_RIGHT, ACTION_ROTATE,
+    BatchGameEngine,
+)
+from tetris_game.game_engine import GameEngine
+
+ACTIONS = [ACTION_NONE, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_HARD_DROP]
+
+
+def apply_single(engine, action):
+    """単体エンジンへ同じアクションを適用"""
+    if action == ACTION_LEFT:
+        engine.move_piece(-1, 0)
+    elif action == ACTION_RIGHT:
+        engine.move_piece(1, 0)
+    elif action == ACTION_DOWN:
+        engine.move_piece(0, 1)
+    elif action == ACTION_ROTATE:
+        engine.rotate_piece()
+    elif action == ACTION_HARD_DROP:
+        engine.hard_drop()
+
+
+def make_script(seed, steps):
+    """ゲームごとのアクション列（左右に寄りやすいランダム入力）"""
+    rng = random.Random(seed * 7919)
+    return [rng.choice(ACTIONS) for _ in range(steps)]
+
+
+class TestBatchGameEngine:
+    """BatchGameEngineのテスト"""
+
+    def test_init(self):
+        """初期化テスト"""
+        batch = BatchGameEngine([1, 2, 3])
+        assert batch.boards.shape == (3, 20, 10)
+        assert batch.boards.dtype == np.uint8
+        assert list(batch.x) == [3, 3, 3]
+        assert not batch.game_over.any()
+
+    def test_hard_drop_reaches_floor(self):
+        """ハードドロップで床に着くことの確認"""
+        batch = BatchGameEngine([5, 6])
+        batch.apply([ACTION_HARD_DROP, ACTION_NONE])
+        assert batch.drop_distances()[0] == 0
+        assert batch.drop_distances()[1] > 0
+
+    def test_matches_single_engine(self):
+        """同じシードで単体エンジンと完全に一致することの確認"""
+        seeds = list(range(12))
+        steps = 1500
+        scripts = [make_script(seed, steps) for seed in seeds]
+
+        expected = []
+        for seed, script in zip(seeds, scripts):
+            engine = GameEngine(10, 20, seed=seed)
+            for action in script:
+                if not engine.game_over:
+                    apply_single(engine, action)
+                engine.update(250)
+            expected.append(engine)
+
+        batch = BatchGameEngine(seeds)
+        for step in range(steps):
+            batch.step([script[step] for script in scripts], 250)
+
+        for i, engine in enumerate(expected):
+            assert batch.get_grid(i) == engine.grid
+            assert batch.score[i] == engine.score
+            assert batch.lines_cleared[i] == engine.lines_cleared
+            assert batch.level[i] == engine.level
+            assert bool(batch.game_over[i]) == engine.game_over
+        assert batch.game_over.any()
+
+    def test_line_clear_matches_single_engine(self):
+        """ライン消去が起きる盤面でも単体エンジンと一致することの確認"""
+        seeds = list(range(30))
+        steps = 400
+        rng = random.Random(99)
+        scripts = [[rng.choice([ACTION_RIGHT] * 3 + [ACTION_ROTATE, ACTION_HARD_DROP])
+                    for _ in range(steps)] for _ in seeds]
+
+        # 右端1列だけ空いた井戸を用意する
+        prefill = [[0] * 10 for _ in range(8)] + [[2] * 9 + [0] for _ in range(12)]
+
+        expected = []
+        for seed, script in zip(seeds, scripts):
+            engine = GameEngine(10, 20, seed=seed)
+            for y, row in enumerate(prefill):
+                engine.grid[y][:] = row
+            engine.board.reindex()
+            for action in script:
+                if not engine.game_over:
+                    apply_single(engine, action)
+                engine.update(500)
+            expected.append(engine)
+
+        batch = BatchGameEngine(seeds)
+        batch.boards[:] = np.array(prefill, dtype=np.uint8)
+        for step in range(steps):
+            batch.step([script[step] for script in scripts], 500)
+
+        for i, engine in enumerate(expected):
+            assert batch.get_grid(i) == engine.grid
+            assert batch.score[i] == engine.score
+            assert batch.lines_cleared[i] == engine.lines_cleared
+        assert batch.lines_cleared.sum() > 0
+
+    def test_catch_up_matches_single_engine(self):
+        """大きな dt で追いつく重力ステップと端数の扱いが単体エンジンと一致することの確認"""
+        seeds = list(range(8))
+        steps = 200
+        scripts = [make_script(seed, steps) for seed in seeds]
+        dts = [random.Random(step).choice([0, 120, 1300, 3000]) for step in range(steps)]
+
+        expected = []
+        for seed, script in zip(seeds, scripts):
+            engine = GameEngine(10, 20, seed=seed, max_catch_up=2)
+            for action, dt in zip(script, dts):
+                if not engine.game_over:
+                    apply_single(engine, action)
+                engine.update(dt)
+            expected.append(engine)
+
+        batch = BatchGameEngine(seeds, max_catch_up=2)
+        for step in range(steps):
+            batch.step([script[step] for script in scripts], dts[step])
+
+        for i, engine in enumerate(expected):
+            assert batch.get_grid(i) == engine.grid
+            assert batch.score[i] == engine.score
+            assert bool(batch.game_over[i]) == engine.game_over
+            if not engine.game_over:
+                assert batch.fall_time[i] == engine.fall_time
+
+    def test_advance_matches_single_engine(self):
+        """advance が単体エンジンの advance と一致することの確認"""
+        seeds = [3, 4, 5]
+        batch = BatchGameEngine(seeds)
+        batch.advance(150)
+        for i, seed in enumerate(seeds):
+            engine = GameEngine(10, 20, seed=seed)
+            engine.advance(150)
+            assert batch.get_grid(i) == engine.grid
+            assert bool(batch.game_over[i]) == engine.game_over
@@ -0,0 +1,135 @@
+"""共有メモリの盤面リングのテスト"""
+
+import multiprocessing
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.board_ring import SEQ, BoardRing, main, render
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy, run_game
+from tetris_game.sim import SimConfig, run_games
+
+
+def played_engine(seed, ticks=300, backend='list'):
+    """ランダム入力で進めたエンジン"""
+    engine = GameEngine(10, 20, backend=backend, seed=seed)
+    run_game(engine, policy=make_random_policy(seed, input_rate=0.4), dt=100, max_ticks=ticks)
+    return engine
+
+
+def read_in_child(name, slot, queue):
+    """別プロセスから接続してスロットを読む"""
+    with BoardRing.attach(name) as ring:
+        _, state = ring.read(slot)
+        queue.put((state.to_bytes(), ring.cells_view(slot).tolist()))
+
+
+class TestBoardRing:
+    """BoardRing のテスト"""
+
+    @pytest.mark.parametrize("backend", ["list", "bitboard"])
+    def test_publish_and_read(self, backend):
+        """書いた盤面が state_snapshot と同じ内容で読めることの確認"""
+        engine = played_engine(3, backend=backend)
+        with BoardRing.create(4) as ring:
+            assert ring.read(2) is None
+            ring.publish(engine, 2)
+            sequence, state = ring.read(2)
+            assert sequence == 2
+            assert state == engine.state_snapshot()
+            assert ring.cells_view(2).tolist() == engine.grid
+
+    def test_ring_order(self):
+        """slot を省略するとスロットを順に回り、latest が最後の盤面を返すことの確認"""
+        with BoardRing.create(3) as ring:
+            assert ring.latest() is None
+            engines = [played_engine(seed, ticks=50 * seed) for seed in range(5)]
+            slots = [ring.publish(engine) for engine in engines]
+            assert slots == [0, 1, 2, 0, 1]
+            assert ring.head == 5
+            assert ring.latest()[1] == engines[4].state_snapshot()
+            assert ring.read(2)[1] == engines[2].state_snapshot()
+            assert ring.read(0)[0] == 4
+
+    def test_seqlock_detects_write(self):
+        """書き込み中（奇数）は待ち、読んでいる間の書き込みは read_retry で検出されることの確認"""
+        with BoardRing.create(1) as ring:
+            ring.publish(played_engine(1))
+            sequence = ring.read_begin(0)
+            view = ring.cells_view(0)
+            assert not ring.read_retry(0, sequence)
+            ring.publish(played_engine(2, ticks=500), 0)
+            assert ring.read_retry(0, sequence)
+            view.release()
+
+            offset = ring._offset(0)
+            SEQ.pack_into(ring.buf, offset, sequence + 3)
+            with pytest.raises(TimeoutError):
+                ring.read(0)
+
+    def test_other_process_reads_zero_copy(self):
+        """別プロセスから名前で接続して読めて、セグメントが残ることの確認"""
+        engine = played_engine(5)
+        with BoardRing.create(2) as ring:
+            ring.publish(engine, 1)
+            queue = multiprocessing.Queue()
+            child = multiprocessing.Process(target=read_in_child, args=(ring.name, 1, queue))
+            child.start()
+            data, cells = queue.get(timeout=10)
+            child.join(timeout=10)
+            assert data == engine.state_snapshot().to_bytes()
+            assert cells == engine.grid
+            assert ring.read(1)[1] == engine.state_snapshot()
+
+    def test_rejects_foreign_segment(self):
+        """盤面リングでない共有メモリには接続できないことの確認"""
+        from multiprocessing import shared_memory
+        segment = shared_memory.SharedMemory(create=True, size=64)
+        try:
+            with pytest.raises(ValueError):
+                BoardRing.attach(segment.name)
+        finally:
+            segment.close()
+            segment.unlink()
+
+    def test_viewer(self, capsys):
+        """ビューアーが最新の盤面をテキストで表示することの確認"""
+        engine = played_engine(6)
+        with BoardRing.create(2) as ring:
+            assert main([ring.name]) == 0
+            assert 'まだ' in capsys.readouterr().out
+            ring.publish(engine)
+            assert main([ring.name, '--slot', '0']) == 0
+        out = capsys.readouterr().out
+        assert f"score={engine.score}" in out
+        assert render(engine.state_snapshot()) in out
+        assert '@' in out
+
+
+class TestSimPublishing:
+    """シミュレーションからの盤面書き込みのテスト"""
+
+    def test_workers_publish_own_slots(self):
+        """ワーカーごとに別のスロットへ書かれ、結果は書かない場合と同じことの確認"""
+        config = SimConfig(max_ticks=400, publish_every=10)
+        expected = sorted((r['seed'], r['score']) for r in run_games(range(8), config, workers=0))
+        with BoardRing.create(2) as ring:
+            published = config._replace(board_ring=ring.name)
+            results = sorted((r['seed'], r['score'])
+                             for r in run_games(range(8), published, workers=2, chunk_size=2))
+            assert results == expected
+            states = [ring.read(slot) for slot in range(2)]
+        assert all(state is not None and state[0] > 2 for state in states)
+
+    def test_in_process_publish(self):
+        """workers=0 でもスロット0に書かれることの確認"""
+        with BoardRing.create(1) as ring:
+            config = SimConfig(max_ticks=200, board_ring=ring.name, publish_every=50)
+            list(run_games(range(2), config, workers=0))
+            sequence, state = ring.read(0)
+            # 1ゲームにつき 0, 50, 100, 150 ティック目と終了時の5回、2ゲームで10回書く
+            assert sequence == 2 * 10
@@ -0,0 +1,99 @@
+"""ビームサーチボットのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.bot import (BeamSearchBot, Leaf, Weights, evaluate_leaves, lock_board, main,
+                             parallel_threshold, play_game)
+from tetris_game.features import heuristic_features, mask_features
+from tetris_game.game_engine import GameEngine
+from tetris_game.shapes import compile_rotation
+
+
+class TestBoardHelpers:
+    """盤面ヘルパーのテスト"""
+
+    def test_lock_board_clears_lines(self):
+        """固定で満杯になった行が消えて上が詰まることの確認"""
+        board = (0, 0b0100, 0b0111)
+        locked, cleared = lock_board(board, compile_rotation(['...#']), 0, 2, 0b1111)
+        assert cleared == 1
+        assert locked == (0, 0, 0b0100)
+
+    def test_board_features(self):
+        """葉の評価に使う穴・高さの合計・凸凹が features モジュールで求まることの確認"""
+        board = (
+            0b0000,
+            0b0010,
+            0b0001,
+            0b1011,
+        )
+        # 高さ 2, 3, 0, 1 / 列1の行2が穴
+        assert heuristic_features(board, 4) == (1, 6, 1 + 3 + 1)
+        features = mask_features(board, 4)
+        assert (features.holes, features.aggregate_height, features.bumpiness) == (1, 6, 1 + 3 + 1)
+        weights = Weights(holes=-1.0, aggregate_height=-0.5, bumpiness=-0.25, lines=0.0)
+        assert evaluate_leaves([Leaf(board, 0)], 4, weights) == [-1.0 - 3.0 - 1.25]
+
+    def test_evaluate_leaves(self):
+        """重み付き和で評価されることの確認"""
+        weights = Weights(holes=-1.0, aggregate_height=-0.5, bumpiness=0.0, lines=10.0)
+        scores = evaluate_leaves([Leaf((0, 0b0011), 2), Leaf((0b01, 0b10), 0)], 2, weights)
+        assert scores == [-0.5 * 2 + 20.0, -1.0 - 0.5 * 3]
+
+
+class TestBeamSearchBot:
+    """BeamSearchBot のテスト"""
+
+    def test_plays_and_clears_lines(self):
+        """ボットがゲームオーバーにならずにラインを消し続けることの確認"""
+        engine = GameEngine(10, 20, seed=4)
+        result = play_game(engine, BeamSearchBot(beam_width=4), max_pieces=120)
+        assert result['pieces'] == 120
+        assert not result['game_over']
+        assert result['lines'] >= 40
+
+    def test_choose_returns_reachable_placement(self):
+        """選んだ固定位置が列挙結果に含まれることの確認"""
+        engine = GameEngine(10, 20, seed=2)
+        placement = BeamSearchBot(depth=1).choose(engine)
+        assert placement in engine.enumerate_placements()
+
+    def test_parallel_evaluation_matches(self):
+        """プロセスプールで評価しても同じ手を選ぶことの確認"""
+        engine = GameEngine(10, 20, seed=5)
+        with BeamSearchBot(workers=2, min_parallel_leaves=1) as parallel:
+            assert parallel.choose(engine) == BeamSearchBot().choose(engine)
+            assert parallel.parallel_batches > 0
+
+    def test_parallel_threshold(self):
+        """ワーカーが多いほど少ない葉から並列化し、1ワーカーでは並列化しないことの確認"""
+        assert parallel_threshold(1) is None
+        assert parallel_threshold(2) > parallel_threshold(4) > parallel_threshold(8)
+        assert BeamSearchBot(workers=4).min_parallel_leaves == parallel_threshold(4)
+
+    def test_warns_when_workers_unused(self, capsys):
+        """--workers がバッチの大きさのせいで使われなかったら警告することの確認"""
+        assert main(['--max-pieces', '3', '--workers', '2', '--min-parallel-leaves', '100000']) == 0
+        assert 'warning' in capsys.readouterr().err
+
+    def test_invalid_arguments(self):
+        """ビーム幅・深さの検証テスト"""
+        with pytest.raises(ValueError):
+            BeamSearchBot(beam_width=0)
+        with pytest.raises(ValueError):
+            BeamSearchBot(depth=0)
+
+    def test_main_report(self, capsys):
+        """CLIのJSON出力とスループット表示のテスト"""
+        assert main(['--games', '2', '--max-pieces', '20', '--depth', '1', '--json']) == 0
+        captured = capsys.readouterr()
+        lines = captured.out.strip().splitlines()
+        assert len(lines) == 2
+        assert '"pieces": 20' in lines[0]
+        assert 'pieces/s' in captured.err
+        assert 'average' in captured.err
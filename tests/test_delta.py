@@ -0,0 +1,101 @@
+"""差分ストリームのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.delta import FRAME_DELTA, FRAME_KEY, DeltaDecoder, DeltaEncoder
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy
+
+
+def state_stream(seed, ticks, dt=50):
+    """ランダムポリシーで進めたゲームの毎ティックの状態"""
+    engine = GameEngine(10, 20, seed=seed)
+    policy = make_random_policy(seed, input_rate=0.5)
+    states = [engine.state_snapshot()]
+    for _ in range(ticks):
+        action = policy(engine)
+        if action is not None:
+            engine.apply_action(action)
+        engine.update(dt)
+        states.append(engine.state_snapshot())
+        if engine.game_over:
+            break
+    return states
+
+
+class TestDeltaStream:
+    """DeltaEncoder / DeltaDecoder のテスト"""
+
+    def test_roundtrip(self):
+        """デコード結果が毎フレーム元の状態と一致することの確認"""
+        states = state_stream(3, 3000)
+        encoder = DeltaEncoder(keyframe_interval=30)
+        decoder = DeltaDecoder()
+        for state in states:
+            assert decoder.decode(encoder.encode(state)) == state
+        assert states[-1].game_over
+        assert states[-1].lines_cleared > 0 or states[-1].pieces_placed > 10
+
+    def test_delta_frames_are_small(self):
+        """差分フレームがキーフレームよりずっと小さいことの確認"""
+        states = state_stream(4, 600)
+        encoder = DeltaEncoder(keyframe_interval=10 ** 6)
+        frames = [encoder.encode(state) for state in states]
+        assert frames[0][0] == FRAME_KEY
+        assert all(frame[0] == FRAME_DELTA for frame in frames[1:])
+        average = sum(map(len, frames[1:])) / (len(frames) - 1)
+        assert average < len(frames[0]) / 10
+        # 何も変わらないフレームは 種別＋通し番号＋フラグ だけ
+        assert len(encoder.encode(states[-1])) <= 4
+
+    def test_periodic_keyframes(self):
+        """keyframe_interval ごとと request_keyframe() でキーフレームになることの確認"""
+        states = state_stream(5, 50)
+        encoder = DeltaEncoder(keyframe_interval=8)
+        kinds = [encoder.encode(state)[0] for state in states[:17]]
+        assert [i for i, kind in enumerate(kinds) if kind == FRAME_KEY] == [0, 8, 16]
+        encoder.request_keyframe()
+        assert encoder.encode(states[17])[0] == FRAME_KEY
+
+    def test_late_joiner_resyncs(self):
+        """途中から受信した観戦者が次のキーフレームで同期することの確認"""
+        states = state_stream(6, 40)
+        encoder = DeltaEncoder(keyframe_interval=10)
+        frames = [encoder.encode(state) for state in states]
+        decoder = DeltaDecoder()
+        decoded = [decoder.decode(frame) for frame in frames[5:]]
+        assert decoded[:5] == [None] * 5
+        assert decoded[5:] == states[10:]
+
+    def test_gap_drops_sync(self):
+        """フレームが抜けたら次のキーフレームまで None を返すことの確認"""
+        states = state_stream(7, 30)
+        encoder = DeltaEncoder(keyframe_interval=10)
+        frames = [encoder.encode(state) for state in states]
+        decoder = DeltaDecoder()
+        for frame in frames[:4]:
+            decoder.decode(frame)
+        assert decoder.decode(frames[5]) is None
+        assert not decoder.synced
+        assert decoder.decode(frames[6]) is None
+        assert decoder.decode(frames[10]) == states[10]
+
+    def test_rejects_bad_frames(self):
+        """壊れたフレームはエラーになることの確認"""
+        encoder = DeltaEncoder()
+        decoder = DeltaDecoder()
+        with pytest.raises(ValueError):
+            decoder.decode(b'')
+        with pytest.raises(ValueError):
+            decoder.decode(b'\x07\x00')
+        state = GameEngine(10, 20, seed=1).state_snapshot()
+        decoder.decode(encoder.encode(state))
+        with pytest.raises(ValueError):
+            decoder.decode(encoder.encode(state) + b'\x00')
+        with pytest.raises(ValueError):
+            DeltaEncoder(keyframe_interval=0)
@@ -0,0 +1,90 @@
+"""盤面特徴量のテスト"""
+
+import pytest
+import random
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.features import board_features, mask_features
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy, run_game
+
+# 高さ 2, 3, 0, 1 / 列1の行2が穴
+SAMPLE = [
+    [0, 0, 0, 0],
+    [0, 5, 0, 0],
+    [2, 0, 0, 0],
+    [3, 1, 0, 4],
+]
+
+
+def random_grids(count, seed=0):
+    """ランダムプレイ途中の盤面（2次元リスト）"""
+    grids = []
+    for game in range(count):
+        engine = GameEngine(10, 20, seed=seed + game)
+        run_game(engine, policy=make_random_policy(game, input_rate=0.4), dt=100,
+                 max_ticks=random.Random(game).randint(20, 200))
+        grids.append([row[:] for row in engine.grid])
+    return grids
+
+
+class TestBoardFeatures:
+    """単一盤面の特徴量のテスト"""
+
+    def test_sample_board(self):
+        """手計算した値との比較"""
+        features = board_features(SAMPLE)
+        assert features.column_heights == (2, 3, 0, 1)
+        assert features.aggregate_height == 6
+        assert features.holes == 1
+        assert features.bumpiness == 1 + 3 + 1
+        # 行1: 壁.#..壁 で 4、行2: 壁#...壁 で 2、行3: 壁##.#壁 で 2
+        assert features.row_transitions == 4 + 2 + 2
+        assert features.well_depths == (1, 0, 1, 0)
+
+    def test_empty_board(self):
+        """空の盤面の確認"""
+        features = mask_features([0] * 20, 10)
+        assert features.aggregate_height == 0
+        assert features.holes == 0
+        assert features.row_transitions == 0
+        assert features.well_depths == (0,) * 10
+
+    @pytest.mark.parametrize("backend", ["list", "bitboard"])
+    def test_grid_backend_matches_list(self, backend):
+        """グリッドバックエンドからでも2次元リストと同じ値になることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=8)
+        run_game(engine, policy=make_random_policy(8, input_rate=0.4), dt=100, max_ticks=150)
+        assert board_features(engine.board) == board_features(engine.grid)
+
+
+class TestBatchFeatures:
+    """NumPyによるバッチ計算のテスト"""
+
+    def test_matches_single_board(self):
+        """バッチ計算が盤面ごとの計算と一致することの確認"""
+        np = pytest.importorskip("numpy")
+        from tetris_game.features import batch_features
+
+        grids = random_grids(24) + [[[0] * 10 for _ in range(20)]]
+        batch = batch_features(np.array(grids, dtype=np.uint8))
+        for i, grid in enumerate(grids):
+            single = board_features(grid)
+            assert tuple(batch.column_heights[i]) == single.column_heights
+            assert batch.aggregate_height[i] == single.aggregate_height
+            assert batch.holes[i] == single.holes
+            assert batch.bumpiness[i] == single.bumpiness
+            assert batch.row_transitions[i] == single.row_transitions
+            assert tuple(batch.well_depths[i]) == single.well_depths
+
+    def test_rejects_wrong_shape(self):
+        """2次元配列を渡すとエラーになることの確認"""
+        np = pytest.importorskip("numpy")
+        from tetris_game.features import batch_features
+
+        with pytest.raises(ValueError):
+            batch_features(np.zeros((20, 10)))
@@ -7,7 +7,8 @@ import os
 # srcディレクトリをパスに追加
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from tetris_game.game_engine import GameEngine
+from tetris_game.game_engine import FPS, GameEngine, gravity_frames
+from tetris_game.shapes import compile_rotation
 
 
 class TestGameEngine:
@@ -87,6 +88,22 @@ class TestGameEngine:
         # Y座標が増加しているはず
         assert self.engine.current_piece['y'] > original_y
     
+    def test_hard_drop_lands_on_floor(self):
+        """ハードドロップ後はそれ以上落下できないことの確認"""
+        piece = self.engine.current_piece
+        assert self.engine.drop_distance(piece) > 0
+        self.engine.hard_drop()
+        assert self.engine.drop_distance(piece) == 0
+        assert not self.engine.is_valid_position(piece, dy=1)
+    
+    def test_apply_action(self):
+        """アクション名での入力テスト"""
+        original_x = self.engine.current_piece['x']
+        assert self.engine.apply_action('right')
+        assert self.engine.current_piece['x'] == original_x + 1
+        with pytest.raises(ValueError):
+            self.engine.apply_action('jump')
+    
     def test_clear_lines_empty_grid(self):
         """空のグリッドでのライン消去テスト"""
         cleared = self.engine.clear_lines()
@@ -109,6 +126,60 @@ class TestGameEngine:
         # 最下段が空になっているはず
         assert all(cell == 0 for cell in self.engine.grid[bottom_row])
     
+    def test_clear_lines_only_given_rows(self):
+        """指定行だけを調べるライン消去テスト"""
+        bottom_row = self.engine.grid_height - 1
+        self.engine.board.place(compile_rotation(['#' * self.engine.grid_width]), 0, bottom_row, 1)
+        
+        assert self.engine.clear_lines(range(0, bottom_row)) == 0
+        assert self.engine.clear_lines(range(bottom_row - 3, bottom_row + 1)) == 1
+        assert self.engine.score == 100
+    
+    def test_direct_grid_writes_update_counts(self):
+        """grid への直接の書き込みが row_fill / column_heights に反映されることの確認"""
+        self.engine.grid[19][:] = [1] * 9 + [0]
+        self.engine.grid[17][2] = 1
+        assert self.engine.row_fill[17:] == (1, 0, 9)
+        assert self.engine.column_heights == (1, 1, 3, 1, 1, 1, 1, 1, 1, 0)
+
+    def test_lock_clears_row_completed_by_direct_writes(self):
+        """直接書き込んだ行の隙間にピースが固定されたら、その行が消えることの確認"""
+        engine = self.engine
+        piece = engine.current_piece
+        landed_y = piece.y + engine.drop_distance(piece)
+        gap = {piece.x + dx for dx, dy in piece.shape[piece.rotation].cells if landed_y + dy == 19}
+        engine.grid[19][:] = [0 if x in gap else 1 for x in range(10)]
+        engine.hard_drop()
+        engine.gravity_step()
+        assert engine.lines_cleared == 1
+        assert engine.pieces_placed == 1
+        assert sum(engine.row_fill) == 4 - len(gap)
+
+    def test_hard_drop_after_direct_grid_writes(self):
+        """grid を直接書き換えた後のハードドロップが埋まったセルに重ならないことの確認"""
+        engine = self.engine
+        for y in range(10, 20):
+            engine.grid[y][:] = [1] * 9 + [0]
+        piece = engine.current_piece
+        engine.hard_drop()
+        assert engine.is_valid_position(piece)
+        assert not engine.is_valid_position(piece, dy=1)
+        engine.gravity_step()
+        filled = sum(1 for row in engine.grid for cell in row if cell)
+        assert filled == 90 + 4 - 10 * engine.lines_cleared
+
+    def test_row_fill_and_column_heights(self):
+        """row_fill / column_heights の差分更新テスト"""
+        assert self.engine.row_fill == (0,) * 20
+        assert self.engine.column_heights == (0,) * 10
+        
+        piece = self.engine.current_piece
+        self.engine.hard_drop()
+        self.engine.place_piece(piece)
+        assert sum(self.engine.row_fill) == 4
+        assert max(self.engine.column_heights) >= 1
+        assert isinstance(self.engine.column_heights, tuple)
+    
     def test_game_state(self):
         """ゲーム状態取得テスト"""
         state = self.engine.get_game_state()
@@ -148,6 +219,113 @@ class TestGameEngine:
         expected_level = self.engine.lines_cleared // 10 + 1
         assert self.engine.level == expected_level
 
+class TestFixedTimestep:
+    """固定タイムステップの update / advance のテスト"""
+
+    def test_keeps_remainder(self):
+        """落下時刻を超えた端数が次の update に持ち越されることの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        y = engine.current_piece['y']
+        assert engine.update(700) == 1
+        assert engine.fall_time == 200
+        assert engine.update(300) == 1
+        assert engine.fall_time == 0
+        assert engine.current_piece['y'] == y + 2
+
+    def test_catches_up_large_dt(self):
+        """大きな dt では溜まった回数だけ重力ステップを適用することの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        y = engine.current_piece['y']
+        assert engine.update(engine.fall_speed * 3 + 10) == 3
+        assert engine.current_piece['y'] == y + 3
+        assert engine.fall_time == 10
+
+    def test_catch_up_budget_drops_backlog(self):
+        """max_catch_up を超えた分は捨てて端数だけ残すことの確認"""
+        engine = GameEngine(10, 20, seed=1, max_catch_up=2)
+        y = engine.current_piece['y']
+        assert engine.update(engine.fall_speed * 10 + 30) == 2
+        assert engine.current_piece['y'] == y + 2
+        assert engine.fall_time == 30
+
+    def test_invalid_catch_up(self):
+        """max_catch_up が1未満ならエラーになることの確認"""
+        with pytest.raises(ValueError):
+            GameEngine(10, 20, max_catch_up=0)
+
+    def test_advance(self):
+        """advance(n) が update を n 回呼んだのと同じ局面になることの確認"""
+        fast = GameEngine(10, 20, seed=4)
+        slow = GameEngine(10, 20, seed=4)
+        fast.fall_time = slow.fall_time = 0
+        assert fast.advance(60) == 60
+        for _ in range(60):
+            slow.update(slow.fall_speed)
+        assert fast.state_hash == slow.state_hash
+        assert fast.pieces_placed == slow.pieces_placed > 0
+
+    def test_advance_stops_at_game_over(self):
+        """ゲームオーバーになったら止まり、進めた回数を返すことの確認"""
+        engine = GameEngine(10, 20, seed=4)
+        steps = engine.advance(100000)
+        assert engine.game_over
+        assert steps < 100000
+        assert engine.advance(10) == 0
+
+class TestFrameMode:
+    """フレームモード（run_frames）のテスト"""
+
+    def test_gravity_frames_match_milliseconds(self):
+        """60FPSで換算するとレベルごとの落下間隔がミリ秒と一致することの確認"""
+        for level in range(1, 15):
+            assert gravity_frames(level) * 1000 == max(50, 500 - (level - 1) * 50) * FPS
+
+    def test_falls_every_frames_per_row(self):
+        """frames_per_row フレームごとに1段落ち、端数のフレームが持ち越されることの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        y = engine.current_piece['y']
+        assert engine.run_frames(engine.frames_per_row - 1) == engine.frames_per_row - 1
+        assert engine.current_piece['y'] == y
+        engine.run_frames(1)
+        assert engine.current_piece['y'] == y + 1
+        engine.run_frames(engine.frames_per_row * 2 + 5)
+        assert engine.current_piece['y'] == y + 3
+        assert engine.fall_frames == 5
+
+    def test_matches_update(self):
+        """同じ入力なら1フレームずつの update と同じ局面になることの確認"""
+        inputs = [None, 'left', ('rotate', 'right'), None, 'drop'] * 200
+        framed = GameEngine(10, 20, seed=7)
+        timed = GameEngine(10, 20, seed=7)
+        framed.run_frames(len(inputs), inputs)
+        # 60FPS の1フレーム = 50/3 ms なので、3倍したミリ秒で update する
+        timed.fall_speed *= 3
+        for actions in inputs:
+            for action in ([actions] if isinstance(actions, str) else actions or ()):
+                timed.apply_action(action)
+            timed.update(50)
+            timed.fall_speed = max(50, 500 - (timed.level - 1) * 50) * 3
+        assert framed.state_hash == timed.state_hash
+        assert framed.pieces_placed == timed.pieces_placed > 0
+
+    def test_stops_at_game_over(self):
+        """ゲームオーバーで止まり、進めたフレーム数を返すことの確認"""
+        engine = GameEngine(10, 20, seed=2)
+        frames = engine.run_frames(10 ** 6, ['drop'] * 10 ** 6)
+        assert engine.game_over
+        assert frames < 10 ** 6
+        assert engine.run_frames(10) == 0
+
+    def test_snapshot_keeps_frame_counter(self):
+        """スナップショットからの復元でフレームカウンタも戻ることの確認"""
+        engine = GameEngine(10, 20, seed=3)
+        engine.run_frames(17)
+        snap = engine.snapshot()
+        engine.run_frames(400)
+        engine.restore(snap)
+        assert engine.fall_frames == 17
+        assert engine.frames_per_row == gravity_frames(engine.level)
+
 class TestGameEngineIntegration:
     """統合テスト"""
     
@@ -0,0 +1,164 @@
+"""グリッドバックエンドのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.grid import BitboardGrid, ListGrid, create_grid
+from tetris_game.shapes import compile_rotation
+
+T_SHAPE = GameEngine.SHAPES[2][0]
+I_VERTICAL = GameEngine.SHAPES[0][0]
+
+
+@pytest.mark.parametrize("grid_class", [ListGrid, BitboardGrid])
+class TestGridBackends:
+    """両バックエンド共通の振る舞いテスト"""
+
+    def test_fits_walls_and_floor(self, grid_class):
+        """壁と床の判定テスト"""
+        grid = grid_class(10, 20)
+        assert grid.fits(T_SHAPE, 0, 0)
+        assert not grid.fits(T_SHAPE, -1, 0)
+        assert grid.fits(T_SHAPE, 7, 0)
+        assert not grid.fits(T_SHAPE, 8, 0)
+        assert grid.fits(T_SHAPE, 0, 16)
+        assert not grid.fits(T_SHAPE, 0, 17)
+        # 上端より上のセルは許容される
+        assert grid.fits(I_VERTICAL, 3, -3)
+
+    def test_place_and_collide(self, grid_class):
+        """配置後の衝突判定テスト"""
+        grid = grid_class(10, 20)
+        grid.place(T_SHAPE, 0, 16, 3)
+        assert grid.to_list()[19][:3] == [3, 3, 3]
+        assert grid.to_list()[18][1] == 3
+        assert not grid.fits(T_SHAPE, 0, 15)
+        assert grid.fits(T_SHAPE, 3, 16)
+
+    def test_full_rows_and_remove(self, grid_class):
+        """満杯行の検出と消去テスト"""
+        grid = grid_class(4, 6)
+        grid.place(compile_rotation(['####']), 0, 5, 1)
+        grid.place(compile_rotation(['.#..']), 0, 4, 2)
+        assert grid.full_rows() == [5]
+        grid.remove_rows([5])
+        cells = grid.to_list()
+        assert cells[5] == [0, 2, 0, 0]
+        assert all(cell == 0 for row in cells[:5] for cell in row)
+        assert grid.full_rows() == []
+
+    def test_remove_non_contiguous_rows(self, grid_class):
+        """離れた複数行を1パスで詰めるテスト"""
+        grid = grid_class(3, 6)
+        line = compile_rotation(['###'])
+        for y in (1, 3, 5):
+            grid.place(line, 0, y, 1)
+        grid.place(compile_rotation(['#..']), 0, 0, 2)
+        grid.place(compile_rotation(['.#.']), 0, 2, 3)
+        grid.place(compile_rotation(['..#']), 0, 4, 4)
+        assert grid.full_rows([4, 5]) == [5]
+        grid.remove_rows(grid.full_rows())
+        assert grid.to_list() == [
+            [0, 0, 0],
+            [0, 0, 0],
+            [0, 0, 0],
+            [2, 0, 0],
+            [0, 3, 0],
+            [0, 0, 4],
+        ]
+
+    def test_index_matches_rescan(self, grid_class):
+        """差分更新したrow_fill/column_heightsが再集計と一致することの確認"""
+        import random
+
+        rng = random.Random(7)
+        grid = grid_class(10, 20)
+        shapes = [rotation for shape in GameEngine.SHAPES for rotation in shape]
+        for _ in range(300):
+            shape = rng.choice(shapes)
+            x = rng.randint(-2, 9)
+            y = 0
+            if not grid.fits(shape, x, y):
+                continue
+            while grid.fits(shape, x, y + 1):
+                y += 1
+            grid.place(shape, x, y, 1)
+            grid.remove_rows(grid.full_rows(range(20)))
+            fill, heights = grid.row_fill, grid.column_heights
+            grid.reindex()
+            assert (fill, heights) == (grid.row_fill, grid.column_heights)
+
+    def test_drop_distance_matches_stepping(self, grid_class):
+        """drop_distanceが1段ずつの落下と一致することの確認（オーバーハング含む）"""
+        import random
+
+        rng = random.Random(11)
+        grid = grid_class(10, 20)
+        shapes = [rotation for shape in GameEngine.SHAPES for rotation in shape]
+        for _ in range(400):
+            shape = rng.choice(shapes)
+            x = rng.randint(-2, 9)
+            y = rng.randint(0, 19)
+            if not grid.fits(shape, x, y):
+                continue
+            expected = 0
+            while grid.fits(shape, x, y + expected + 1):
+                expected += 1
+            assert grid.drop_distance(shape, x, y) == expected
+            if rng.random() < 0.3:
+                grid.place(shape, x, y + expected, 1)
+                grid.remove_rows(grid.full_rows(range(20)))
+
+    def test_row_masks(self, grid_class):
+        """行ビットマスクがセルの占有と一致することの確認"""
+        grid = grid_class(10, 20)
+        grid.place(T_SHAPE, 0, 16, 3)
+        grid.place(I_VERTICAL, 5, 15, 1)
+        masks = grid.row_masks()
+        assert masks[19] == 0b0010000111
+        assert masks[18] == 0b0010000010
+        assert masks[16] == 0b0010000000
+        assert masks[:16] == [0] * 16
+
+
+class TestBitboardEngine:
+    """bitboardバックエンドを使ったGameEngineのテスト"""
+
+    def test_unknown_backend(self):
+        """未知のバックエンド指定テスト"""
+        with pytest.raises(ValueError):
+            create_grid('hexagonal', 10, 20)
+
+    def test_same_result_as_list_backend(self):
+        """listバックエンドと同じ進行になることの確認"""
+        import random
+
+        results = []
+        for backend in ('list', 'bitboard'):
+            random.seed(1234)
+            engine = GameEngine(10, 20, backend=backend)
+            for step in range(2000):
+                if step % 3 == 0:
+                    engine.move_piece(step % 2 * 2 - 1, 0)
+                if step % 7 == 0:
+                    engine.rotate_piece()
+                engine.update(500)
+                if engine.game_over:
+                    break
+            results.append((engine.get_game_state()['grid'], engine.score, engine.lines_cleared))
+        assert results[0] == results[1]
+
+    def test_game_state_grid_view(self):
+        """get_game_stateが2次元リストを返すことの確認"""
+        engine = GameEngine(10, 20, backend='bitboard')
+        engine.hard_drop()
+        engine.update(engine.fall_speed)
+        grid = engine.get_game_state()['grid']
+        assert len(grid) == 20
+        assert all(len(row) == 10 for row in grid)
+        assert sum(cell != 0 for row in grid for cell in row) == 4
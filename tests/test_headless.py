@@ -0,0 +1,74 @@
+"""ヘッドレス実行のテスト"""
+
+import pytest
+import subprocess
+import sys
+import os
+
+# srcディレクトリをパスに追加
+SRC_PATH = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, SRC_PATH)
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import idle_policy, load_script, main, make_random_policy, run_game
+
+
+class TestHeadless:
+    """ヘッドレス実行のテスト"""
+
+    def test_no_pygame_import(self):
+        """ヘッドレスモジュールがpygameをimportしないことの確認"""
+        code = ("import sys; import tetris_game.headless; "
+                "sys.exit(1 if 'pygame' in sys.modules else 0)")
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC_PATH))
+        assert subprocess.run([sys.executable, '-c', code], env=env).returncode == 0
+
+    def test_idle_game_runs_to_game_over(self):
+        """入力なしでもゲームオーバーまで進むことの確認"""
+        engine = GameEngine(10, 20)
+        result = run_game(engine, policy=idle_policy, dt=500)
+        assert result['game_over']
+        assert result['pieces'] > 0
+        assert result['ticks'] < 1000
+
+    def test_random_policy_is_reproducible(self):
+        """同じシードのランダムポリシーが同じ入力列を返すことの確認"""
+        engine = GameEngine(10, 20)
+        first = make_random_policy(3)
+        second = make_random_policy(3)
+        assert [first(engine) for _ in range(50)] == [second(engine) for _ in range(50)]
+
+    def test_max_ticks(self):
+        """max_ticksで打ち切られることの確認"""
+        result = run_game(GameEngine(10, 20), policy=idle_policy, max_ticks=10)
+        assert result['ticks'] == 10
+        assert not result['game_over']
+
+    def test_load_script(self):
+        """入力スクリプトの読み込みテスト"""
+        events = load_script(["# コメント", "0 left", "", "0 rotate", "5 drop  # 落下"])
+        assert events == {0: ['left', 'rotate'], 5: ['drop']}
+        with pytest.raises(ValueError):
+            load_script(["0 jump"])
+        with pytest.raises(ValueError):
+            load_script(["left"])
+
+    def test_script_drives_engine(self):
+        """スクリプト入力でピースが動くことの確認"""
+        engine = GameEngine(10, 20)
+        run_game(engine, script={0: ['left', 'left']}, dt=1, max_ticks=1)
+        assert engine.current_piece['x'] == 1
+
+    def test_main_json(self, capsys):
+        """CLIのJSON出力テスト"""
+        assert main(['--games', '2', '--policy', 'idle', '--dt', '500', '--json']) == 0
+        lines = capsys.readouterr().out.strip().splitlines()
+        assert len(lines) == 2
+        assert '"seed": 1' in lines[1]
+
+    @pytest.mark.parametrize("option", ['--backend', '--randomizer'])
+    def test_main_rejects_unknown_choice(self, option, capsys):
+        """未知のバックエンド・ランダマイザは argparse の使い方エラーになることの確認"""
+        with pytest.raises(SystemExit):
+            main([option, 'bitbord'])
+        assert 'invalid choice' in capsys.readouterr().err
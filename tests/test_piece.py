@@ -0,0 +1,59 @@
+"""Pieceクラスのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.piece import Piece
+
+
+class TestPiece:
+    """Pieceクラスのテスト"""
+
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化"""
+        self.piece = Piece(2, GameEngine.SHAPES[2], 1, 3, 4)
+
+    def test_slots(self):
+        """__slots__により任意属性を持てないことの確認"""
+        assert not hasattr(self.piece, '__dict__')
+        with pytest.raises(AttributeError):
+            self.piece.speed = 1
+
+    def test_attributes(self):
+        """属性アクセスのテスト"""
+        assert self.piece.kind == 2
+        assert self.piece.color == 3
+        assert self.piece.rotation_shape is GameEngine.SHAPES[2][1]
+
+    def test_dict_adapter_read(self):
+        """辞書形式の読み出しテスト"""
+        assert self.piece['x'] == 3
+        assert self.piece['y'] == 4
+        assert self.piece['rotation'] == 1
+        assert self.piece['color'] == 3
+        assert self.piece['shape'] is GameEngine.SHAPES[2]
+        assert 'shape' in self.piece
+        assert 'speed' not in self.piece
+        assert self.piece.get('speed', 0) == 0
+        with pytest.raises(KeyError):
+            self.piece['speed']
+
+    def test_dict_adapter_write(self):
+        """辞書形式の書き込みテスト"""
+        self.piece['x'] += 1
+        assert self.piece.x == 4
+        with pytest.raises(KeyError):
+            self.piece['color'] = 5
+
+    def test_copy_is_independent(self):
+        """複製が独立していることの確認"""
+        clone = self.piece.copy()
+        assert clone == self.piece
+        clone.y += 1
+        assert clone != self.piece
+        assert self.piece.y == 4
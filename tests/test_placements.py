@@ -0,0 +1,103 @@
+"""固定位置列挙のテスト"""
+
+from collections import deque
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy, run_game
+
+
+def naive_placements(engine):
+    """エンジンの操作メソッドだけを使った幅優先探索で固定位置を求める"""
+    original = engine.current_piece
+    if not engine.is_valid_position(original):
+        return set()
+    start = (original.rotation, original.x, original.y)
+    seen = {start}
+    queue = deque([start])
+    locks = set()
+    while queue:
+        state = queue.popleft()
+        for action in GameEngine.ACTIONS:
+            piece = original.copy()
+            piece.rotation, piece.x, piece.y = state
+            engine.current_piece = piece
+            engine.apply_action(action)
+            moved = (piece.rotation, piece.x, piece.y)
+            if moved not in seen:
+                seen.add(moved)
+                queue.append(moved)
+        piece = original.copy()
+        piece.rotation, piece.x, piece.y = state
+        if not engine.is_valid_position(piece, dy=1):
+            locks.add(state)
+    engine.current_piece = original
+    return locks
+
+
+def spawn(engine, kind, rotation=0):
+    """指定形状のピースを出現位置に置く"""
+    engine.current_piece = engine._piece_from_state((kind, rotation, engine.grid_width // 2 - 2, 0))
+
+
+class TestEnumeratePlacements:
+    """GameEngine.enumerate_placements のテスト"""
+
+    @pytest.mark.parametrize("kind,expected", [(0, 17), (1, 9), (2, 34), (3, 17)])
+    def test_empty_board_counts(self, kind, expected):
+        """空の盤面での固定位置数の確認（回転ごとの横位置の数の合計）"""
+        engine = GameEngine(10, 20, seed=1)
+        spawn(engine, kind)
+        placements = engine.enumerate_placements()
+        assert len(placements) == expected
+        assert len({(p.rotation, p.x, p.y) for p in placements}) == expected
+        assert placements[0].path == ('drop',)
+
+    @pytest.mark.parametrize("backend", ["list", "bitboard"])
+    def test_matches_naive_search(self, backend):
+        """ブロックが積まれた盤面で素朴な探索と同じ位置が得られることの確認"""
+        for seed in range(4):
+            engine = GameEngine(10, 20, backend=backend, seed=seed)
+            run_game(engine, policy=make_random_policy(seed, input_rate=0.3), dt=100, max_ticks=80)
+            for kind in range(len(GameEngine.SHAPES)):
+                spawn(engine, kind)
+                found = {(p.rotation, p.x, p.y) for p in engine.enumerate_placements()}
+                assert found == naive_placements(engine)
+
+    def test_paths_reach_placement(self):
+        """入力列を再生するとその固定位置に着くことの確認"""
+        engine = GameEngine(10, 20, seed=3)
+        run_game(engine, policy=make_random_policy(3, input_rate=0.3), dt=100, max_ticks=80)
+        snap = engine.snapshot()
+        for placement in engine.enumerate_placements():
+            engine.restore(snap)
+            for action in placement.path:
+                engine.apply_action(action)
+            piece = engine.current_piece
+            assert (piece.rotation, piece.x, piece.y) == placement[:3]
+            assert not engine.is_valid_position(piece, dy=1)
+
+    def test_tuck_under_overhang(self):
+        """オーバーハングの下へ滑り込む位置も見つかることの確認"""
+        engine = GameEngine(6, 8, seed=1)
+        # 右側に屋根を作り、その下の隙間へ O を押し込めるようにする
+        engine.grid[5][3:6] = [1, 1, 1]
+        engine.board.reindex()
+        spawn(engine, 1)
+        tucks = [p for p in engine.enumerate_placements() if p.x == 3 and p.y == 4]
+        assert len(tucks) == 1
+        assert tucks[0].path[:2] == ('left', 'drop')
+        assert tucks[0].path[-1] == 'right'
+
+    def test_blocked_spawn(self):
+        """開始位置に置けない場合は空リストになることの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        engine.grid[3][:] = [1] * 10
+        engine.board.reindex()
+        assert engine.enumerate_placements() == []
@@ -0,0 +1,110 @@
+"""リプレイ再生・検証のテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.bot import BeamSearchBot, play_game
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy, run_game
+from tetris_game.playback import main, replay_game, verify_replay, verify_replays
+from tetris_game.replay import LOCK_CODE, Replay, ReplayRecorder, load_replay
+
+
+def record_random(path, seed, randomizer='uniform'):
+    """ランダムポリシーのゲームを記録"""
+    engine = GameEngine(10, 20, seed=seed, randomizer=randomizer)
+    with ReplayRecorder(engine, str(path)):
+        run_game(engine, policy=make_random_policy(seed))
+    return str(path)
+
+
+def record_bot(path, seed=2, pieces=60):
+    """ラインを消すボットのゲームを記録"""
+    engine = GameEngine(10, 20, seed=seed)
+    with ReplayRecorder(engine, str(path)):
+        play_game(engine, BeamSearchBot(depth=1), max_pieces=pieces)
+    return str(path)
+
+
+class TestReplayGame:
+    """replay_game / verify_replay のテスト"""
+
+    @pytest.mark.parametrize("backend", ["list", "bitboard"])
+    @pytest.mark.parametrize("randomizer", ["uniform", "bag"])
+    def test_recorded_games_verify(self, tmp_path, backend, randomizer):
+        """記録したゲームがどのバックエンドでも一致することの確認"""
+        path = record_random(tmp_path / 'game.trp', 4, randomizer)
+        result = verify_replay(path, backend)
+        assert result.ok
+        assert result.divergence is None
+        assert result.seed == 4
+
+    def test_bot_game_with_lines(self, tmp_path):
+        """ラインを消したゲームも一致することの確認"""
+        result = verify_replay(record_bot(tmp_path / 'bot.trp'))
+        assert result.ok
+        assert result.lines > 0
+
+    def test_reports_first_mismatching_tick(self, tmp_path):
+        """固定イベントを消すとそのティックで食い違いが報告されることの確認"""
+        replay = load_replay(record_random(tmp_path / 'game.trp', 6))
+        index = [event.code for event in replay.events].index(LOCK_CODE)
+        lock_tick = replay.events[index].tick
+        events = replay.events[:index] + replay.events[index + 1:]
+        _, divergence = replay_game(Replay(replay.header._replace(events=len(events)), events))
+        assert divergence is not None
+        assert divergence.tick == lock_tick
+
+    def test_detects_engine_regression(self, tmp_path, monkeypatch):
+        """スコア計算が変わると最終結果の食い違いとして検出されることの確認"""
+        path = record_bot(tmp_path / 'bot.trp')
+        original = GameEngine.clear_lines
+
+        def double_score(self, rows=None):
+            before = self.score
+            cleared = original(self, rows)
+            self.score += self.score - before
+            return cleared
+
+        monkeypatch.setattr(GameEngine, 'clear_lines', double_score)
+        result = verify_replay(path)
+        assert not result.ok
+        assert 'score' in result.divergence.reason
+        assert result.divergence.tick == result.ticks
+
+    def test_tampered_header_score(self, tmp_path):
+        """ヘッダのスコアを書き換えたリプレイは不一致になることの確認"""
+        replay = load_replay(record_bot(tmp_path / 'bot.trp'))
+        forged = Replay(replay.header._replace(score=replay.header.score + 100), replay.events)
+        _, divergence = replay_game(forged)
+        assert divergence is not None
+        assert 'score' in divergence.reason
+
+
+class TestVerifyDirectory:
+    """ディレクトリ単位の並列検証のテスト"""
+
+    def test_parallel_results_in_order(self, tmp_path):
+        """並列検証が paths の順に結果を返し、壊れたファイルも報告することの確認"""
+        paths = [record_random(tmp_path / f'{seed}.trp', seed) for seed in range(6)]
+        broken = tmp_path / 'broken.trp'
+        broken.write_bytes(b'not a replay')
+        paths.append(str(broken))
+        results = list(verify_replays(paths, workers=2, chunk_size=2))
+        assert [result.path for result in results] == paths
+        assert [result.ok for result in results] == [True] * 6 + [False]
+
+    def test_main_exit_code(self, tmp_path, capsys):
+        """食い違いがあると終了コード1で FAIL 行を出すことの確認"""
+        record_random(tmp_path / '1.trp', 1)
+        assert main([str(tmp_path), '--workers', '0']) == 0
+        (tmp_path / '2.trp').write_bytes(b'TRPL')
+        assert main([str(tmp_path), '--workers', '0']) == 1
+        captured = capsys.readouterr()
+        assert 'FAIL' in captured.out
+        assert '2.trp' in captured.out
+        assert '1/2 replays verified' in captured.err
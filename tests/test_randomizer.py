@@ -0,0 +1,81 @@
+"""ランダマイザのテスト"""
+
+import pytest
+import random
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.randomizer import BagRandomizer, UniformRandomizer, create_randomizer
+
+
+class TestRandomizer:
+    """Randomizerのテスト"""
+
+    def test_uniform_matches_randint(self):
+        """uniformがrandom.Random(seed).randintと同じ列を返すことの確認"""
+        rng = random.Random(42)
+        randomizer = UniformRandomizer(7, seed=42)
+        assert [randomizer.next() for _ in range(200)] == [rng.randint(0, 6) for _ in range(200)]
+
+    def test_bag_contains_each_kind_once(self):
+        """7-bagが7個ごとに全形状を1回ずつ出すことの確認"""
+        randomizer = BagRandomizer(7, seed=1)
+        for _ in range(30):
+            assert sorted(randomizer.next() for _ in range(7)) == list(range(7))
+
+    def test_peek_does_not_consume(self):
+        """peekがキューを消費しないことの確認"""
+        randomizer = create_randomizer('bag', 7, seed=5)
+        upcoming = randomizer.peek(100)
+        assert [randomizer.next() for _ in range(100)] == upcoming
+
+    def test_state_roundtrip(self):
+        """getstate/setstateで同じ列に戻ることの確認"""
+        randomizer = UniformRandomizer(7, seed=9)
+        randomizer.next()
+        state = randomizer.getstate()
+        first = [randomizer.next() for _ in range(150)]
+        randomizer.setstate(state)
+        assert [randomizer.next() for _ in range(150)] == first
+
+    def test_unknown_randomizer(self):
+        """未知のランダマイザ指定テスト"""
+        with pytest.raises(ValueError):
+            create_randomizer('tgm', 7)
+
+
+class TestEngineSeed:
+    """GameEngineのシード指定テスト"""
+
+    def kinds(self, engine, count):
+        """count個のピース種類を取得"""
+        return [engine.get_new_piece().kind for _ in range(count)]
+
+    def test_same_seed_same_pieces(self):
+        """同じシードなら同じピース列になることの確認"""
+        assert self.kinds(GameEngine(seed=3), 50) == self.kinds(GameEngine(seed=3), 50)
+
+    def test_engines_do_not_share_state(self):
+        """同一プロセス内のエンジンが乱数状態を共有しないことの確認"""
+        solo = self.kinds(GameEngine(seed=3), 50)
+        first = GameEngine(seed=3)
+        second = GameEngine(seed=4)
+        interleaved = []
+        for _ in range(50):
+            interleaved.append(first.get_new_piece().kind)
+            second.get_new_piece()
+            random.random()
+        assert interleaved == solo
+
+    def test_reset_with_seed(self):
+        """reset_game(seed)でピース列をやり直せることの確認"""
+        engine = GameEngine(seed=8, randomizer='bag')
+        expected = (engine.current_piece.kind, engine.next_piece.kind)
+        engine.hard_drop()
+        engine.update(engine.fall_speed)
+        engine.reset_game(seed=8)
+        assert (engine.current_piece.kind, engine.next_piece.kind) == expected
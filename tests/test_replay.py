@@ -0,0 +1,195 @@
+"""リプレイ記録のテスト"""
+
+import io
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import idle_policy, main, make_random_policy, run_game
+from tetris_game.replay import (ADVANCE_CODE, DT_CODE, HEADER_SIZE, LOCK_CODE, ReplayError,
+                                ReplayRecorder, decode_varint, encode_varint, load_replay,
+                                pack_header, parse_replay)
+
+
+def record_game(path, seed=3, policy=None, randomizer='uniform', max_ticks=100000):
+    """ランダムポリシーで1ゲーム記録し、(エンジン, ヘッダ) を返す"""
+    engine = GameEngine(10, 20, seed=seed, randomizer=randomizer)
+    recorder = ReplayRecorder(engine, str(path))
+    run_game(engine, policy=policy or make_random_policy(seed), max_ticks=max_ticks)
+    return engine, recorder.close()
+
+
+def replay_events(replay):
+    """イベント列を新しいエンジンで再生"""
+    header = replay.header
+    engine = GameEngine(header.width, header.height, seed=header.seed, randomizer=header.randomizer,
+                        max_catch_up=header.max_catch_up)
+    events = iter(replay.events)
+    event = next(events, None)
+    dt = 0
+    for tick in range(header.ticks):
+        while event is not None and event.tick == tick:
+            if event.code == DT_CODE:
+                dt = event.value
+            elif event.code == ADVANCE_CODE:
+                engine.advance(event.value)
+            elif event.code != LOCK_CODE:
+                engine.apply_action(GameEngine.ACTIONS[event.code])
+            event = next(events, None)
+        engine.update(dt)
+    return engine
+
+
+class TestVarint:
+    """varint エンコードのテスト"""
+
+    @pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 35 + 7])
+    def test_roundtrip(self, value):
+        """エンコードしてデコードすると元に戻ることの確認"""
+        out = bytearray()
+        encode_varint(value, out)
+        assert decode_varint(bytes(out), 0) == (value, len(out))
+        assert len(out) == max(1, (value.bit_length() + 6) // 7)
+
+
+class TestReplayRecorder:
+    """ReplayRecorder のテスト"""
+
+    def test_header_records_final_state(self, tmp_path):
+        """ヘッダに最終結果とハッシュが書き込まれることの確認"""
+        engine, header = record_game(tmp_path / 'game.trp')
+        replay = load_replay(str(tmp_path / 'game.trp'))
+        assert replay.header == header
+        assert header.complete
+        assert header.game_over == engine.game_over
+        assert (header.score, header.lines, header.pieces) == (
+            engine.score, engine.lines_cleared, engine.pieces_placed)
+        assert header.state_hash == engine.state_hash
+        assert len(replay.events) == header.events
+
+    @pytest.mark.parametrize("randomizer", ["uniform", "bag"])
+    def test_events_reproduce_game(self, tmp_path, randomizer):
+        """記録したイベントを再生すると同じ局面になることの確認"""
+        engine, header = record_game(tmp_path / 'game.trp', seed=11, randomizer=randomizer)
+        replayed = replay_events(load_replay(str(tmp_path / 'game.trp')))
+        assert replayed.state_hash == header.state_hash
+        assert replayed.score == engine.score
+        assert replayed.grid == engine.grid
+
+    def test_record_to_stream(self, tmp_path):
+        """ストリームに記録すると現在位置から書き、閉じずに残すことの確認"""
+        stream = io.BytesIO(b'prefix')
+        stream.seek(0, io.SEEK_END)
+        engine = GameEngine(10, 20, seed=5)
+        recorder = ReplayRecorder(engine, stream)
+        run_game(engine, policy=make_random_policy(5), max_ticks=2000)
+        header = recorder.close()
+        assert not stream.closed
+        data = stream.getvalue()
+        assert data[:6] == b'prefix'
+        assert parse_replay(data[6:]).header == header
+
+    def test_compact_size(self, tmp_path):
+        """dt が一定なら数百バイトに収まることの確認"""
+        path = tmp_path / 'game.trp'
+        _, header = record_game(path, max_ticks=3000)
+        assert os.path.getsize(path) - HEADER_SIZE < 2 * header.events + 8
+        assert os.path.getsize(path) < 1000
+
+    def test_gravity_not_recorded(self, tmp_path):
+        """重力による落下は入力として記録されず、固定だけが記録されることの確認"""
+        _, header = record_game(tmp_path / 'idle.trp', policy=idle_policy)
+        events = load_replay(str(tmp_path / 'idle.trp')).events
+        assert events[0].code == DT_CODE
+        assert [event.code for event in events[1:]] == [LOCK_CODE] * header.pieces
+        assert header.ticks > 0
+
+    def test_multiple_locks_per_update(self, tmp_path):
+        """1回の update で複数回固定されたら LOCK がその数だけ記録されることの確認"""
+        engine = GameEngine(10, 20, seed=1, max_catch_up=100)
+        with ReplayRecorder(engine, str(tmp_path / 'game.trp')):
+            engine.update(engine.fall_speed * 60)
+            placed = engine.pieces_placed
+        events = load_replay(str(tmp_path / 'game.trp')).events
+        assert placed >= 2
+        assert [event.code for event in events[1:]] == [LOCK_CODE] * placed
+
+    def test_advance_recorded(self, tmp_path):
+        """advance はステップ数つきで記録され、再生で同じ局面になることの確認"""
+        engine = GameEngine(10, 20, seed=2)
+        with ReplayRecorder(engine, str(tmp_path / 'game.trp')):
+            engine.move_piece(-1, 0)
+            engine.advance(45)
+            engine.update(100)
+        replay = load_replay(str(tmp_path / 'game.trp'))
+        assert (ADVANCE_CODE, 45) in [(event.code, event.value) for event in replay.events]
+        assert LOCK_CODE not in [event.code for event in replay.events]
+        assert replay_events(replay).state_hash == engine.state_hash
+
+    def test_rejects_old_version(self, tmp_path):
+        """update の仕様が違う古いバージョンは読み込めないことの確認"""
+        path = tmp_path / 'game.trp'
+        _, header = record_game(path, max_ticks=50)
+        data = path.read_bytes()
+        path.write_bytes(pack_header(header._replace(version=2)) + data[HEADER_SIZE:])
+        with pytest.raises(ReplayError):
+            load_replay(str(path))
+
+    def test_frame_mode_not_recordable(self, tmp_path):
+        """記録中に run_frames を呼ぶとエラーになることの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        with ReplayRecorder(engine, str(tmp_path / 'game.trp')):
+            with pytest.raises(ValueError):
+                engine.run_frames(10)
+        assert engine.run_frames(10) == 10
+
+    def test_unhooks_on_close(self, tmp_path):
+        """close() 後はエンジンのメソッドが元に戻ることの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        with ReplayRecorder(engine, str(tmp_path / 'game.trp')):
+            assert 'update' in engine.__dict__
+        assert 'update' not in engine.__dict__
+        assert 'move_piece' not in engine.__dict__
+        assert 'advance' not in engine.__dict__
+
+    def test_unsupported_move(self, tmp_path):
+        """記録できない移動はエラーになることの確認"""
+        engine = GameEngine(10, 20, seed=1)
+        with ReplayRecorder(engine, str(tmp_path / 'game.trp')):
+            with pytest.raises(ValueError):
+                engine.move_piece(2, 0)
+
+    def test_detects_corruption(self, tmp_path):
+        """本体・ヘッダの破損と未完了のファイルを検出することの確認"""
+        path = tmp_path / 'game.trp'
+        record_game(path)
+        data = bytearray(path.read_bytes())
+
+        body = bytearray(data)
+        body[-1] ^= 0xFF
+        path.write_bytes(bytes(body))
+        with pytest.raises(ReplayError):
+            load_replay(str(path))
+
+        header = bytearray(data)
+        header[10] ^= 0xFF
+        path.write_bytes(bytes(header))
+        with pytest.raises(ReplayError):
+            load_replay(str(path))
+
+        engine = GameEngine(10, 20, seed=1)
+        recorder = ReplayRecorder(engine, str(tmp_path / 'open.trp'))
+        recorder._stream.flush()
+        with pytest.raises(ReplayError):
+            load_replay(str(tmp_path / 'open.trp'))
+        recorder.close()
+
+    def test_cli_record_dir(self, tmp_path):
+        """tetris-sim --record-dir でシードごとに保存されることの確認"""
+        assert main(['--games', '2', '--seed', '5', '--json', '--record-dir', str(tmp_path)]) == 0
+        assert sorted(os.listdir(tmp_path)) == ['5.trp', '6.trp']
+        assert load_replay(str(tmp_path / '6.trp')).header.seed == 6
@@ -0,0 +1,217 @@
+"""ゲームサーバーと負荷生成クライアントのテスト"""
+
+import asyncio
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.delta import FRAME_DELTA, FRAME_KEY, DeltaDecoder
+from tetris_game.game_engine import GameEngine
+from tetris_game.loadgen import ClientSession, load_test
+from tetris_game.server import FRAME_HEADER, GameServer, Session, percentiles
+
+
+class FakeTransport:
+    """書き込みを記録するだけのトランスポート"""
+
+    def __init__(self):
+        self.written = []
+        self.buffered = 0
+        self.closed = False
+        self.reading = True
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def write(self, data):
+        self.written.append(data)
+
+    def close(self):
+        self.closed = True
+
+    def pause_reading(self):
+        self.reading = False
+
+    def resume_reading(self):
+        self.reading = True
+
+
+def frames_of(transport):
+    """記録された書き込みからフレームを取り出す"""
+    frames = []
+    for data in transport.written:
+        length, _ = FRAME_HEADER.unpack_from(data)
+        assert len(data) == FRAME_HEADER.size + length
+        frames.append(data[FRAME_HEADER.size:])
+    return frames
+
+
+def fake_session(server, seed=1):
+    """FakeTransport につながったセッション"""
+    session = Session(server)
+    session.engine = GameEngine(seed=seed)
+    session.connection_made(FakeTransport())
+    return session
+
+
+async def read_frame(reader):
+    """ストリームから1フレーム読む"""
+    length, _ = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return await reader.readexactly(length)
+
+
+class TestSession:
+    """ティックごとの送信とバックプレッシャーのテスト"""
+
+    def test_sends_only_when_changed(self):
+        """最初はキーフレーム、その後は局面が変わったか入力があったティックだけ送ることの確認"""
+        server = GameServer()
+        session = fake_session(server)
+        transport = session.transport
+        server.tick(16)
+        server.tick(16)
+        assert [frame[0] for frame in frames_of(transport)] == [FRAME_KEY]
+        session.data_received(bytes([GameEngine.ACTIONS.index('left')]))
+        server.tick(16)
+        server.tick(session.engine.fall_speed)
+        frames = frames_of(transport)
+        assert [frame[0] for frame in frames] == [FRAME_KEY, FRAME_DELTA, FRAME_DELTA]
+        decoder = DeltaDecoder()
+        states = [decoder.decode(frame) for frame in frames]
+        assert states[-1] == session.engine.state_snapshot()
+        assert server.frames_sent == 3
+
+    def test_slow_client_gets_keyframe_after_backlog(self):
+        """送信バッファが溜まっている間は送らず、空いたらキーフレームで送り直すことの確認"""
+        server = GameServer(high_water=100, max_buffer=1000)
+        session = fake_session(server)
+        transport = session.transport
+        server.tick(16)
+        transport.buffered = 500
+        server.tick(session.engine.fall_speed)
+        server.tick(session.engine.fall_speed)
+        assert len(transport.written) == 1
+        assert server.frames_skipped == 2
+        transport.buffered = 0
+        server.tick(16)
+        frames = frames_of(transport)
+        assert frames[-1][0] == FRAME_KEY
+        assert DeltaDecoder().decode(frames[-1]) == session.engine.state_snapshot()
+
+    def test_disconnects_over_max_buffer(self):
+        """送信バッファが上限を超えたクライアントを切断することの確認"""
+        server = GameServer(high_water=100, max_buffer=1000)
+        session = fake_session(server)
+        server.tick(16)
+        session.transport.buffered = 5000
+        server.tick(session.engine.fall_speed)
+        assert session.transport.closed
+        assert server.sessions == []
+        assert server.disconnected == 1
+
+    def test_input_flood_is_throttled(self):
+        """1ティックに適用する入力数を抑え、溜まりすぎたら受信を止めて減ったら再開することの確認"""
+        server = GameServer(max_inputs_per_tick=4, input_high_water=10)
+        session = fake_session(server)
+        transport = session.transport
+        session.data_received(bytes([GameEngine.ACTIONS.index('rotate')]) * 8)
+        assert transport.reading
+        session.data_received(bytes([GameEngine.ACTIONS.index('rotate')]) * 8)
+        assert not transport.reading
+        server.tick(16)
+        assert len(session.inputs) == 12
+        assert not transport.reading
+        server.tick(16)
+        assert len(session.inputs) == 8
+        server.tick(16)
+        assert len(session.inputs) == 4
+        assert transport.reading
+        assert len(frames_of(transport)) == 3
+
+    def test_frames_ack_applied_inputs(self):
+        """フレームヘッダに適用済みの入力数が入ることの確認"""
+        server = GameServer(max_inputs_per_tick=4)
+        session = fake_session(server)
+        server.tick(16)
+        session.data_received(bytes([GameEngine.ACTIONS.index('rotate')]) * 6)
+        server.tick(16)
+        server.tick(16)
+        acks = [FRAME_HEADER.unpack_from(data)[1] for data in session.transport.written]
+        assert acks == [0, 4, 6]
+
+    def test_client_latency_waits_for_ack(self):
+        """入力を適用する前のフレームでは遅延を記録しないことの確認"""
+        latencies = []
+        client = ClientSession(latencies)
+        client.connection_made(FakeTransport())
+        client.send(0)
+        client.send(1)
+        client.data_received(FRAME_HEADER.pack(1, 0) + b'\x01')
+        assert latencies == []
+        client.data_received(FRAME_HEADER.pack(1, 1) + b'\x01' + FRAME_HEADER.pack(1, 2)[:2])
+        assert len(latencies) == 1
+        assert client.frames == 2
+        client.send(2)
+        client.data_received(FRAME_HEADER.pack(1, 2)[2:] + b'\x01')
+        assert len(latencies) == 1
+        client.data_received(FRAME_HEADER.pack(1, 3) + b'\x01')
+        assert len(latencies) == 2
+
+    def test_invalid_input_closes(self):
+        """未知の入力バイトを送ったクライアントを切断することの確認"""
+        server = GameServer()
+        session = fake_session(server)
+        session.data_received(b'\xff')
+        server.tick(16)
+        assert session.transport.closed
+        assert server.sessions == []
+
+
+class TestGameServer:
+    """実際の TCP 接続でのテスト"""
+
+    def test_clients_receive_their_games(self):
+        """複数クライアントがそれぞれのゲームのフレームを受け取り、入力が反映されることの確認"""
+        async def scenario():
+            server = GameServer(tick_ms=5)
+            await server.start()
+            host, port = server.address
+            try:
+                streams = [await asyncio.open_connection(host, port) for _ in range(3)]
+                decoders = [DeltaDecoder() for _ in streams]
+                for (reader, _), decoder in zip(streams, decoders):
+                    assert decoder.decode(await read_frame(reader)) is not None
+                reader, writer = streams[0]
+                start_x = decoders[0].state.current_piece[2]
+                writer.write(bytes([GameEngine.ACTIONS.index('right')]))
+                while decoders[0].state.current_piece[2] == start_x:
+                    decoders[0].decode(await asyncio.wait_for(read_frame(reader), 2))
+                assert len(server.sessions) == 3
+                for _, writer in streams:
+                    writer.close()
+            finally:
+                await server.close()
+            return server.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats.ticks > 0
+        assert stats.frames_sent >= 4
+        assert set(stats.duration) == {'p50', 'p90', 'p99', 'max'}
+
+    def test_load_generator(self):
+        """負荷生成クライアントが別プロセスのサーバーに接続して統計を返すことの確認"""
+        result = load_test(sessions=20, duration=0.3, input_rate=0.5, tick_ms=10)
+        assert result.connected == 20
+        assert result.frames >= 20
+        assert result.inputs > 0
+        assert result.latency['max'] > 0
+        assert result.server.ticks > 0
+        assert result.server.sessions == 20
+
+    def test_percentiles(self):
+        """百分位点の計算の確認"""
+        values = percentiles(list(range(101)), (50, 99))
+        assert values == {'p50': 50, 'p99': 99, 'max': 100}
+        assert percentiles([])['max'] == 0.0
@@ -0,0 +1,48 @@
+"""形状コンパイルのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.shapes import compile_rotation
+
+
+class TestCompileShapes:
+    """compile_shapes / compile_rotation のテスト"""
+
+    def test_rotation_counts(self):
+        """回転数が元の定義と一致することの確認"""
+        assert [len(s) for s in GameEngine.SHAPES] == [len(s) for s in GameEngine.TETRIS_SHAPES]
+
+    def test_every_rotation_has_four_cells(self):
+        """全回転が4セルであることの確認"""
+        for shape in GameEngine.SHAPES:
+            for rotation in shape:
+                assert len(rotation.cells) == 4
+
+    def test_cells_match_source_strings(self):
+        """占有セルが文字列定義と一致することの確認"""
+        for source, shape in zip(GameEngine.TETRIS_SHAPES, GameEngine.SHAPES):
+            for matrix, rotation in zip(source, shape):
+                expected = {(x, y) for y, row in enumerate(matrix)
+                            for x, cell in enumerate(row) if cell == '#'}
+                assert set(rotation.cells) == expected
+
+    def test_row_masks_and_bbox(self):
+        """行マスクとバウンディングボックスのテスト"""
+        rotation = compile_rotation(['.....',
+                                     '.....',
+                                     '.#...',
+                                     '###..',
+                                     '.....'])
+        assert rotation.row_masks == ((2, 0b010), (3, 0b111))
+        assert rotation.bbox == (0, 2, 2, 3)
+
+    def test_empty_matrix(self):
+        """空の形状はエラーになることの確認"""
+        with pytest.raises(ValueError):
+            compile_rotation(['.....'])
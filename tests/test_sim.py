@@ -0,0 +1,67 @@
+"""並列シミュレーションのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_policy, run_game
+from tetris_game.sim import SimConfig, main, run_games
+
+CONFIG = SimConfig(max_ticks=2000)
+
+
+def summary(results):
+    """シード順に並べた比較用の結果"""
+    return sorted((r['seed'], r['score'], r['lines'], r['pieces'], r['ticks']) for r in results)
+
+
+class TestRunGames:
+    """run_games のテスト"""
+
+    def test_matches_fresh_engines(self):
+        """エンジンを使い回しても新しいエンジンと同じ結果になることの確認"""
+        expected = []
+        for seed in range(12):
+            engine = GameEngine(10, 20, seed=seed)
+            result = run_game(engine, policy=make_policy('random', seed), max_ticks=2000)
+            expected.append(dict(result, seed=seed))
+        assert summary(run_games(range(12), CONFIG, workers=0)) == summary(expected)
+
+    def test_parallel_matches_serial(self):
+        """並列実行・チャンク分割・エンジン作り直しで結果が変わらないことの確認"""
+        serial = summary(run_games(range(30), CONFIG, workers=0))
+        recycled = CONFIG._replace(recycle_every=2)
+        parallel = summary(run_games(range(30), recycled, workers=2, chunk_size=4, max_pending=3))
+        assert parallel == serial
+        assert [seed for seed, *_ in parallel] == list(range(30))
+
+    def test_results_stream_before_seeds_exhausted(self):
+        """シードを全部投入する前に結果が返り始めることの確認"""
+        consumed = []
+
+        def seeds():
+            for seed in range(1000):
+                consumed.append(seed)
+                yield seed
+
+        results = run_games(seeds(), CONFIG, workers=2, chunk_size=5, max_pending=2)
+        first = next(results)
+        results.close()
+        assert first['seed'] < 10
+        assert len(consumed) < 1000
+
+    def test_invalid_chunk_size(self):
+        """chunk_size の検証テスト"""
+        with pytest.raises(ValueError):
+            next(run_games(range(3), CONFIG, workers=0, chunk_size=0))
+
+    def test_main_json(self, capsys):
+        """CLIのJSON出力テスト"""
+        assert main(['--games', '5', '--workers', '2', '--max-ticks', '500', '--json']) == 0
+        captured = capsys.readouterr()
+        assert len(captured.out.strip().splitlines()) == 5
+        assert '5/5 games' in captured.err
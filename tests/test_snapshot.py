@@ -0,0 +1,146 @@
+"""スナップショット・リストアのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy, run_game
+from tetris_game.snapshot import STATE_HEADER_SIZE, GameStateSnapshot
+
+
+def play(engine, ticks, seed=0):
+    """ランダム入力でticksだけ進める"""
+    run_game(engine, policy=make_random_policy(seed, input_rate=0.5), dt=100, max_ticks=ticks)
+
+
+def observable(engine):
+    """比較用にエンジンの観測可能な状態をまとめる"""
+    return (
+        [row[:] for row in engine.grid],
+        engine.row_fill,
+        engine.column_heights,
+        repr(engine.current_piece),
+        repr(engine.next_piece),
+        engine.score,
+        engine.lines_cleared,
+        engine.level,
+        engine.fall_time,
+        engine.game_over,
+        engine.pieces_placed,
+    )
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+class TestSnapshot:
+    """snapshot / restore のテスト"""
+
+    def test_restore_roundtrip(self, backend):
+        """巻き戻し後に元の状態と同じ進行になることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=21)
+        play(engine, 80)
+        assert not engine.game_over
+        snap = engine.snapshot()
+        before = observable(engine)
+
+        play(engine, 500, seed=1)
+        after_first = observable(engine)
+        assert after_first != before
+
+        engine.restore(snap)
+        assert observable(engine) == before
+
+        play(engine, 500, seed=1)
+        assert observable(engine) == after_first
+
+    def test_snapshot_is_immutable(self, backend):
+        """スナップショットがエンジンの以後の変更に影響されないことの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=4)
+        snap = engine.snapshot()
+        play(engine, 400)
+        assert all(row == bytes(10) for row in snap.grid.rows)
+        assert snap.pieces_placed == 0
+        with pytest.raises(AttributeError):
+            snap.score = 10
+
+    def test_unchanged_rows_are_shared(self, backend):
+        """変更のない行と乱数状態がスナップショット間で共有されることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=2)
+        play(engine, 200)
+        first = engine.snapshot()
+        engine.move_piece(1, 0)
+        second = engine.snapshot()
+        assert all(a is b for a, b in zip(first.grid.rows, second.grid.rows))
+        assert first.randomizer_state[0] is second.randomizer_state[0]
+
+    def test_restore_to_older_snapshot(self, backend):
+        """古いスナップショットへ戻れることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=13)
+        start = engine.snapshot()
+        start_state = observable(engine)
+        play(engine, 1000)
+        engine.snapshot()
+        engine.restore(start)
+        assert observable(engine) == start_state
+
+
+class TestGameStateSnapshot:
+    """state_snapshot / to_bytes / from_bytes のテスト"""
+
+    @pytest.mark.parametrize("backend", ["list", "bitboard"])
+    def test_matches_engine(self, backend):
+        """盤面とピース・カウンタがエンジンと一致することの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=5)
+        play(engine, 300)
+        state = engine.state_snapshot()
+        assert state.grid_view.tolist() == engine.grid
+        assert state.cell(3, 19) == engine.grid[19][3]
+        piece = engine.current_piece
+        assert state.current_piece == (piece.kind, piece.rotation, piece.x, piece.y)
+        assert state.next_piece[0] == engine.next_piece.kind
+        assert (state.score, state.lines_cleared, state.level) == (
+            engine.score, engine.lines_cleared, engine.level)
+        assert (state.pieces_placed, state.game_over) == (engine.pieces_placed, engine.game_over)
+
+    def test_independent_of_engine(self):
+        """以後のエンジンの変更に影響されず、grid_view も書き換えられないことの確認"""
+        engine = GameEngine(10, 20, seed=6)
+        state = engine.state_snapshot()
+        play(engine, 400)
+        assert state.cells == bytes(200)
+        assert state.pieces_placed == 0
+        view = state.grid_view
+        assert view.readonly
+        assert view.obj is state.cells
+        with pytest.raises(TypeError):
+            view[0, 0] = 1
+
+    def test_bytes_roundtrip(self):
+        """to_bytes → from_bytes で元に戻り、盤面が4bitに詰められていることの確認"""
+        engine = GameEngine(10, 20, seed=7)
+        play(engine, 3000)
+        state = engine.state_snapshot()
+        data = state.to_bytes()
+        assert len(data) == STATE_HEADER_SIZE + 100
+        assert GameStateSnapshot.from_bytes(data) == state
+
+    def test_odd_cell_count(self):
+        """セル数が奇数の盤面でも往復できることの確認"""
+        engine = GameEngine(7, 9, seed=1)
+        engine.hard_drop()
+        engine.update(engine.fall_speed)
+        state = engine.state_snapshot()
+        assert GameStateSnapshot.from_bytes(state.to_bytes()) == state
+
+    def test_rejects_bad_data(self):
+        """マジック・長さが合わないデータはエラーになることの確認"""
+        data = GameEngine(10, 20, seed=1).state_snapshot().to_bytes()
+        with pytest.raises(ValueError):
+            GameStateSnapshot.from_bytes(b'XX' + data[2:])
+        with pytest.raises(ValueError):
+            GameStateSnapshot.from_bytes(data[:-1])
+        with pytest.raises(ValueError):
+            GameStateSnapshot.from_bytes(data[:5])
@@ -0,0 +1,123 @@
+"""プレイ統計ストアのテスト"""
+
+import sqlite3
+import time
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game import stats as stats_module
+from tetris_game.sim import main as sim_main
+from tetris_game.stats import StatsStore, day_of, format_play_time, main
+
+DAY = 86400
+BASE = time.mktime((2024, 5, 1, 12, 0, 0, 0, 0, -1))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """一時ディレクトリの統計ストア"""
+    with StatsStore(str(tmp_path / 'stats.db'), batch_size=8, flush_interval=0.05) as store:
+        yield store
+
+
+class TestStatsStore:
+    """StatsStore のテスト"""
+
+    def test_summary(self, store):
+        """記録した結果の累計が読めることの確認"""
+        assert tuple(store.summary()) == (0, 0, 0, 0)
+        store.record(100, 2, 1, 10, 60_000)
+        store.record(300, 5, 1, 20, 90_000, seed=7, source='sim')
+        store.flush()
+        summary = store.summary()
+        assert summary.plays == 2
+        assert (summary.best_score, summary.play_ms, summary.lines) == (300, 150_000, 7)
+
+    def test_top_and_daily(self, store):
+        """スコア上位と日別の集計の確認"""
+        for i in range(30):
+            store.record(i * 10 % 90, i, 1, i, 1000, seed=i, source='sim' if i % 2 else 'game',
+                         played_at=BASE + (i % 3) * DAY)
+        store.flush()
+        top = store.top(5)
+        assert [entry.score for entry in top] == [80, 80, 80, 70, 70]
+        assert top[0].game_id < top[1].game_id
+        assert all(entry.source == 'game' for entry in store.top(5, source='game'))
+        days = store.daily()
+        expected = [day_of(BASE + 2 * DAY), day_of(BASE + DAY), day_of(BASE)]
+        assert [day.day for day in days] == expected
+        assert sum(day.plays for day in days) == 30
+        assert days[2].lines == sum(range(0, 30, 3))
+        assert len(store.daily(2)) == 2
+
+    def test_uses_indexes(self, store):
+        """ランキングがスコアの索引を使うことの確認"""
+        plan = sqlite3.connect(store.path).execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM games ORDER BY score DESC, id LIMIT 10').fetchall()
+        assert any('games_score' in row[-1] for row in plan)
+
+    def test_record_does_not_block(self, tmp_path):
+        """別の接続が書き込みロックを持っていても record() が待たないことの確認"""
+        path = str(tmp_path / 'stats.db')
+        with StatsStore(path, flush_interval=0.01) as store:
+            blocker = sqlite3.connect(path, isolation_level=None)
+            blocker.execute('BEGIN IMMEDIATE')
+            started = time.perf_counter()
+            for i in range(1000):
+                store.record(i, 0, 1, 1, 100)
+            assert time.perf_counter() - started < 0.5
+            blocker.execute('COMMIT')
+            blocker.close()
+            store.flush()
+            assert store.summary().plays == 1000
+
+    def test_persists_and_reset(self, tmp_path):
+        """閉じると残りが書き込まれ、開き直しても残り、リセットで消えることの確認"""
+        path = str(tmp_path / 'stats.db')
+        with StatsStore(path, flush_interval=10) as store:
+            store.record(500, 4, 2, 30, 1000)
+        with StatsStore(path) as store:
+            assert store.summary().best_score == 500
+            store.record(50, 1, 1, 5, 1000)
+            store.reset()
+            assert tuple(store.summary()) == (0, 0, 0, 0)
+            assert store.top() == []
+        with pytest.raises(ValueError):
+            store.record(1, 1, 1, 1, 1)
+
+    def test_writer_failure_raises(self, tmp_path, monkeypatch):
+        """書き込みスレッドが例外で止まったら flush() が待ち続けずに例外を送出することの確認"""
+        def broken_write_batch(conn, records):
+            raise KeyError('broken')
+
+        monkeypatch.setattr(stats_module, 'write_batch', broken_write_batch)
+        store = StatsStore(str(tmp_path / 'stats.db'), flush_interval=0.01)
+        store.record(1, 0, 1, 1, 100)
+        with pytest.raises(RuntimeError) as excinfo:
+            store.flush()
+        assert isinstance(excinfo.value.__cause__, KeyError)
+        with pytest.raises(RuntimeError):
+            store.record(2, 0, 1, 1, 100)
+        with pytest.raises(RuntimeError):
+            store.close()
+        assert not store._writer.is_alive()
+
+    def test_sim_and_cli(self, tmp_path, capsys):
+        """sim --stats の結果が記録され、CLI で表示できることの確認"""
+        path = str(tmp_path / 'stats.db')
+        assert sim_main(['--games', '4', '--workers', '0', '--max-ticks', '300', '--json',
+                         '--stats', path]) == 0
+        capsys.readouterr()
+        assert main(['--db', path, '--top', '3']) == 0
+        out = capsys.readouterr().out
+        assert out.startswith('plays: 4 ')
+        assert out.count('source=sim') == 3
+
+    def test_format_play_time(self):
+        """プレイ時間の表示の確認"""
+        assert format_play_time(0) == "0.0 時間"
+        assert format_play_time(5_400_000) == "1.5 時間"
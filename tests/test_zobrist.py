@@ -0,0 +1,103 @@
+"""Zobristハッシュのテスト"""
+
+import pytest
+import sys
+import os
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tetris_game.game_engine import GameEngine
+from tetris_game.headless import make_random_policy
+from tetris_game.zobrist import grid_hash, zobrist_keys
+
+
+def recomputed_grid_hash(engine):
+    """盤面全体から計算し直したハッシュ"""
+    return grid_hash(engine.grid, zobrist_keys(engine.grid_width, engine.grid_height))[1]
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+class TestZobrist:
+    """state_hash のテスト"""
+
+    def test_incremental_matches_recompute(self, backend):
+        """差分更新したハッシュが再計算と一致し続けることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=17)
+        policy = make_random_policy(17, input_rate=0.6)
+        for _ in range(5000):
+            action = policy(engine)
+            if action:
+                engine.apply_action(action)
+            engine.update(100)
+            assert engine.board.grid_hash == recomputed_grid_hash(engine)
+            if engine.game_over:
+                engine.reset_game()
+                assert engine.board.grid_hash == 0
+
+    def test_same_position_same_hash(self, backend):
+        """異なる手順で同じ局面に到達したら同じハッシュになることの確認"""
+        first = GameEngine(10, 20, backend=backend, seed=5)
+        second = GameEngine(10, 20, backend=backend, seed=5)
+        first.move_piece(1, 0)
+        first.move_piece(0, 1)
+        second.move_piece(0, 1)
+        second.move_piece(1, 0)
+        assert first.state_hash == second.state_hash
+
+    def test_piece_moves_change_hash(self, backend):
+        """ピースの移動・回転でハッシュが変わることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=5)
+        seen = {engine.state_hash}
+        engine.move_piece(1, 0)
+        seen.add(engine.state_hash)
+        engine.move_piece(0, 1)
+        seen.add(engine.state_hash)
+        assert len(seen) == 3
+
+    def test_restore_restores_hash(self, backend):
+        """restoreでハッシュも元に戻ることの確認"""
+        engine = GameEngine(10, 20, backend=backend, seed=6)
+        snap = engine.snapshot()
+        before = engine.state_hash
+        engine.hard_drop()
+        engine.update(engine.fall_speed)
+        assert engine.state_hash != before
+        engine.restore(snap)
+        assert engine.state_hash == before
+
+
+def test_direct_grid_write_changes_hash():
+    """grid への直接の書き込みもハッシュに反映されることの確認"""
+    engine = GameEngine(10, 20, seed=3)
+    before = engine.state_hash
+    engine.grid[19][0] = 1
+    assert engine.state_hash != before
+    assert engine.board.grid_hash == recomputed_grid_hash(engine)
+
+
+def test_bag_remaining_in_hash():
+    """袋の残りが違えば別のハッシュ、残りの集合が同じなら同じハッシュになることの確認"""
+    engines = [GameEngine(10, 20, seed=4, randomizer='bag') for _ in range(3)]
+    rng_state = engines[0].randomizer.getstate()[0]
+    full_bag = tuple(range(7))
+    for engine, remaining in zip(engines, [(2, 3, 4), (2, 3, 5), (4, 2, 3)]):
+        engine.randomizer.setstate((rng_state, remaining + full_bag))
+    first, second, third = (engine.state_hash for engine in engines)
+    assert first != second
+    assert first == third
+    assert GameEngine(10, 20, seed=4).randomizer.bag_remaining() == ()
+
+
+class TestZobristLineClear:
+    """ライン消去時のハッシュ更新テスト"""
+
+    def test_clear_lines_with_stack(self):
+        """積み上がった盤面でのライン消去後も再計算と一致することの確認"""
+        engine = GameEngine(4, 8, seed=1)
+        for y, row in enumerate([[0, 0, 0, 0]] * 3 + [
+                [0, 3, 0, 0], [1, 1, 0, 1], [2, 2, 2, 2], [4, 0, 4, 4], [5, 5, 5, 5]]):
+            engine.grid[y][:] = row
+        assert engine.clear_lines() == 2
+        assert engine.board.grid_hash == recomputed_grid_hash(engine)
+        assert engine.grid[7] == [4, 0, 4, 4]